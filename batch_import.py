@@ -0,0 +1,167 @@
+import logging
+import os
+import pathlib
+import re
+import time
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from logs import log_summary
+from pdf_extractor import PdfExtractor, PdfRecord, Region
+from record_cache import RecordCache
+
+logger = logging.getLogger(__name__)
+
+# 이 개수보다 적으면 process를 띄우는 비용이 더 크므로 현재 process에서 처리함
+MIN_FILES_FOR_PROCESS_POOL = 4
+
+
+class BatchFailure:
+    def __init__(self, pdf: pathlib.Path, error: str) -> None:
+        self.pdf = pdf
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f'BatchFailure({self.pdf.name!r}, {self.error!r})'
+
+
+class BatchResult:
+    def __init__(self, records: list[PdfRecord], failures: list[BatchFailure]) -> None:
+        """
+        :param records: 성공한 pdf의 records, 입력 순서를 유지함
+        :param failures: 실패한 pdf와 error message
+        """
+        self.records = records
+        self.failures = failures
+
+    def rows(self, columns: list[str]) -> list[list[str]]:
+        return [record.values(columns) for record in self.records]
+
+
+def collect_pdfs(paths: Iterable[pathlib.Path | str]) -> list[pathlib.Path]:
+    """
+    파일과 폴더가 섞인 paths에서 pdf 파일 목록을 만든다. 폴더는 안에 있는 pdf를 이름순으로 추가한다
+
+    :param paths: pdf 파일 또는 폴더
+    :return: 중복이 제거된 pdf 경로, 입력 순서를 유지함
+    """
+    pdfs = []
+    for path in paths:
+        path = pathlib.Path(path).resolve()
+        if path.is_dir():
+            pdfs.extend(sorted(p for p in path.iterdir() if p.is_file() and p.suffix.lower() == '.pdf'))
+        elif path.suffix.lower() == '.pdf':
+            pdfs.append(path)
+
+    return list(dict.fromkeys(pdfs))
+
+
+def _extract(pdf: pathlib.Path, extractor: PdfExtractor) -> PdfRecord:
+    # ProcessPoolExecutor에서 pickle 할 수 있도록 module level 함수로 둠
+    return extractor.extract(pdf)
+
+
+def extract_pdfs(pdfs: Iterable[pathlib.Path | str],
+                 patterns: dict[str, re.Pattern] | None = None,
+                 max_workers: int | None = None,
+                 progress: Callable[[int, int, str], None] | None = None,
+                 is_cancelled: Callable[[], bool] | None = None,
+                 cache: RecordCache | None = None,
+                 lazy: bool = False,
+                 regions: Sequence[Region] | None = None, ) -> BatchResult:
+    """
+    여러 pdf를 process pool에서 나눠서 추출한다. 실패한 pdf가 있어도 나머지는 계속 처리한다
+
+    :param pdfs: pdf 경로들
+    :param patterns: column 이름 -> pattern, None이면 PDF_FIELD_PATTERNS
+    :param max_workers: process 수, None이면 cpu 수
+    :param progress: pdf 하나가 끝날 때마다 (done, total, message)로 호출됨
+    :param is_cancelled: True를 반환하면 남은 pdf를 처리하지 않고 지금까지의 결과를 반환함
+    :param cache: 있으면 cache에 있는 pdf는 parsing하지 않고, 새로 추출한 record는 cache에 저장함
+    :param lazy: 모든 field를 찾으면 나머지 page는 읽지 않음, PdfExtractor 참고
+    :param regions: 있으면 page마다 이 영역들의 text만 추출함
+    :return: 입력 순서대로 정렬된 BatchResult
+    """
+    start = time.perf_counter()
+    pdfs = [pathlib.Path(pdf).resolve() for pdf in pdfs]
+    extractor = PdfExtractor(patterns, lazy, regions)
+
+    # pdfs와 같은 순서의 결과, PdfRecord 또는 BatchFailure
+    outcomes: list[PdfRecord | BatchFailure | None] = [None] * len(pdfs)
+    keys: dict[int, str] = {}
+    done = 0
+
+    def report(i: int) -> None:
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, len(pdfs), pdfs[i].name)
+
+    if cache is not None:
+        # cache는 main process에서만 읽고 씀
+        for i, pdf in enumerate(pdfs):
+            try:
+                keys[i] = cache.key(pdf, extractor.version)
+            except OSError:
+                continue  # 파일을 읽을 수 없으면 추출할 때 failure로 남음
+
+            outcomes[i] = cache.get(keys[i], pdf)
+            if outcomes[i] is not None:
+                report(i)
+
+    todo = [i for i, outcome in enumerate(outcomes) if outcome is None]
+    max_workers = min(max_workers or os.cpu_count() or 1, len(todo)) or 1
+
+    def failure(i: int, e: Exception) -> BatchFailure:
+        return BatchFailure(pdfs[i], f'{type(e).__name__}: {e}')
+
+    if max_workers == 1 or len(todo) < MIN_FILES_FOR_PROCESS_POOL:
+        for i in todo:
+            if is_cancelled is not None and is_cancelled():
+                break
+
+            try:
+                outcomes[i] = _extract(pdfs[i], extractor)
+            except Exception as e:
+                outcomes[i] = failure(i, e)
+
+            report(i)
+
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {i: executor.submit(_extract, pdfs[i], extractor) for i in todo}
+
+            # 제출한 순서대로 결과를 모아서 원래 순서를 유지함
+            for i, future in futures.items():
+                if is_cancelled is not None and is_cancelled():
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    break
+
+                try:
+                    outcomes[i] = future.result()
+                except Exception as e:
+                    outcomes[i] = failure(i, e)
+
+                report(i)
+
+    if cache is not None:
+        cache.put_many((keys[i], outcomes[i]) for i in todo
+                       if i in keys and isinstance(outcomes[i], PdfRecord))
+
+    records = [outcome for outcome in outcomes if isinstance(outcome, PdfRecord)]
+    failures = [outcome for outcome in outcomes if isinstance(outcome, BatchFailure)]
+
+    for failed in failures:
+        logger.warning('%s: %s', failed.pdf, failed.error)
+
+    log_summary('extract',
+                files=len(pdfs),
+                records=len(records),
+                failures=len(failures),
+                cached=sum(record.cached for record in records),
+                workers=max_workers,
+                version=extractor.version,
+                seconds=round(time.perf_counter() - start, 3))
+
+    return BatchResult(records, failures)
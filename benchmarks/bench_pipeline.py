@@ -0,0 +1,348 @@
+"""
+변환 pipeline benchmark
+
+합성 공문 pdf(수신/귀하/(우NNNNN ...)/(경유)/제목/차량번호 layout)와 합성 세외수입 df로
+단계별 시간을 측정한다
+
+    extract  : pdf 추출 (batch_import.extract_pdfs, cache 없이)
+    mapping  : ColumnReplacer.replace로 우편모아 3개 + 창봉투 df를 만듦, MappingPlan.evaluate도 같이 측정
+    excel    : 우편모아 엑셀 저장 (xls_writer.write_xls)
+    envelope : 창봉투 pdf 저장 (envelope.render_windowed_envelope_pdf, 원본 table에서 record를 만들면서 그리는
+               render_windowed_envelope_records, 여러 process로 나눠서 만드는 _parallel)
+
+결과는 실행할 때마다 json 한 줄로 --results 파일에 추가하고, 같은 (단계, 크기)의 이전 결과와 비교해서 출력한다
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --sizes 100 1000 --stages mapping excel
+    python benchmarks/bench_pipeline.py --max-pdfs 100000 --workers 8
+
+맑은 고딕이 없는 환경(linux 등)에서는 reportlab 내장 CID 폰트로 대신 그림
+"""
+import argparse
+import json
+import pathlib
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from batch_import import extract_pdfs  # noqa: E402
+from pipeline import (NORMAL_MAIL_EMPTY_DATAFRAME, REGISTERED_MAIL_EMPTY_DATAFRAME,  # noqa: E402
+                      SELECTIVE_REGISTERED_MAIL_EMPTY_DATAFRAME, PDF_EMPTY_DATAFRAME,
+                      ENIS_TO_POSTMOA_NORMAL_MAIL_EXCEL_COLUMNS, ENIS_TO_POSTMOA_REGISTERED_MAIL_EXCEL_COLUMNS,
+                      ENIS_TO_POSTMOA_SELECTIVE_REGISTERED_MAIL_EXCEL_COLUMNS, ENIS_TO_WINDOWED_ENVELOPE_COLUMNS,
+                      ENIS_MAPPING_PLAN)
+from xls_writer import XLS_MAX_ROWS, write_xls  # noqa: E402
+
+STAGES = ('extract', 'mapping', 'excel', 'envelope')
+DEFAULT_SIZES = (100, 10000, 100000)
+DEFAULT_MAX_PDFS = 10000  # pdf 100k개는 만드는 데만 몇 분 걸려서 기본값은 10k까지
+DEFAULT_RESULTS = ROOT / 'benchmarks' / 'results' / 'bench_pipeline.jsonl'
+DEFAULT_WORK_DIR = ROOT / 'benchmarks' / '.data'
+
+CID_FONT = 'HYSMyeongJo-Medium'  # reportlab에 내장된 한글 CID 폰트
+
+# 합성 data 재료
+FAMILY_NAMES = '김이박최정강조윤장임한오서신권황안송류홍'
+GIVEN_NAMES = ('민준', '서연', '도윤', '하은', '시우', '지유', '주원', '서윤', '예준', '지호', '길동', '영희')
+CITIES = ('부산광역시 해운대구 센텀중앙로', '부산광역시 부산진구 중앙대로', '서울특별시 강남구 테헤란로',
+          '경상남도 창원시 의창구 중앙대로', '대구광역시 수성구 달구벌대로')
+BUILDINGS = ('', '', '아파트 ', '오피스텔 ', '빌라 ')
+VIOLATIONS = ('번호판 미부착', '불법 튜닝', '정기검사 미수검', '의무보험 미가입', '등록번호판 가림')
+REGIONS = ('부산해운', '부산진', '서울강남', '경남창원', '대구수성')
+HANGUL_SYLLABLES = '가나다라마바사아자차카타파하'
+
+
+def recipient(rng: random.Random, n: int) -> dict[str, str]:
+    """n번째 합성 수신자, 같은 seed면 같은 값"""
+    address = f'{rng.choice(CITIES)} {rng.randint(1, 999)}, {rng.choice(BUILDINGS)}{rng.randint(101, 120)}동'
+    if rng.random() < 0.7:  # 주소가 길어서 다음 줄로 넘어가는 경우
+        address += f' {rng.randint(1, 30)}{rng.randint(1, 9):02d}호'
+
+    return {
+        'name': rng.choice(FAMILY_NAMES) + rng.choice(GIVEN_NAMES),
+        'zipcode': f'{rng.randint(10000, 63999)}',
+        'address': address,
+        'title': f'자동차관리법 위반차량 원상복구 명령 통지({n})',
+        'bike_number': f'{rng.choice(REGIONS)}\n{rng.choice(HANGUL_SYLLABLES)}{rng.randint(1000, 9999)}',
+        'violation': rng.choice(VIOLATIONS),
+        'due_date': f'2025.{rng.randint(1, 12)}.{rng.randint(1, 28)}.',
+    }
+
+
+def make_notice_pdf(target: pathlib.Path, n: int, seed: int = 0) -> None:
+    """
+    공문 layout의 1 page pdf를 만든다
+
+    수신 {이름} 귀하 (우{우편번호} {주소})
+    (경유)
+    제목 {제목}
+    ...
+    차량번호 ...
+    {지역}
+    {번호}
+    {제출기한}
+    """
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    from reportlab.pdfgen.canvas import Canvas
+
+    if CID_FONT not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(UnicodeCIDFont(CID_FONT))
+
+    person = recipient(random.Random(seed * 1_000_003 + n), n)
+
+    # 수신 줄이 길면 주소 중간에서 줄이 바뀜
+    receiver = f'수신 {person["name"]} 귀하 (우{person["zipcode"]} {person["address"]})'
+    lines = ['부산광역시', receiver[:45], receiver[45:], '(경유)',
+             f'제목 {person["title"]}',
+             '1. 관련: 자동차관리법 제10조',
+             '2. 아래 차량에 대하여 원상복구를 명령하오니 기한까지 이행하시기 바랍니다.',
+             '차량번호 차종 위반내용',
+             *person['bike_number'].split('\n'),
+             person['due_date'],
+             '부산광역시장']
+
+    canvas = Canvas(str(target))
+    canvas.setFont(CID_FONT, 10)
+    y = 800
+    for line in lines:
+        if line:
+            canvas.drawString(50, y, line)
+            y -= 18
+    canvas.showPage()
+    canvas.save()
+
+
+def make_notices(directory: pathlib.Path, count: int, seed: int = 0) -> list[pathlib.Path]:
+    """directory에 notice_000000.pdf ... 를 count개 만든다. 이미 있는 파일은 다시 만들지 않음"""
+    directory.mkdir(parents=True, exist_ok=True)
+
+    pdfs = []
+    for n in range(count):
+        pdf = directory / f'notice_{n:06d}.pdf'
+        if not pdf.exists():
+            make_notice_pdf(pdf, n, seed)
+        pdfs.append(pdf)
+
+    return pdfs
+
+
+def make_enis_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """세외수입 엑셀을 읽은 것과 같은 column의 합성 df"""
+    rng = random.Random(seed)
+    people = [recipient(rng, n) for n in range(min(rows, 1000))]  # 1000명을 반복해서 사용함
+
+    return pd.DataFrame({
+        '납부자명': [people[n % len(people)]['name'] for n in range(rows)],
+        '납부자우편번호': [people[n % len(people)]['zipcode'] for n in range(rows)],
+        '납부자주소': [people[n % len(people)]['address'] for n in range(rows)],
+        '위반항목': [people[n % len(people)]['violation'] for n in range(rows)],
+        '차량번호': [people[n % len(people)]['bike_number'].replace('\n', '') for n in range(rows)],
+    }, dtype=object)
+
+
+def use_fallback_fonts() -> bool:
+    """
+    FONTS의 ttf를 찾을 수 없으면 같은 이름으로 CID 폰트를 등록함
+
+    :return: 대체 폰트를 사용하면 True
+    """
+    import envelope
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+
+    try:
+        envelope.register_fonts()
+        return False
+    except Exception:  # ttf가 없으면 reportlab은 TTFError를 냄
+        envelope.register_fonts.cache_clear()
+
+    for name in envelope.FONTS:
+        font = UnicodeCIDFont(CID_FONT)
+        font.fontName = font.name = name
+        pdfmetrics.registerFont(font)
+
+    envelope.register_fonts = lambda: None  # new_canvas()가 ttf를 다시 찾지 않도록 함
+    return True
+
+
+def timed(fn: Callable[[], object], repeat: int) -> float:
+    """repeat번 실행한 시간 중 최소값 in sec"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def replace_all(enis: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """예전 save 경로처럼 출력마다 ColumnReplacer.replace를 호출함"""
+    outputs = {}
+    for name, empty, columns in (('일반우편', NORMAL_MAIL_EMPTY_DATAFRAME, ENIS_TO_POSTMOA_NORMAL_MAIL_EXCEL_COLUMNS),
+                                 ('등기우편', REGISTERED_MAIL_EMPTY_DATAFRAME,
+                                  ENIS_TO_POSTMOA_REGISTERED_MAIL_EXCEL_COLUMNS),
+                                 ('선택등기우편', SELECTIVE_REGISTERED_MAIL_EMPTY_DATAFRAME,
+                                  ENIS_TO_POSTMOA_SELECTIVE_REGISTERED_MAIL_EXCEL_COLUMNS),
+                                 ('창봉투_주소', PDF_EMPTY_DATAFRAME, ENIS_TO_WINDOWED_ENVELOPE_COLUMNS)):
+        target = empty.copy(deep=True)
+        for column in columns:
+            column.replace(target, enis)
+        outputs[name] = target
+
+    return outputs
+
+
+def run(args: argparse.Namespace) -> list[dict]:
+    """
+    :return: {'stage', 'case', 'size', 'seconds'} 또는 'skipped' 사유의 list
+    """
+    results = []
+
+    def record(stage: str, case: str, size: int, seconds: float | None = None, **extra) -> None:
+        result = {'stage': stage, 'case': case, 'size': size, 'seconds': seconds, **extra}
+        results.append(result)
+
+        text = f'{seconds:10.3f}s' if seconds is not None else f'{"skipped":>11}'
+        detail = ', '.join(f'{key}={value}' for key, value in extra.items())
+        print(f'  {stage:<9} {case:<18} {size:>7} {text}  {detail}', flush=True)
+
+    with tempfile.TemporaryDirectory() as out:
+        out = pathlib.Path(out)
+
+        if 'envelope' in args.stages and use_fallback_fonts():
+            print(f'malgun.ttf가 없어서 {CID_FONT}로 대신 그림\n')
+
+        for size in args.sizes:
+            if 'extract' in args.stages:
+                if size > args.max_pdfs:
+                    record('extract', 'extract_pdfs', size, skipped=f'--max-pdfs {args.max_pdfs}')
+                else:
+                    pdfs = make_notices(args.work_dir / 'notices', size, args.seed)
+                    result = None
+
+                    def extract():
+                        nonlocal result
+                        result = extract_pdfs(pdfs, max_workers=args.workers)
+
+                    seconds = timed(extract, args.repeat)
+                    matched = sum(1 for pdf_record in result.records if all(pdf_record.fields.values()))
+                    record('extract', 'extract_pdfs', size, seconds, matched=matched, failures=len(result.failures))
+
+            if not {'mapping', 'excel', 'envelope'} & set(args.stages):
+                continue
+
+            enis = make_enis_frame(size, args.seed)
+            outputs = ENIS_MAPPING_PLAN.evaluate(enis)
+
+            if 'mapping' in args.stages:
+                record('mapping', 'ColumnReplacer', size, timed(lambda: replace_all(enis), args.repeat))
+                record('mapping', 'MappingPlan', size, timed(lambda: ENIS_MAPPING_PLAN.evaluate(enis), args.repeat))
+
+            if 'excel' in args.stages:
+                if size + 1 > XLS_MAX_ROWS:
+                    record('excel', 'write_xls', size, skipped=f'.xls 최대 {XLS_MAX_ROWS - 1} rows')
+                else:
+                    record('excel', 'write_xls', size,
+                           timed(lambda: write_xls(outputs['등기우편'], out / '등기우편.xls'), args.repeat))
+
+            if 'envelope' in args.stages:
+                from envelope import (render_windowed_envelope_pdf, render_windowed_envelope_pdf_parallel,
+                                      render_windowed_envelope_records)
+
+                target = out / '창봉투_주소.pdf'
+                seconds = timed(lambda: render_windowed_envelope_pdf(target, outputs['창봉투_주소']), args.repeat)
+                record('envelope', 'render', size, seconds, pdf_bytes=target.stat().st_size)
+
+                seconds = timed(lambda: render_windowed_envelope_records(
+                    target, ENIS_MAPPING_PLAN.iter_records('창봉투_주소', enis), total=size), args.repeat)
+                record('envelope', 'render_records', size, seconds, pdf_bytes=target.stat().st_size)
+
+                seconds = timed(lambda: render_windowed_envelope_pdf_parallel(target, outputs['창봉투_주소'],
+                                                                         max_workers=args.workers),
+                                args.repeat)
+                record('envelope', 'render_parallel', size, seconds, pdf_bytes=target.stat().st_size)
+
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_previous(results_path: pathlib.Path) -> dict[tuple[str, str, int], float]:
+    """이전 실행들에서 (stage, case, size)별 마지막 시간"""
+    previous = {}
+    if not results_path.exists():
+        return previous
+
+    for line in results_path.read_text(encoding='utf-8').splitlines():
+        if not line.strip():
+            continue
+        for result in json.loads(line)['results']:
+            if result['seconds'] is not None:
+                previous[result['stage'], result['case'], result['size']] = result['seconds']
+
+    return previous
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='row(pdf) 수')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES), help='측정할 단계')
+    parser.add_argument('--max-pdfs', type=int, default=DEFAULT_MAX_PDFS, help='extract 단계에서 만들 최대 pdf 수')
+    parser.add_argument('--workers', type=int, default=None, help='pdf 추출, 창봉투 생성 process 수, 기본값은 cpu 수')
+    parser.add_argument('--repeat', type=int, default=1, help='단계마다 반복해서 최소 시간을 사용함')
+    parser.add_argument('--seed', type=int, default=0, help='합성 data seed')
+    parser.add_argument('--work-dir', type=pathlib.Path, default=DEFAULT_WORK_DIR,
+                        help='합성 pdf를 저장해두고 다음 실행에 다시 사용하는 폴더')
+    parser.add_argument('--results', type=pathlib.Path, default=DEFAULT_RESULTS, help='결과를 추가할 jsonl 경로')
+    parser.add_argument('--no-save', action='store_true', help='결과를 저장하지 않음')
+    args = parser.parse_args(argv)
+
+    previous = load_previous(args.results)
+
+    print(f'  {"stage":<9} {"case":<18} {"size":>7} {"time":>11}')
+    results = run(args)
+
+    compared = [(result, previous[key]) for result in results
+                if result['seconds'] is not None and (key := (result['stage'], result['case'], result['size'])) in previous]
+    if compared:
+        print('\n이전 결과와 비교')
+        for result, before in compared:
+            print(f'  {result["stage"]:<9} {result["case"]:<18} {result["size"]:>7} '
+                  f'{before:10.3f}s -> {result["seconds"]:10.3f}s ({result["seconds"] / before:5.2f}x)')
+
+    if not args.no_save:
+        args.results.parent.mkdir(parents=True, exist_ok=True)
+        with args.results.open('a', encoding='utf-8') as f:
+            f.write(json.dumps({
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'pandas': pd.__version__,
+                'seed': args.seed,
+                'repeat': args.repeat,
+                'results': results,
+            }, ensure_ascii=False) + '\n')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
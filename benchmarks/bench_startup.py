@@ -0,0 +1,150 @@
+"""
+시작 시간 benchmark
+
+새 python process에서 main_window를 import하고 MainWindow를 띄울 때까지 걸린 시간과
+module별 import 시간(python -X importtime)을 측정한다
+
+window가 뜨기 전에 무거운 backend가 import되거나 시간이 budget을 넘으면 exit code 1
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget 1.5 --top 30 --json startup.json
+"""
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# window가 뜰 때는 import되면 안 되는 modules, 사용하는 method에서 import 해야 함
+LAZY_MODULES = (
+    'reportlab.pdfgen.canvas',
+    'reportlab.pdfbase.ttfonts',
+    'pypdf',
+    'xlwt',
+    'xlwings',
+    'win32com',
+    'arrow',
+    'pyarrow',
+)
+
+FIRST_WINDOW_SCRIPT = '''
+import json
+import sys
+import time
+
+start = time.perf_counter()
+
+from PyQt6.QtWidgets import QApplication
+import main_window
+
+imported = time.perf_counter()
+
+app = QApplication(sys.argv)
+window = main_window.MainWindow()
+window.show()
+app.processEvents()
+
+shown = time.perf_counter()
+
+print(json.dumps({
+    'import_time': imported - start,
+    'first_window_time': shown - start,
+    'modules': sorted(sys.modules),
+}))
+'''
+
+
+def run_python(args: list[str], data_dir: pathlib.Path) -> subprocess.CompletedProcess:
+    """
+    :param args: python arguments
+    :param data_dir: LOCALAPPDATA로 사용할 빈 폴더, 저장된 session이 있으면 복원할지 묻는 dialog가 떠서 멈추므로
+                     사용자의 cache, session, 우편번호 index 없이 실행함
+    """
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')  # display가 없는 서버에서도 실행되도록
+    env['LOCALAPPDATA'] = str(data_dir)
+
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def measure_first_window(data_dir: pathlib.Path) -> dict:
+    result = run_python(['-c', FIRST_WINDOW_SCRIPT], data_dir)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_import_times(data_dir: pathlib.Path) -> list[tuple[str, float, float]]:
+    """
+    python -X importtime 결과를 parsing 한다
+
+    :return: (module, self time in sec, cumulative time in sec)의 list
+    """
+    result = run_python(['-X', 'importtime', '-c', 'import main_window'], data_dir)
+
+    import_times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        self_us, cumulative_us, module = line.removeprefix('import time:').split('|')
+        import_times.append((module.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+
+    return import_times
+
+
+def top_level_import_times(import_times: list[tuple[str, float, float]]) -> dict[str, float]:
+    """top level package별 self time 합계"""
+    totals = {}
+    for module, self_time, _ in import_times:
+        package = module.split('.')[0]
+        totals[package] = totals.get(package, 0.0) + self_time
+
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=float, default=2.0, help='time-to-first-window 허용 시간 in sec')
+    parser.add_argument('--top', type=int, default=20, help='출력할 package 수')
+    parser.add_argument('--json', type=pathlib.Path, help='결과를 저장할 json 경로')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='bench-startup-') as data_dir:
+        first_window = measure_first_window(pathlib.Path(data_dir))
+        import_times = measure_import_times(pathlib.Path(data_dir))
+    packages = top_level_import_times(import_times)
+
+    print(f"import main_window : {first_window['import_time']:.3f}s")
+    print(f"time to first window: {first_window['first_window_time']:.3f}s (budget {args.budget:.3f}s)")
+    print()
+    print('import time per package (self)')
+    for package, self_time in list(packages.items())[:args.top]:
+        print(f'  {package:<30} {self_time * 1000:8.1f} ms')
+
+    eager = [module for module in LAZY_MODULES
+             if any(loaded == module or loaded.startswith(module + '.') for loaded in first_window['modules'])]
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            'import_time': first_window['import_time'],
+            'first_window_time': first_window['first_window_time'],
+            'packages': packages,
+            'eager_lazy_modules': eager,
+        }, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    failed = False
+    if eager:
+        print(f'\nFAIL: window가 뜨기 전에 import됨: {", ".join(eager)}')
+        failed = True
+    if first_window['first_window_time'] > args.budget:
+        print('\nFAIL: time to first window가 budget을 넘음')
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
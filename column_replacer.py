@@ -0,0 +1,224 @@
+import functools
+import re
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+TEMPLATE_FIELD = re.compile(r'{(\w+)}')  # replacer 안의 {column} placeholder
+
+
+class Template:
+    def __init__(self, text: str) -> None:
+        """
+        '{차량번호}, {비고}까지' 같은 replacer를 literal과 column segment로 나눈다
+
+        segments는 (is_column, value)의 list
+        '{차량번호}, {비고}까지' -> [(True, '차량번호'), (False, ', '), (True, '비고'), (False, '까지')]
+
+        :param text: replacer
+        """
+        self.text = text
+        self.segments: list[tuple[bool, str]] = []
+
+        position = 0
+        for match in TEMPLATE_FIELD.finditer(text):
+            if match.start() > position:
+                self.segments.append((False, text[position:match.start()]))
+            self.segments.append((True, match.group(1)))
+            position = match.end()
+
+        if position < len(text):
+            self.segments.append((False, text[position:]))
+
+        self.columns = [value for is_column, value in self.segments if is_column]
+
+    def render(self, data_df: pd.DataFrame) -> pd.Series:
+        """
+        data_df의 column 전체를 한 번에 이어 붙여서 template을 적용한다
+
+        data_df의 값이 비어있으면(None, NaN, '') placeholder만 삭제함
+
+        :param data_df: 사용할 data가 저장된 dataframe
+        :return: data_df와 같은 index의 str series
+        """
+        rendered = pd.Series('', index=data_df.index, dtype=object)
+
+        for is_column, value in self.segments:
+            if is_column:
+                rendered = rendered + column_to_str(data_df[value])
+            else:
+                rendered = rendered + value
+
+        return rendered
+
+
+@functools.lru_cache(maxsize=None)
+def parse_template(text: str) -> Template:
+    """같은 replacer는 한 번만 parsing 함"""
+    return Template(text)
+
+
+def value_to_str(value: Any) -> str:
+    """
+    값을 str로 바꾼다. 정수인 float(xlwings는 숫자를 모두 float로 읽음)는 '.0' 없이 바꿈
+
+    41234.0 -> '41234', 1.5 -> '1.5', '서울' -> '서울'
+    """
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+
+    return str(value)
+
+
+def column_to_str(column: pd.Series) -> pd.Series:
+    """
+    column을 str로 바꾼다. 비어있는 값(None, NaN, '', 0 등 falsy)은 ''로 바꿈
+
+    :param column: data_df의 column
+    :return: object dtype의 str series
+    """
+    column = column.astype(object)
+    empty = column.isna().to_numpy().copy()
+    # pd.NA는 bool로 바꿀 수 없으므로 NA가 아닌 값만 falsy인지 확인함
+    empty[~empty] = ~column[~empty].astype(bool).to_numpy()
+
+    return column.where(~empty, '').map(value_to_str).astype(object)
+
+
+class ColumnReplacer:
+    def __init__(self,
+                 target_df_column: str,
+                 replacer: str,
+                 extra_pattern: str = '',
+                 value_for_extra_pattern: str = '', ) -> None:
+        self.target_df_column = target_df_column
+        self.replacer = replacer
+        self.extra_pattern = extra_pattern
+        self.value_for_extra_pattern = value_for_extra_pattern
+
+    def __iter__(self):
+        return iter(self.__dict__.values())
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        """같은 key의 ColumnReplacer는 target_df_column만 다르고 같은 값을 만듦"""
+        return self.replacer, self.extra_pattern, self.value_for_extra_pattern
+
+    def evaluate(self, data_df: pd.DataFrame) -> np.ndarray:
+        """
+        data_df에 replacer를 적용한 값을 반환한다
+
+        row마다 re.sub을 호출하지 않고, parsing된 template으로 column 전체를 한 번에 만듦
+
+        :param data_df: 사용할 data가 저장된 dataframe
+        :return: len(data_df) 길이의 object array
+        """
+        template = parse_template(self.replacer)
+
+        if not template.columns:
+            # placeholder가 없으면 replacer를 그대로 입력
+            return np.full(len(data_df), self.replacer, dtype=object)
+
+        replaced = template.render(data_df)
+
+        if self.extra_pattern:
+            # 전화번호에 들어있는 -을 제거하려고 추가 처리
+            replaced = replaced.str.replace(self.extra_pattern, self.value_for_extra_pattern, regex=True)
+
+        return replaced.to_numpy(dtype=object)
+
+    def replace(self, target_df: pd.DataFrame, data_df: pd.DataFrame) -> None:
+        """
+        target_df의 데이터를 data_df의 데이터를 replacer에 적용한 값으로 업데이트 한다
+
+        :param target_df: 옮길 대상 dataframe
+        :param data_df: 사용할 data가 저장된 dataframe
+        """
+
+        if self.replacer:
+            target_df[self.target_df_column] = self.evaluate(data_df)
+
+
+class MappingPlan:
+    def __init__(self, targets: dict[str, tuple[Sequence[str], Sequence[ColumnReplacer]]]) -> None:
+        """
+        여러 출력(일반우편, 등기우편, 선택등기우편, 창봉투)의 mappings를 합쳐서
+        같은 replacer는 한 번만 계산하도록 compile 한다
+
+        :param targets: 출력 이름 -> (출력 df의 columns, mappings)
+        """
+        self.targets = targets
+
+        # replacer key -> 계산에 사용할 ColumnReplacer, 출력 전체에서 중복 제거됨
+        self.expressions: dict[tuple[str, str, str], ColumnReplacer] = {}
+        # 출력 이름 -> 출력 column -> replacer key
+        self.views: dict[str, dict[str, tuple[str, str, str]]] = {}
+
+        for name, (columns, replacers) in targets.items():
+            view = {}
+            for replacer in replacers:
+                if replacer.replacer:
+                    self.expressions.setdefault(replacer.key, replacer)
+                    view[replacer.target_df_column] = replacer.key
+
+            self.views[name] = view
+
+    def evaluate(self, data_df: pd.DataFrame, names: Iterable[str] | None = None) -> dict[str, pd.DataFrame]:
+        """
+        중복이 제거된 replacer를 한 번씩 계산하고, 출력마다 계산된 column을 모아서 df를 만든다
+
+        출력 df들은 계산된 array를 복사하지 않고 공유함. mapping이 없는 column은 NaN
+
+        :param data_df: 사용할 data가 저장된 dataframe
+        :param names: 만들 출력 이름들, None이면 전체. iter_records로 만들 출력(창봉투)은 빼서 계산하지 않음
+        :return: 출력 이름 -> 출력 df
+        """
+        names = list(self.targets) if names is None else list(names)
+        keys = {key for name in names for key in self.views[name].values()}
+
+        values = {key: self.expressions[key].evaluate(data_df) for key in keys}
+        empty = np.full(len(data_df), np.nan, dtype=object)
+
+        outputs = {}
+        for name in names:
+            view = self.views[name]
+            columns = self.columns(name)
+            outputs[name] = pd.DataFrame({column: values[view[column]] if column in view else empty
+                                          for column in columns},
+                                         columns=columns,
+                                         copy=False)
+
+        return outputs
+
+    def columns(self, name: str) -> list[str]:
+        """출력 df의 columns, 출력 columns에 없는 mapping column은 뒤에 붙음"""
+        columns, _ = self.targets[name]
+        view = self.views[name]
+
+        return list(columns) + [column for column in view if column not in columns]
+
+    def iter_records(self, name: str, data_df: pd.DataFrame, batch_size: int = 1000) -> Iterator[dict[str, Any]]:
+        """
+        출력 하나를 df로 만들지 않고 batch_size row씩 계산해서 row마다 dict로 반환한다
+
+        evaluate(data_df)[name].to_dict('records')와 같은 record들이지만,
+        한 번에 batch_size row만 memory에 있으므로 row가 많아도 memory가 늘지 않음
+
+        :param name: 출력 이름
+        :param data_df: 사용할 data가 저장된 dataframe
+        :param batch_size: 한 번에 계산할 row 수
+        :return: 출력 column -> 값
+        """
+        view = self.views[name]
+        columns = self.columns(name)
+        keys = set(view.values())
+
+        for start in range(0, len(data_df), batch_size):
+            batch = data_df.iloc[start:start + batch_size]
+            values = {key: self.expressions[key].evaluate(batch) for key in keys}
+            empty = np.full(len(batch), np.nan, dtype=object)
+
+            for row in zip(*(values[view[column]] if column in view else empty for column in columns)):
+                yield dict(zip(columns, row))
@@ -0,0 +1,221 @@
+from collections.abc import Iterable, Iterator
+from numbers import Real
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from column_replacer import column_to_str
+
+# 같은 수취인의 비고를 합칠 때 사용함, 비고 안에 ', '가 있어서 다른 구분자를 사용함
+NOTE_SEPARATOR = ' / '
+
+# 주소를 비교할 때 무시하는 문자, '중앙대로 777, 102동'과 '중앙대로777 102동'은 같은 주소
+ADDRESS_IGNORED = r'[\s,.·()\[\]]+'
+
+# key의 column 구분자, 정규화된 값에는 들어있지 않음
+KEY_SEPARATOR = '\x1f'
+
+
+def normalize_name(column: pd.Series) -> pd.Series:
+    """NFKC(전각 -> 반각 등), 공백 제거"""
+    return column_to_str(column).str.normalize('NFKC').str.replace(r'\s+', '', regex=True)
+
+
+def normalize_zipcode(column: pd.Series) -> pd.Series:
+    """
+    숫자만 남김, '41234', '41-234', 41234.0은 모두 '41234'
+
+    엑셀에서 숫자로 읽어서 앞의 0이 없어진 우편번호(01234 -> 1234.0)는 5자리로 채움
+    """
+    text = column_to_str(column).str.replace(r'\.0$', '', regex=True)
+    text = text.str.replace(r'\D+', '', regex=True)
+
+    values = column.to_numpy(dtype=object)
+    numeric = np.fromiter((isinstance(value, Real) and not isinstance(value, bool) for value in values),
+                          dtype=bool, count=len(values))
+    numeric &= (text != '').to_numpy()
+
+    return text.where(~numeric, text.str.zfill(5))
+
+
+def normalize_address(column: pd.Series) -> pd.Series:
+    """NFKC, 대소문자, 공백과 구두점(ADDRESS_IGNORED) 무시"""
+    return column_to_str(column).str.normalize('NFKC').str.lower().str.replace(ADDRESS_IGNORED, '', regex=True)
+
+
+def normalize_distinct(column: pd.Series, normalize: Callable[[pd.Series], pd.Series]) -> np.ndarray:
+    """
+    서로 다른 값만 정규화하고 row마다 복사한다. 세외수입은 같은 납부자가 여러 번 나와서 regex 횟수가 크게 줄어듦
+
+    :param column: 원본 column
+    :param normalize: normalize_name 등
+    :return: column과 같은 길이의 정규화된 str array
+    """
+    codes, distinct = pd.factorize(column.to_numpy(dtype=object), use_na_sentinel=False)
+    return normalize(pd.Series(distinct, dtype=object)).to_numpy(dtype=object)[codes]
+
+
+class RecipientIndex:
+    def __init__(self, data_df: pd.DataFrame, columns: tuple[str, str, str]) -> None:
+        """
+        이름, 우편번호, 주소를 정규화해서 같은 수취인의 row들을 하나의 우편물(group)로 묶는다
+
+        정규화된 (이름, 우편번호, 주소)를 hash table(pd.factorize)에 넣어서 group 번호를 붙이므로
+        row 수에 비례하는 시간이 걸림(정렬하지 않음). group 번호는 처음 나온 순서
+        이름이나 주소가 비어 있는 row는 묶지 않음
+
+        :param data_df: 원본 table(화면 table 또는 세외수입 df)
+        :param columns: data_df의 (이름, 우편번호, 주소) column, Config.recipient_columns
+        """
+        name_column, zipcode_column, address_column = columns
+        self.columns = columns
+
+        name = normalize_distinct(data_df[name_column], normalize_name)
+        zipcode = normalize_distinct(data_df[zipcode_column], normalize_zipcode)
+        address = normalize_distinct(data_df[address_column], normalize_address)
+
+        keys = name + KEY_SEPARATOR + zipcode + KEY_SEPARATOR + address
+
+        # 비어 있는 row는 row 번호를 key로 해서 다른 row와 묶이지 않게 함
+        incomplete = (name == '') | (address == '')
+        if incomplete.any():
+            keys[incomplete] = [f'{KEY_SEPARATOR}{i}' for i in np.flatnonzero(incomplete)]
+
+        self.codes, _ = pd.factorize(keys)
+        self.counts = np.bincount(self.codes)
+
+        # group마다 처음 나온 row, codes가 처음 나온 순서이므로 group 번호 순서와 같음
+        self.first_rows = np.flatnonzero(~pd.Series(self.codes).duplicated().to_numpy())
+
+        # group 순서로 모은 row 번호(group 안에서는 원래 순서)와 group마다의 시작 위치, piece_rows()에서 사용함
+        self.order = np.argsort(self.codes, kind='stable')
+        self.bounds = np.concatenate(([0], np.cumsum(self.counts)))
+
+    @property
+    def rows(self) -> int:
+        return len(self.codes)
+
+    @property
+    def pieces(self) -> int:
+        """묶은 뒤의 우편물 수"""
+        return len(self.first_rows)
+
+    @property
+    def merged_rows(self) -> int:
+        """다른 row에 합쳐져서 없어지는 row 수"""
+        return self.rows - self.pieces
+
+    def piece_rows(self, start: int, stop: int) -> np.ndarray:
+        """
+        group start ~ stop - 1의 row 번호들. 같은 group의 row들이 연달아 있으므로 merge_records로 합칠 수 있음
+
+        :param start: 첫 group 번호
+        :param stop: 마지막 group 번호 + 1
+        :return: group 순서, group 안에서는 원래 순서
+        """
+        return self.order[self.bounds[start]:self.bounds[stop]]
+
+    def groups(self) -> dict[int, list[int]]:
+        """row가 2개 이상인 group 번호 -> row 번호들(원래 순서)"""
+        groups: dict[int, list[int]] = {}
+        duplicated = np.flatnonzero(self.counts[self.codes] > 1)
+        for row, code in zip(duplicated.tolist(), self.codes[duplicated].tolist()):
+            groups.setdefault(code, []).append(row)
+
+        return groups
+
+    def collapse(self, target_df: pd.DataFrame, note_column: str = '비고') -> pd.DataFrame:
+        """
+        data_df를 mapping한 target_df(row 순서가 같음)를 group마다 한 row로 줄인다
+
+        group의 첫 row를 사용하고, note_column은 group 안의 서로 다른 값을 NOTE_SEPARATOR로 이어 붙임
+
+        :param target_df: mapping이 끝난 출력 df, 우편모아 엑셀이나 창봉투
+        :param note_column: 합칠 column, target_df에 없으면 첫 row만 사용함
+        :return: pieces개 row의 df, index는 0부터
+        """
+        collapsed = target_df.iloc[self.first_rows].reset_index(drop=True)
+        if note_column not in target_df.columns or not self.merged_rows:
+            return collapsed
+
+        notes = target_df[note_column].to_numpy(dtype=object)
+        merged = collapsed[note_column].to_numpy(dtype=object).copy()
+
+        for code, rows in self.groups().items():
+            values = [str(notes[row]) for row in rows if not pd.isna(notes[row]) and notes[row] != '']
+            merged[code] = NOTE_SEPARATOR.join(dict.fromkeys(values))  # 순서를 유지하면서 중복 제거
+
+        collapsed[note_column] = merged
+        return collapsed
+
+    def report(self, data_df: pd.DataFrame, note_column: str | None = None) -> pd.DataFrame:
+        """
+        합쳐진 group마다 한 row의 보고서
+
+        :param data_df: RecipientIndex를 만들 때의 df
+        :param note_column: 있으면 group 안의 값들을 같이 보여줌(세외수입의 위반항목 등)
+        :return: 이름, 우편번호, 주소, 통수, 원본 row(1부터, 화면 table의 번호와 같음), [note_column]
+        """
+        names, zipcodes, addresses = (data_df[column].to_numpy(dtype=object) for column in self.columns)
+        notes = data_df[note_column].to_numpy(dtype=object) if note_column is not None else None
+
+        records = []
+        for code, rows in self.groups().items():
+            first = rows[0]
+            record = {
+                '이름': names[first],
+                '우편번호': zipcodes[first],
+                '주소': addresses[first],
+                '통수': len(rows),
+                '원본 row': ', '.join(str(row + 1) for row in rows),
+            }
+            if notes is not None:
+                # collapse처럼 빈 값(None, NaN, '')은 'nan'으로 쓰지 않고 건너뜀
+                record[note_column] = NOTE_SEPARATOR.join(str(notes[row]) for row in rows
+                                                          if not pd.isna(notes[row]) and notes[row] != '')
+            records.append(record)
+
+        columns = ['이름', '우편번호', '주소', '통수', '원본 row'] + ([note_column] if note_column is not None else [])
+        return pd.DataFrame(records, columns=columns)
+
+
+def merge_records(records: Iterable[dict[str, Any]],
+                  codes: Iterable[int],
+                  note_column: str = '비고', ) -> Iterator[dict[str, Any]]:
+    """
+    RecipientIndex.collapse와 같은 결과를 record 단위로 만든다
+
+    같은 group의 record들이 연달아 나와야 함(piece_rows 순서). 한 번에 group 하나만 memory에 있음
+
+    :param records: mapping된 출력 record들, MappingPlan.iter_records()
+    :param codes: record마다 group 번호
+    :param note_column: 합칠 key, record에 없으면 첫 record만 사용함
+    :return: group마다 record 하나
+    """
+    merged = None
+    current = None
+    notes: list[str] = []
+    count = 0
+
+    for record, code in zip(records, codes):
+        if code != current:
+            if merged is not None:
+                yield _merge_notes(merged, notes, count, note_column)
+            merged, current, notes, count = record, code, [], 0
+
+        note = record.get(note_column)
+        if not pd.isna(note) and note != '':
+            notes.append(str(note))
+        count += 1
+
+    if merged is not None:
+        yield _merge_notes(merged, notes, count, note_column)
+
+
+def _merge_notes(record: dict[str, Any], notes: list[str], count: int, note_column: str) -> dict[str, Any]:
+    # row가 하나인 group은 collapse처럼 값을 바꾸지 않음
+    if count > 1 and note_column in record:
+        record[note_column] = NOTE_SEPARATOR.join(dict.fromkeys(notes))  # 순서를 유지하면서 중복 제거
+
+    return record
@@ -0,0 +1,161 @@
+import pathlib
+import zipfile
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+# 한 번에 column array로 옮기는 row 수, row tuple은 이 개수만큼만 memory에 있음
+CHUNK_SIZE = 10000
+
+
+def normalize_column(column: Any) -> str:
+    """세외수입 엑셀의 header에서 줄바꿈, 공백, /를 제거함. '납부자\\n우편번호' -> '납부자우편번호'"""
+    if column is None:
+        return ''
+
+    return str(column).replace('\n', '').replace(' ', '').replace('/', '')
+
+
+def is_drm_locked(excel: pathlib.Path | str) -> bool:
+    """
+    DRM이 걸린 엑셀은 암호화되어 있어서 xlsx(zip)로 열리지 않음
+
+    .xls도 openpyxl로 읽을 수 없으므로 True
+
+    :param excel: 엑셀 경로
+    :return:
+    """
+    excel = pathlib.Path(excel)
+    return excel.suffix.lower() != '.xlsx' or not zipfile.is_zipfile(excel)
+
+
+def split_cell(cell: str) -> tuple[int, int]:
+    """
+    '$A$1' 같은 cell 주소를 (row, column)으로 바꾼다. 1부터 시작
+
+    :param cell: Config.excel_left_top_cell
+    :return:
+    """
+    from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+
+    column_letter, row = coordinate_from_string((cell or 'A1').replace('$', ''))
+    return row, column_index_from_string(column_letter)
+
+
+def convert_drm_excel_to_df(excel: pathlib.Path | str, config: Any) -> pd.DataFrame:
+    import xlwings as xw  # windows + excel이 있어야 하고 import가 무거움
+
+    excel = pathlib.Path(excel)
+
+    with xw.App(visible=False) as app:
+        wb = app.books.open(excel)
+        sheet = wb.sheets[0]
+
+        # https://docs.xlwings.org/en/stable/converters.html#converters-and-options
+        df = sheet.range(config.excel_left_top_cell, sheet.used_range.last_cell).options(pd.DataFrame,
+                                                                                         header=True,
+                                                                                         index=False, ).value
+        df.rename(columns=normalize_column, inplace=True)
+
+        wb.close()
+
+    return df
+
+
+def convert_excel_to_df_streaming(excel: pathlib.Path | str,
+                                  config: Any,
+                                  chunk_size: int = CHUNK_SIZE, ) -> pd.DataFrame:
+    """
+    excel 없이 openpyxl read-only mode로 첫번째 sheet를 읽는다. DRM이 걸리지 않은 xlsx만 가능
+
+    config.excel_left_top_cell의 row가 header, 그 아래가 data
+    값은 column별 object array에 바로 옮기고(sheet의 row 수만큼 미리 할당, 모자라면 두 배씩 늘림),
+    row tuple은 chunk_size개만 memory에 있음. chunk DataFrame들을 concat 하지 않으므로 sheet를 두 번 들고 있지 않음
+
+    pd.DataFrame처럼 column마다 dtype을 추론하지만, 정수 cell은 float로 바꾸지 않음
+    (xlwings는 숫자를 모두 float로 읽지만 우편번호, 통수 등이 '41234.0'이 되면 안 됨)
+
+    :param excel: xlsx 경로
+    :param config: excel_left_top_cell을 사용함
+    :param chunk_size: 한 번에 column array로 옮기는 row 수
+    :return: header가 normalize_column으로 정리된 df
+    """
+    import openpyxl
+
+    min_row, min_col = split_cell(config.excel_left_top_cell)
+
+    wb = openpyxl.load_workbook(excel, read_only=True, data_only=True)
+    try:
+        sheet = wb.worksheets[0]
+        rows = sheet.iter_rows(min_row=min_row, min_col=min_col, values_only=True)
+
+        header = list(next(rows, ()))
+        while header and header[-1] is None:  # 빈 column은 제외
+            header.pop()
+        columns = [normalize_column(column) for column in header]
+
+        # sheet의 dimension은 없거나 틀릴 수 있으므로 모자라면 늘림
+        capacity = max((sheet.max_row or 0) - min_row, chunk_size)
+        arrays = [np.empty(capacity, dtype=object) for _ in columns]
+        size = 0
+
+        def flush(chunk: list[tuple]) -> None:
+            nonlocal size, capacity
+            if size + len(chunk) > capacity:
+                capacity = max(size + len(chunk), capacity * 2)
+                for i, array in enumerate(arrays):
+                    grown = np.empty(capacity, dtype=object)
+                    grown[:size] = array[:size]
+                    arrays[i] = grown
+
+            for array, values in zip(arrays, zip(*chunk)):
+                array[size:size + len(chunk)] = values
+            size += len(chunk)
+
+        chunk = []
+        for row in rows:
+            row = tuple(row[:len(columns)])
+            if all(value is None for value in row):  # 빈 row는 제외
+                continue
+
+            chunk.append(row + (None,) * (len(columns) - len(row)))
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+
+        if chunk:
+            flush(chunk)
+    finally:
+        wb.close()
+
+    data = {}
+    for i, array in enumerate(arrays):
+        column = pd.Series(array[:size], dtype=object)
+        inferred = column.infer_objects()
+        if inferred.dtype.kind == 'f' and any(type(value) is int for value in column):
+            # 숫자로 입력된 우편번호, 차량번호 등이 41234.0이 되지 않도록 int가 있으면 object로 둠
+            inferred = column
+        data[i] = inferred
+        arrays[i] = None  # 변환한 column의 object array는 바로 놓아줌
+
+    df = pd.DataFrame(data)
+    df.columns = columns
+    return df
+
+
+def read_enis_excel(excel: pathlib.Path | str, config: Any) -> pd.DataFrame:
+    """
+    세외수입 엑셀을 읽는다. DRM이 없는 xlsx는 excel 없이 바로 읽고, 나머지는 xlwings로 excel을 띄워서 읽음
+
+    :param excel: 엑셀 경로
+    :param config: ENIS_CONFIG
+    :return:
+    """
+    if not is_drm_locked(excel):
+        try:
+            return convert_excel_to_df_streaming(excel, config)
+        except (zipfile.BadZipFile, KeyError, OSError):
+            pass  # xlsx처럼 보이지만 openpyxl로 읽을 수 없으면 excel로 읽음
+
+    return convert_drm_excel_to_df(excel, config)
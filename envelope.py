@@ -0,0 +1,648 @@
+import collections
+import functools
+import itertools
+import logging
+import math
+import os
+import pathlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from collections.abc import Iterable, Iterator
+from typing import Callable, TYPE_CHECKING
+
+import pandas as pd
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+
+from jobs import JobContext
+
+if TYPE_CHECKING:
+    # reportlab.pdfgen은 import가 무거워서 pdf를 만들 때 import 함
+    from reportlab.pdfgen.canvas import Canvas
+
+logger = logging.getLogger(__name__)
+
+A4_width, A4_height = A4
+A4_width_in_mm = int(A4_width / mm)
+A4_height_in_mm = int(A4_height / mm)
+
+# 이 개수의 record마다 cancel 확인, progress 보고, trace span을 남김
+ENVELOPE_BATCH_SIZE = 100
+
+# record가 이것보다 적으면 process를 띄우는 시간이 더 걸려서 한 process에서 만듦
+MIN_RECORDS_FOR_PROCESS_POOL = 2000
+
+# process 하나가 한 번에 만드는 record 수, chunk마다 폰트 subset이 따로 들어가므로 너무 작게 나누지 않음
+ENVELOPE_CHUNK_SIZE = 2000
+
+# 이 개수의 record마다 canvas를 임시 pdf로 저장해서 memory를 비움
+ENVELOPE_FLUSH_SIZE = 5000
+
+# 창봉투 앞면 주소, 이름 한 줄의 최대 폭 in mm, 85mm에서 시작해서 오른쪽에 15mm를 남김
+ENVELOPE_TEXT_WIDTH = 110
+
+# pdf에 사용하는 폰트 이름 -> ttf 파일
+FONTS = {
+    '맑은고딕': 'malgun.ttf',
+    '맑은고딕-bold': 'malgunbd.ttf',
+}
+
+# FONTS의 ttf가 있는 폴더, 없으면 reportlab의 검색 경로(windows fonts 폴더 등)에서 찾음
+# 창봉투를 만드는 process들도 같은 폴더를 사용하도록 환경 변수로 넘김
+FONT_DIR_ENV = 'FILE_TO_POSTMOA_FONT_DIR'
+
+
+@functools.lru_cache(maxsize=None)
+def register_fonts() -> None:
+    """
+    FONTS를 reportlab에 등록한다. 처음 pdf를 만들 때 한 번만 등록됨
+
+    import할 때 등록하면 ttf를 읽느라 window가 늦게 뜸
+    ttf를 찾을 수 없으면 reportlab의 TTFError, 실패는 cache 되지 않으므로 다시 호출하면 다시 찾음
+    """
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    font_dir = os.environ.get(FONT_DIR_ENV)
+    for name, ttf in FONTS.items():
+        pdfmetrics.registerFont(TTFont(name, os.path.join(font_dir, ttf) if font_dir else ttf))
+
+
+def check_fonts() -> str | None:
+    """
+    창봉투 pdf를 만들기 전에 폰트를 등록해본다
+
+    :return: 등록할 수 없으면 이유, 있으면 None
+    """
+    try:
+        register_fonts()
+    except Exception as error:  # ttf가 없거나 깨졌으면 reportlab은 TTFError를 냄
+        return f'창봉투 폰트({", ".join(FONTS.values())})를 찾을 수 없음: {error}'
+
+    return None
+
+
+def new_canvas(target: pathlib.Path | str) -> 'Canvas':
+    """
+    폰트를 등록하고 A4 canvas를 만든다
+
+    :param target: 저장할 pdf 경로
+    :return:
+    """
+    from reportlab.pdfgen.canvas import Canvas
+
+    register_fonts()
+    return Canvas(filename=str(target), pagesize=A4)
+
+
+class StaticArtwork:
+    def __init__(self, name: str) -> None:
+        """
+        모든 page에 똑같이 들어가는 그림(절취선, 보내는 사람 주소, logo 등)
+
+        pdf에 form XObject로 한 번만 정의하고, page마다 doForm으로 참조만 하므로
+        page 수가 늘어도 pdf 크기와 rendering 시간이 거의 늘지 않음
+
+        :param name: pdf 안에서 사용할 form 이름, canvas 안에서 unique 해야 함
+        """
+        self.name = name
+        self.elements: list[Callable[['Canvas'], None]] = []
+
+    def add_line(self, x1: float, y1: float, x2: float, y2: float) -> 'StaticArtwork':
+        """
+        (x1, y1)에서 (x2, y2)까지 line 추가
+
+        :param x1: in mm
+        :param y1: in mm
+        :param x2: in mm
+        :param y2: in mm
+        :return: self
+        """
+        self.elements.append(lambda canvas: canvas.line(x1 * mm, y1 * mm, x2 * mm, y2 * mm))
+        return self
+
+    def add_text(self, text: str, x: float, y: float, font: str, font_size: int, row_gap: int = 2) -> 'StaticArtwork':
+        """
+        text 추가, '\\n'으로 줄을 나눔
+
+        :param text: 추가할 str
+        :param x: text box의 left coordinate in mm
+        :param y: text box의 top coordinate(from bottom to top) in mm
+        :param font: pdfmetrics.registerFont로 추가된 폰트의 str
+        :param font_size: 폰트 크기 in pt
+        :param row_gap: 줄 사이 간격 in mm
+        :return: self
+        """
+
+        def draw(canvas: 'Canvas'):
+            canvas.setFont(font, font_size)
+            for i, row in enumerate(text.split('\n')):
+                canvas.drawString(x * mm, (y * mm) - (font_size + (row_gap * mm)) * i, row)
+
+        self.elements.append(draw)
+        return self
+
+    def add_image(self, image: pathlib.Path | str, x: float, y: float, width: float, height: float) -> 'StaticArtwork':
+        """
+        image(logo 등) 추가
+
+        :param image: image 경로
+        :param x: left coordinate in mm
+        :param y: bottom coordinate in mm
+        :param width: in mm
+        :param height: in mm
+        :return: self
+        """
+        self.elements.append(lambda canvas: canvas.drawImage(str(image), x * mm, y * mm, width * mm, height * mm,
+                                                             mask='auto'))
+        return self
+
+    def define(self, canvas: 'Canvas') -> None:
+        """canvas에 form을 정의한다. 이미 정의되어 있으면 아무 것도 하지 않음"""
+        if canvas.hasForm(self.name):
+            return
+
+        canvas.beginForm(self.name)
+        for element in self.elements:
+            element(canvas)
+        canvas.endForm()
+
+    def draw(self, canvas: 'Canvas') -> None:
+        """현재 page에 form을 참조한다"""
+        if not self.elements:
+            return
+
+        self.define(canvas)
+        canvas.doForm(self.name)
+
+
+# 창봉투 뒷면의 perforated lines
+ENVELOPE_BACK_ARTWORK = (
+    StaticArtwork('envelope_back')
+    .add_line(0, 204, A4_width_in_mm, 204)
+    .add_line(0, 110, A4_width_in_mm, 110)
+    .add_line(0, 17, A4_width_in_mm, 17)
+)
+
+# 창봉투 앞면, 보내는 사람 주소나 logo가 필요하면 여기에 추가함
+ENVELOPE_FRONT_ARTWORK = StaticArtwork('envelope_front')
+
+
+class GlyphWidths:
+    def __init__(self, font: str, font_size: float) -> None:
+        """
+        font, font_size에서 글자마다의 폭(pt) table
+
+        처음 나온 글자만 pdfmetrics.stringWidth로 계산해서 저장함.
+        reportlab은 kerning 없이 글자 폭을 더해서 str의 폭을 계산하므로, str의 폭은 글자마다 dict lookup 한 번
+
+        :param font: pdfmetrics.registerFont로 추가된 폰트의 str
+        :param font_size: 폰트 크기 in pt
+        """
+        self.font = font
+        self.font_size = font_size
+        self.widths: dict[str, float] = {}
+
+    def __getitem__(self, char: str) -> float:
+        width = self.widths.get(char)
+        if width is None:
+            from reportlab.pdfbase.pdfmetrics import stringWidth
+
+            width = self.widths[char] = stringWidth(char, self.font, self.font_size)
+
+        return width
+
+    def width(self, text: str) -> float:
+        """text의 폭 in pt"""
+        widths = self.widths
+        try:
+            return sum([widths[char] for char in text])
+        except KeyError:  # 처음 나온 글자가 있음
+            return sum([self[char] for char in text])
+
+
+@functools.lru_cache(maxsize=None)
+def glyph_widths(font: str, font_size: float) -> GlyphWidths:
+    """(font, font_size)마다 table 하나를 계속 사용함"""
+    return GlyphWidths(font, font_size)
+
+
+def wrap_to_width(text: str, max_width: float, widths: GlyphWidths) -> list[str]:
+    """
+    글자 수가 아니라 실제 폭으로 text를 나눈다. textwrap.wrap처럼 단어 단위로 나누고,
+    max_width보다 긴 단어는 글자 단위로 나눔
+
+    한글은 숫자, 공백보다 2배 가까이 넓어서 글자 수로 나누면 한글이 많은 주소는 창 밖으로 나가고
+    숫자가 많은 주소는 줄을 낭비함
+
+    :param text: 나눌 str
+    :param max_width: 한 줄의 최대 폭 in pt
+    :param widths: glyph_widths(font, font_size)
+    :return: 줄들
+    """
+    space = widths[' ']
+
+    lines = []
+    line, line_width = '', 0.0
+    for word in text.split():
+        word_width = widths.width(word)
+
+        if not line and word_width <= max_width:
+            line, line_width = word, word_width
+            continue
+
+        if line and line_width + space + word_width <= max_width:
+            line, line_width = f'{line} {word}', line_width + space + word_width
+            continue
+
+        if word_width <= max_width:
+            lines.append(line)
+            line, line_width = word, word_width
+            continue
+
+        # 한 줄보다 긴 단어는 현재 줄의 남은 공간부터 글자 단위로 채움
+        if line and line_width + space < max_width:
+            line, line_width = line + ' ', line_width + space
+        elif line:
+            lines.append(line)
+            line, line_width = '', 0.0
+
+        for char in word:
+            char_width = widths[char]
+            if line.strip() and line_width + char_width > max_width:
+                lines.append(line.rstrip())
+                line, line_width = '', 0.0
+            line, line_width = line + char, line_width + char_width
+
+    if line:
+        lines.append(line)
+
+    return lines
+
+
+class FontState:
+    def __init__(self) -> None:
+        """
+        page 하나에 마지막으로 설정한 폰트, 같은 폰트면 setFont를 다시 호출하지 않음
+
+        showPage 다음에는 page의 폰트가 초기화되므로 page마다 새로 만들어야 함
+        """
+        self.font: str | None = None
+        self.font_size: float | None = None
+
+    def set(self, canvas: 'Canvas', font: str, font_size: float) -> None:
+        """
+        현재 폰트와 다를 때만 setFont를 호출한다
+
+        :param canvas: 추가할 pdf canvas object
+        :param font: pdfmetrics.registerFont로 추가된 폰트의 str
+        :param font_size: 폰트 크기 in pt
+        """
+        if self.font != font or self.font_size != font_size:
+            canvas.setFont(font, font_size)
+            self.font, self.font_size = font, font_size
+
+
+def set_font(canvas: 'Canvas', font: str, font_size: float, fonts: FontState | None = None) -> None:
+    """fonts가 없으면 항상 setFont를 호출함"""
+    if fonts is None:
+        canvas.setFont(font, font_size)
+    else:
+        fonts.set(canvas, font, font_size)
+
+
+def draw_rows(canvas: 'Canvas',
+              rows: list[str],
+              horizontal_offset: float,
+              vertical_offset: float,
+              row_gap: float,
+              font_size: float, ) -> None:
+    for i, row in enumerate(rows):
+        row_horizontal_offset_in_pt = horizontal_offset * mm
+        row_vertical_offset_in_pt = (vertical_offset * mm) - (font_size + (row_gap * mm)) * i
+
+        canvas.drawString(row_horizontal_offset_in_pt, row_vertical_offset_in_pt, row)
+
+
+def draw_text_to_pdf(canvas: 'Canvas',
+                     text: str,
+                     horizontal_offset: float,
+                     vertical_offset: float,
+                     max_width: float,
+                     row_gap: float,
+                     font: str,
+                     font_size: float,
+                     fonts: FontState | None = None, ):
+    """
+
+    :param canvas: 추가할 pdf canvas object
+    :param text: 추가할 str
+    :param horizontal_offset: text box의 left coordinate(from left to right) in mm
+    :param vertical_offset: text box의 top coordinate(from bottom to top) in mm
+    :param max_width: text box의 폭 in mm, 넘으면 다음 줄로 나눔
+    :param row_gap: 줄 사이 간격 in mm
+    :param font: pdfmetrics.registerFont로 추가된 폰트의 str
+    :param font_size: 폰트 크기 in pt
+    :param fonts: 현재 page의 폰트 상태, 같은 폰트의 setFont를 건너뜀
+    :return:
+    """
+    set_font(canvas, font, font_size, fonts)
+
+    wrapped_text_rows = wrap_to_width(str(text), max_width * mm, glyph_widths(font, font_size))
+    logger.debug('wrapped text: %r', wrapped_text_rows)  # record마다 호출되므로 debug가 꺼져 있으면 formatting 하지 않음
+
+    draw_rows(canvas, wrapped_text_rows, horizontal_offset, vertical_offset, row_gap, font_size)
+
+
+def draw_text_body_to_pdf(canvas: 'Canvas',
+                          text: str,
+                          horizontal_offset: float,
+                          vertical_offset: float,
+                          max_width: float,
+                          row_gap: float,
+                          font: str,
+                          font_size: float,
+                          fonts: FontState | None = None, ):
+    """
+    body는 '\n'으로 나눈 문단마다 나누고, 빈 줄도 그대로 그림
+
+    :param canvas: 추가할 pdf canvas object
+    :param text: 추가할 str
+    :param horizontal_offset: text box의 left coordinate(from left to right) in mm
+    :param vertical_offset: text box의 top coordinate(from bottom to top) in mm
+    :param max_width: text box의 폭 in mm, 넘으면 다음 줄로 나눔
+    :param row_gap: 줄 사이 간격 in mm
+    :param font: pdfmetrics.registerFont로 추가된 폰트의 str
+    :param font_size: 폰트 크기 in pt
+    :param fonts: 현재 page의 폰트 상태, 같은 폰트의 setFont를 건너뜀
+    :return:
+    """
+    set_font(canvas, font, font_size, fonts)
+
+    widths = glyph_widths(font, font_size)
+    body_wrapped = []
+    for paragraph in text.split('\n'):
+        if paragraph:  # non-empty 라면
+            body_wrapped.extend(wrap_to_width(paragraph, max_width * mm, widths))
+        else:  # empty라면 == '\n'만 입력된 line 이라면
+            body_wrapped.append('')
+    logger.debug('wrapped body: %r', body_wrapped)
+
+    draw_rows(canvas, body_wrapped, horizontal_offset, vertical_offset, row_gap, font_size)
+
+
+def draw_line_to_pdf(canvas: 'Canvas',
+                     x1: int, y1: int, x2: int, y2: int):
+    """
+    (x1, y1)에서 (x2, y2)까지 line 그리기
+    :param canvas:
+    :param x1: in mm
+    :param y1: in mm
+    :param x2: in mm
+    :param y2: in mm
+    :return:
+    """
+    canvas.line(x1 * mm, y1 * mm, x2 * mm, y2 * mm)
+
+
+def iter_df_records(df: pd.DataFrame, batch_size: int = ENVELOPE_BATCH_SIZE) -> Iterator[dict]:
+    """df.to_dict('records')와 같지만 batch_size row씩 만들어서 전체 list를 만들지 않음"""
+    for start in range(0, len(df), batch_size):
+        yield from df.iloc[start:start + batch_size].to_dict('records')
+
+
+def render_windowed_envelope_pdf(target: pathlib.Path | str,
+                                 envelope_df: pd.DataFrame,
+                                 context: JobContext | None = None) -> pathlib.Path:
+    """
+    창봉투 pdf를 만든다. record 하나에 앞면(주소, 이름, 우편번호)과 뒷면(절취선) 2 page
+
+    :param target: 저장할 pdf 경로
+    :param envelope_df: 이름, 우편번호, 주소, 제목, 차량번호, 비고 column이 있는 df, mapping이 끝난 상태
+    :param context: progress 보고, cancel 확인, ENVELOPE_BATCH_SIZE개마다 span 기록
+    :return: 저장된 pdf 경로
+    """
+    return render_windowed_envelope_records(target, iter_df_records(envelope_df), context, len(envelope_df))
+
+
+def render_windowed_envelope_records(target: pathlib.Path | str,
+                                     records: Iterable[dict],
+                                     context: JobContext | None = None,
+                                     total: int | None = None,
+                                     flush_size: int = ENVELOPE_FLUSH_SIZE) -> pathlib.Path:
+    """
+    record를 하나씩 받아서 창봉투 pdf를 만든다
+
+    reportlab canvas는 save() 할 때까지 모든 page를 memory에 들고 있어서,
+    flush_size개마다 지금까지의 page를 임시 pdf로 저장하고 새 canvas로 이어서 그림.
+    임시 pdf들은 마지막에 pdf_merge.merge_pdfs로 이어 붙이므로 record가 많아도 memory가 늘지 않음
+
+    :param target: 저장할 pdf 경로
+    :param records: 이름, 우편번호, 주소, 제목, 차량번호, 비고 key가 있는 dict들, MappingPlan.iter_records() 등
+    :param context: progress 보고, cancel 확인, ENVELOPE_BATCH_SIZE개마다 span 기록
+    :param total: 전체 record 수, progress 보고용
+    :param flush_size: 임시 pdf 하나에 그릴 record 수
+    :return: 저장된 pdf 경로
+    """
+    from pdf_merge import merge_pdfs
+
+    context = context if context is not None else JobContext()
+
+    target = pathlib.Path(target)
+    records = iter(records)
+
+    # 같은 drive에 만들어야 마지막에 rename이나 merge 할 때 빠름
+    with tempfile.TemporaryDirectory(prefix='.envelope-', dir=target.parent) as directory:
+        parts = []
+        done = 0
+
+        while True:
+            part = pathlib.Path(directory) / f'{len(parts):05d}.pdf'
+            windowed_envelope_pdf = new_canvas(part)  # 폰트는 처음 pdf를 만들 때 등록됨
+            drawn = 0
+
+            while drawn < flush_size:
+                context.check_cancelled()  # cancel되면 임시 폴더와 함께 삭제되므로 pdf가 생성되지 않음
+                context.progress(done, total if total is not None else done, target.name)
+
+                batch = list(itertools.islice(records, min(ENVELOPE_BATCH_SIZE, flush_size - drawn)))
+                if not batch:
+                    break
+
+                with context.span('envelope pages', records=f'{done}-{done + len(batch) - 1}'):
+                    for record in batch:
+                        draw_envelope(windowed_envelope_pdf, record)
+
+                drawn += len(batch)
+                done += len(batch)
+
+            # record가 하나도 없으면 빈 page 1장짜리 pdf가 됨(reportlab과 같음)
+            if drawn or not parts:
+                with context.span('envelope save', records=drawn):
+                    windowed_envelope_pdf.save()
+                parts.append(part)
+                logger.debug('envelope part %d: %d records', len(parts), drawn)
+
+            if drawn < flush_size:
+                break
+
+        if len(parts) == 1:
+            os.replace(parts[0], target)
+        else:
+            with context.span('envelope merge', parts=len(parts)):
+                merge_pdfs(parts, target)
+
+    return target
+
+
+def draw_envelope(windowed_envelope_pdf: 'Canvas', record: dict, max_width: float = ENVELOPE_TEXT_WIDTH) -> None:
+    """
+    record 하나의 앞면, 뒷면 2 page를 그린다
+
+    :param windowed_envelope_pdf: new_canvas()로 만든 canvas
+    :param record: envelope_df의 row
+    :param max_width: 주소, 이름 한 줄의 최대 폭 in mm
+    """
+    name = record.get('이름', '')
+    zipcode = record.get('우편번호', '')
+    address = record.get('주소', '')
+    title = record.get('제목', '')
+    bike_number = record.get('차량번호', '')
+    info = record.get('비고', '')
+
+    fonts = FontState()  # 앞면 page의 폰트, showPage 하면 버림
+
+    # 주소
+    draw_text_to_pdf(windowed_envelope_pdf, address, 85, 244, max_width, 2, "맑은고딕", 10, fonts)
+
+    # 이름
+    draw_text_to_pdf(windowed_envelope_pdf, name, 85, 230, max_width, 2, "맑은고딕-bold", 10, fonts)
+
+    # 우편번호
+    character_gap: int = 6
+    for i, z in enumerate(zipcode):
+        draw_text_to_pdf(windowed_envelope_pdf, z, 135 + (character_gap * i), 225, max_width, 2,
+                         "맑은고딕", 10, fonts)
+
+    ENVELOPE_FRONT_ARTWORK.draw(windowed_envelope_pdf)
+    windowed_envelope_pdf.showPage()  # 한 페이지 앞면 완성
+
+    # 뒷 페이지 perforated line, form으로 한 번만 정의하고 page마다 참조함
+    ENVELOPE_BACK_ARTWORK.draw(windowed_envelope_pdf)
+
+    windowed_envelope_pdf.showPage()  # 한 페이지 뒷면 완성
+
+
+def envelope_workers(records: int, max_workers: int | None = None) -> int:
+    """
+    :param records: 만들 창봉투 수
+    :param max_workers: 최대 process 수, None이면 cpu 수
+    :return: 창봉투 pdf를 만들 process 수, 1이면 process pool을 사용하지 않음
+    """
+    if records < MIN_RECORDS_FOR_PROCESS_POOL:
+        return 1
+
+    return max_workers or os.cpu_count() or 1
+
+
+def envelope_chunk_size(records: int, max_workers: int, chunk_size: int = ENVELOPE_CHUNK_SIZE) -> int:
+    """모든 process가 일하도록 chunk_size보다 작게 나눌 수 있음, ENVELOPE_BATCH_SIZE보다 작게는 나누지 않음"""
+    return max(ENVELOPE_BATCH_SIZE, min(chunk_size, math.ceil(records / max_workers)))
+
+
+def _render_chunk(target: pathlib.Path, records: Callable[[], Iterable[dict]], total: int) -> pathlib.Path:
+    # ProcessPoolExecutor에서 pickle 할 수 있도록 module level 함수로 둠, record는 process 안에서 만듦
+    return render_windowed_envelope_records(target, records(), total=total)
+
+
+def render_windowed_envelope_records_parallel(target: pathlib.Path | str,
+                                              chunks: Iterable[tuple[int, Callable[[], Iterable[dict]]]],
+                                              total: int,
+                                              context: JobContext | None = None,
+                                              max_workers: int | None = None) -> pathlib.Path:
+    """
+    chunk마다 process에서 record를 만들면서 창봉투 pdf를 그리고, 하나의 pdf로 이어 붙인다
+
+    chunk는 (record 수, record들을 만드는 함수)이고, 함수는 process에서 호출되므로 pickle 할 수 있어야 함
+    (module level 함수의 functools.partial 등). chunks는 필요할 때 하나씩 꺼내고 동시에 제출하는 chunk는
+    process 수의 2배까지라서, 출력 df 전체를 만들지 않고 memory에는 몇 개의 chunk만 있음.
+    process가 1개면 chunk들을 이어서 render_windowed_envelope_records로 그림
+
+    :param target: 저장할 pdf 경로
+    :param chunks: (record 수, record들을 만드는 함수)들, 순서대로 이어 붙임
+    :param total: 전체 record 수
+    :param context: chunk마다 progress 보고, cancel 확인
+    :param max_workers: process 수, None이면 cpu 수
+    :return: 저장된 pdf 경로
+    """
+    from pdf_merge import merge_pdfs
+
+    context = context if context is not None else JobContext()
+    target = pathlib.Path(target)
+
+    max_workers = envelope_workers(total, max_workers)
+    if max_workers == 1:
+        records = itertools.chain.from_iterable(make_records() for _, make_records in chunks)
+        return render_windowed_envelope_records(target, records, context, total)
+
+    # 같은 drive에 만들어야 merge 할 때 빠름
+    with tempfile.TemporaryDirectory(prefix='.envelope-', dir=target.parent) as directory:
+        parts = []
+        pending = collections.deque()
+        done = 0
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            def wait_oldest():
+                nonlocal done
+                count, future = pending.popleft()
+                if context.is_cancelled():
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    context.check_cancelled()
+
+                future.result()
+                done += count
+                context.progress(done, total, target.name)
+
+            with context.span('envelope chunks', workers=max_workers):
+                for count, make_records in chunks:
+                    part = pathlib.Path(directory) / f'{len(parts):05d}.pdf'
+                    parts.append(part)
+                    pending.append((count, executor.submit(_render_chunk, part, make_records, count)))
+
+                    while len(pending) >= max_workers * 2:
+                        wait_oldest()
+
+                while pending:
+                    wait_oldest()
+
+        with context.span('envelope merge', chunks=len(parts)):
+            merge_pdfs(parts, target)
+
+    return target
+
+
+def render_windowed_envelope_pdf_parallel(target: pathlib.Path | str,
+                                          envelope_df: pd.DataFrame,
+                                          context: JobContext | None = None,
+                                          max_workers: int | None = None,
+                                          chunk_size: int = ENVELOPE_CHUNK_SIZE) -> pathlib.Path:
+    """
+    이미 만든 envelope_df를 chunk로 나눠서 render_windowed_envelope_records_parallel로 만든다
+
+    이어 붙일 때는 page를 다시 그리지 않고 object를 그대로 복사함(pdf_merge.merge_pdfs).
+    record가 MIN_RECORDS_FOR_PROCESS_POOL보다 적거나 process가 1개면 render_windowed_envelope_pdf와 같음
+
+    :param target: 저장할 pdf 경로
+    :param envelope_df: render_windowed_envelope_pdf와 같음
+    :param context: chunk마다 progress 보고, cancel 확인
+    :param max_workers: process 수, None이면 cpu 수
+    :param chunk_size: process 하나가 한 번에 만드는 record 수
+    :return: 저장된 pdf 경로
+    """
+    chunk_size = envelope_chunk_size(len(envelope_df), envelope_workers(len(envelope_df), max_workers), chunk_size)
+    chunks = ((len(chunk), functools.partial(iter_df_records, chunk))
+              for chunk in (envelope_df.iloc[start:start + chunk_size]
+                            for start in range(0, len(envelope_df), chunk_size)))
+
+    return render_windowed_envelope_records_parallel(target, chunks, len(envelope_df), context, max_workers)
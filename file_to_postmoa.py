@@ -0,0 +1,245 @@
+"""
+GUI 없이 공문 pdf나 세외수입 엑셀을 우편모아 엑셀과 창봉투 pdf로 변환한다
+
+    python -m file_to_postmoa convert notices/*.pdf --out DIR
+    python -m file_to_postmoa convert notices/ --out DIR --workers 8 --summary summary.json
+    python -m file_to_postmoa convert enis.xlsx --out DIR
+    python -m file_to_postmoa build-zipcode-index 서울특별시.txt 부산광역시.txt ...
+    python -m file_to_postmoa convert notices/ --out DIR --zipcode-index
+    python -m file_to_postmoa convert notices/ --out DIR --font-dir /usr/share/fonts/malgun
+
+결과 요약(rows, failures, timings)은 json으로 stdout에 출력하고, progress와 log는 stderr에 출력한다
+--log-file을 지정하면 pdf 추출, 저장마다 요약을 json 한 줄로 저장함(파일이 크면 rotate)
+PyQt6는 import하지 않음
+"""
+import argparse
+import contextlib
+import glob
+import json
+import multiprocessing
+import os
+import pathlib
+import sys
+import time
+
+import pandas as pd
+
+from batch_import import collect_pdfs, extract_pdfs
+from column_replacer import column_to_str
+from envelope import FONT_DIR_ENV, check_fonts
+from jobs import JobContext
+from logs import configure_logging
+from pdf_extractor import Region
+from record_cache import RecordCache
+from tracing import Tracer
+from pipeline import PDF_EMPTY_DATAFRAME, ENIS_CONFIG, PDF_CONFIG, read_enis_excel, output_paths, save_outputs
+from zipcode_index import ZipcodeIndex, build_zipcode_index, default_index_path
+
+EXCEL_SUFFIXES = ('.xlsx', '.xls')
+
+# 요약에 포함할 우편번호 검증 결과 수, 전체 개수는 zipcode_issue_count
+MAX_ZIPCODE_ISSUES = 100
+
+
+def expand_inputs(inputs: list[str]) -> list[pathlib.Path]:
+    """
+    windows cmd는 *.pdf를 펼쳐주지 않아서 여기서 glob을 적용함
+
+    :param inputs: command line의 input들
+    :return:
+    """
+    paths = []
+    for pattern in inputs:
+        matched = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(pathlib.Path(path) for path in matched)
+
+    return paths
+
+
+def print_progress(done: int, total: int, message: str = '') -> None:
+    print(f'[{done}/{total}] {message}', file=sys.stderr, flush=True)
+
+
+def convert(inputs: list[pathlib.Path],
+            out: pathlib.Path,
+            workers: int | None = None,
+            quiet: bool = False,
+            cache: RecordCache | None = None,
+            tracer: Tracer | None = None,
+            lazy: bool = False,
+            regions: list[Region] | None = None,
+            dedup: bool = False,
+            zipcode_index: ZipcodeIndex | None = None, ) -> dict:
+    """
+    inputs를 읽어서 out 폴더에 우편모아 엑셀 3개와 창봉투 pdf를 저장한다
+
+    :param inputs: pdf 파일, pdf가 있는 폴더 또는 세외수입 엑셀
+    :param out: 저장할 폴더
+    :param workers: pdf 추출과 창봉투 pdf 생성에 사용할 process 수, None이면 cpu 수
+    :param quiet: True면 progress를 출력하지 않음
+    :param cache: 추출한 pdf record cache, None이면 사용하지 않음
+    :param tracer: 단계별 span을 기록할 tracer
+    :param lazy: pdf에서 모든 field를 찾으면 나머지 page는 읽지 않음
+    :param regions: 있으면 pdf page마다 이 영역들의 text만 추출함
+    :param dedup: 같은 수취인(이름, 우편번호, 주소)의 row들을 하나의 우편물로 합치고 보고서를 저장함
+    :param zipcode_index: 있으면 우편번호와 주소를 검증해서 결과를 요약에 포함함(저장은 그대로 함)
+    :return: 결과 요약
+    """
+    import arrow
+
+    start = time.perf_counter()
+    context = JobContext(None if quiet else print_progress, tracer)
+
+    excels = [path for path in inputs if path.suffix.lower() in EXCEL_SUFFIXES]
+    others = [path for path in inputs if path.suffix.lower() not in EXCEL_SUFFIXES]
+    if excels and others:
+        raise ValueError('세외수입 엑셀과 pdf는 같이 변환할 수 없음')
+
+    timings = {}
+    failures = []
+
+    # 창봉투 pdf를 만들 수 없으면 엑셀도 저장하지 않고 요약에 이유를 남김
+    error = check_fonts()
+    if error is not None:
+        return {
+            'excel_type': None,
+            'rows': 0,
+            'failures': failures,
+            'outputs': {},
+            'timings': timings,
+            'cache': cache.stats() if cache is not None else None,
+            'zipcode_issue_count': None,
+            'zipcode_issues': None,
+            'error': error,
+        }
+
+    if excels:
+        config = ENIS_CONFIG
+        with context.span('extract', files=len(excels)):
+            data = pd.concat([read_enis_excel(excel, config) for excel in excels], ignore_index=True)
+        timings['extract'] = time.perf_counter() - start
+
+    else:
+        config = PDF_CONFIG
+        pdfs = collect_pdfs(others)
+        with context.span('extract', files=len(pdfs)):
+            result = extract_pdfs(pdfs, max_workers=workers, progress=context.progress, cache=cache,
+                                  lazy=lazy, regions=regions)
+        timings['extract'] = time.perf_counter() - start
+
+        data = pd.DataFrame(result.rows(list(PDF_EMPTY_DATAFRAME.columns)), columns=PDF_EMPTY_DATAFRAME.columns)
+        failures = [{'file': str(failure.pdf), 'error': failure.error} for failure in result.failures]
+
+    zipcode_issues = None
+    if zipcode_index is not None:
+        _, zipcode, address = config.recipient_columns
+        with context.span('zipcode check', rows=len(data)):
+            issues = zipcode_index.validate(data[zipcode], data[address])
+        zipcodes = column_to_str(data[zipcode]).to_numpy()
+        zipcode_issues = [{'row': row + 1, 'zipcode': zipcodes[row], 'issue': issues[row]}
+                          for row in pd.Series(issues).dropna().index]
+
+    paths = {}
+    if len(data):
+        out.mkdir(parents=True, exist_ok=True)
+        paths = output_paths(out, arrow.now().format('YYYY-MM-DD HHmmss'), dedup)
+        timings.update(save_outputs(data, config, paths, context, workers))
+
+    timings['total'] = time.perf_counter() - start
+
+    return {
+        'excel_type': config.excel_type,
+        'rows': len(data),
+        'failures': failures,
+        'outputs': {name: str(path) for name, path in paths.items()},
+        'timings': timings,
+        'cache': cache.stats() if cache is not None else None,
+        'zipcode_issue_count': len(zipcode_issues) if zipcode_issues is not None else None,
+        'zipcode_issues': zipcode_issues[:MAX_ZIPCODE_ISSUES] if zipcode_issues is not None else None,
+        'error': None,
+    }
+
+
+def parse_region(text: str) -> Region:
+    """'x0,y0,x1,y1' -> (x0, y0, x1, y1)"""
+    try:
+        x0, y0, x1, y1 = (float(value) for value in text.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'x0,y0,x1,y1 형식이어야 함: {text!r}')
+
+    return x0, y0, x1, y1
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='file_to_postmoa', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert_parser = subparsers.add_parser('convert', help='pdf/엑셀을 우편모아 엑셀과 창봉투 pdf로 변환')
+    convert_parser.add_argument('inputs', nargs='+', help='pdf 파일, pdf가 있는 폴더 또는 세외수입 엑셀')
+    convert_parser.add_argument('--out', type=pathlib.Path, required=True, help='저장할 폴더')
+    convert_parser.add_argument('--workers', type=int, default=None, help='pdf 추출, 창봉투 생성 process 수, 기본값은 cpu 수')
+    convert_parser.add_argument('--summary', type=pathlib.Path, help='결과 요약 json을 저장할 경로')
+    convert_parser.add_argument('--quiet', action='store_true', help='progress를 출력하지 않음')
+    convert_parser.add_argument('--cache', type=pathlib.Path, default=None,
+                                help='pdf record cache 경로, 기본값은 사용자 cache 폴더')
+    convert_parser.add_argument('--no-cache', action='store_true', help='pdf record cache를 사용하지 않음')
+    convert_parser.add_argument('--trace', type=pathlib.Path, help='단계별 시간을 chrome trace json으로 저장할 경로')
+    convert_parser.add_argument('--lazy-pages', action='store_true',
+                                help='pdf에서 모든 field를 찾으면 나머지 page(붙임 문서 등)는 읽지 않음')
+    convert_parser.add_argument('--region', type=parse_region, action='append', dest='regions',
+                                help='pdf page에서 text를 추출할 영역 x0,y0,x1,y1 in pt, 여러 번 지정 가능')
+    convert_parser.add_argument('--dedup', action='store_true',
+                                help='같은 수취인의 row들을 하나의 우편물로 합치고(비고는 이어 붙임) 합친 내용을 csv로 저장')
+    convert_parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default=None,
+                                help='stderr로 출력할 log level, 기본값은 WARNING')
+    convert_parser.add_argument('--log-file', type=pathlib.Path, help='batch 요약 log를 저장할 파일')
+    convert_parser.add_argument('--zipcode-index', type=pathlib.Path, nargs='?', const=default_index_path(),
+                                help='우편번호와 주소를 검증할 index 폴더, 폴더 없이 지정하면 기본 index')
+    convert_parser.add_argument('--font-dir', type=pathlib.Path, default=None,
+                                help=f'창봉투 폰트(malgun.ttf, malgunbd.ttf)가 있는 폴더, 기본값은 {FONT_DIR_ENV} 환경 변수 '
+                                     f'또는 windows fonts 폴더')
+
+    index_parser = subparsers.add_parser('build-zipcode-index', help='우체국 우편번호 DB로 우편번호 검증 index를 만듦')
+    index_parser.add_argument('sources', nargs='+', type=pathlib.Path, help="'|'로 구분된 우편번호 DB txt 파일들")
+    index_parser.add_argument('--out', type=pathlib.Path, default=None, help='저장할 폴더, 기본값은 사용자 cache 폴더')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build-zipcode-index':
+        configure_logging()
+        print(json.dumps(build_zipcode_index(args.sources, args.out), ensure_ascii=False, indent=2))
+        return 0
+
+    configure_logging(args.log_level, args.log_file)
+    if args.font_dir is not None:
+        os.environ[FONT_DIR_ENV] = str(args.font_dir)  # 창봉투를 만드는 process들도 사용함
+    zipcode_index = ZipcodeIndex(args.zipcode_index) if args.zipcode_index is not None else None
+
+    # stdout에는 json 요약만 출력되도록 변환 중의 print는 stderr로 보냄
+    cache = None if args.no_cache else RecordCache(args.cache)
+    tracer = Tracer(enabled=args.trace is not None)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        summary = convert(expand_inputs(args.inputs), args.out, args.workers, args.quiet, cache, tracer,
+                          args.lazy_pages, args.regions, args.dedup, zipcode_index)
+
+    if args.trace:
+        tracer.export(args.trace)
+
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    print(text)
+    if args.summary:
+        args.summary.write_text(text, encoding='utf-8')
+
+    # 0: 성공, 1: 일부 실패, 2: 변환된 row가 없음, 3: 폰트가 없는 등 변환할 수 없음
+    if summary['error']:
+        return 3
+    if not summary['rows']:
+        return 2
+    return 1 if summary['failures'] else 0
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import threading
+from typing import Any, Callable
+
+from tracing import Span, Tracer
+
+
+class JobCancelled(Exception):
+    """cancel이 요청된 job이 중단될 때 발생함"""
+
+
+class JobContext:
+    def __init__(self,
+                 on_progress: Callable[[int, int, str], None] | None = None,
+                 tracer: Tracer | None = None, ) -> None:
+        """
+        오래 걸리는 job에 넘겨주는 object. progress 보고, cancel 확인, 단계별 시간 측정에 사용함
+
+        GUI에서는 Worker가 signal로 progress를 전달하고, command line에서는 그냥 출력함
+
+        :param on_progress: (done, total, message)로 호출됨
+        :param tracer: span을 기록할 tracer, None이면 기록하지 않음
+        """
+        self._on_progress = on_progress
+        self._cancel_event = threading.Event()
+        self.tracer = tracer if tracer is not None else Tracer(enabled=False)
+
+    def progress(self, done: int, total: int, message: str = '') -> None:
+        if self._on_progress is not None:
+            self._on_progress(done, total, message)
+
+    def span(self, name: str, **args: Any) -> Span:
+        """
+        with context.span('mapping'): ... 처럼 단계를 감싸서 시간을 측정함
+
+        :param name: 단계 이름
+        :param args: trace에 같이 저장할 값들
+        :return: 나가면 duration이 채워짐
+        """
+        return self.tracer.span(name, **args)
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        """cancel이 요청되었으면 JobCancelled를 발생시킴. job의 loop 안에서 주기적으로 호출함"""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
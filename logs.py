@@ -0,0 +1,107 @@
+"""
+logging 설정과 batch 요약 log
+
+module마다 logging.getLogger(__name__)을 사용하고, message는 logger.debug('%s', value)처럼 넘겨서
+level이 꺼져 있으면 formatting 하지 않음. 창봉투 pdf처럼 record마다 호출되는 곳은 debug level만 사용함
+
+batch 요약(pdf 추출, 저장 한 번에 json 한 줄)은 configure_logging(log_file=...)로 지정한 파일에만 저장하고,
+파일이 크면 rotate 함
+"""
+import json
+import logging
+import os
+import pathlib
+import sys
+from typing import Any
+
+SUMMARY_LOGGER_NAME = 'file_to_postmoa.summary'
+
+# 지정하지 않으면 환경 변수에서 읽음, GUI는 command line option이 없으므로 환경 변수로 켬
+LOG_LEVEL_ENV = 'FILE_TO_POSTMOA_LOG_LEVEL'
+LOG_FILE_ENV = 'FILE_TO_POSTMOA_LOG_FILE'
+
+DEFAULT_LOG_LEVEL = 'WARNING'
+DEFAULT_LOG_MAX_BYTES = 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT = 5
+
+LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+summary_logger = logging.getLogger(SUMMARY_LOGGER_NAME)
+
+# configure_logging이 추가한 handler들, 다시 호출하면 교체함
+_handlers: list[tuple[logging.Logger, logging.Handler]] = []
+
+
+class Summary:
+    __slots__ = ('event', 'fields')
+
+    def __init__(self, event: str, fields: dict[str, Any]) -> None:
+        """log 할 때만 json으로 바뀌는 batch 요약"""
+        self.event = event
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return json.dumps({'event': self.event, **self.fields}, ensure_ascii=False, default=str)
+
+
+def log_summary(event: str, **fields: Any) -> None:
+    """
+    batch 하나가 끝날 때 요약을 json 한 줄로 남긴다. log 파일이 없으면 아무 것도 하지 않음
+
+    :param event: 'extract', 'save' 등
+    :param fields: 같이 저장할 값들, json으로 바꿀 수 없으면 str()
+    """
+    if summary_logger.isEnabledFor(logging.INFO):
+        summary_logger.info('%s', Summary(event, fields))
+
+
+def configure_logging(level: str | int | None = None,
+                      log_file: pathlib.Path | str | None = None,
+                      max_bytes: int = DEFAULT_LOG_MAX_BYTES,
+                      backup_count: int = DEFAULT_LOG_BACKUP_COUNT, ) -> None:
+    """
+    stderr로 level 이상의 log를 출력하고, log_file이 있으면 batch 요약을 저장한다
+
+    :param level: 'DEBUG', 'INFO' 등, None이면 환경 변수 FILE_TO_POSTMOA_LOG_LEVEL 또는 WARNING
+    :param log_file: batch 요약을 저장할 파일, None이면 환경 변수 FILE_TO_POSTMOA_LOG_FILE, 없으면 저장하지 않음
+    :param max_bytes: log 파일이 이 크기를 넘으면 rotate
+    :param backup_count: rotate된 파일을 몇 개까지 남길지
+    """
+    level = level or os.environ.get(LOG_LEVEL_ENV) or DEFAULT_LOG_LEVEL
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            raise ValueError(f'지원하지 않는 log level: {level!r}')
+
+    log_file = log_file or os.environ.get(LOG_FILE_ENV)
+
+    for logger, handler in _handlers:
+        logger.removeHandler(handler)
+        handler.close()
+    _handlers.clear()
+
+    root = logging.getLogger()
+    root.setLevel(level)
+
+    console = logging.StreamHandler(sys.stderr)
+    console.setLevel(level)  # 요약은 INFO라서 console level이 높으면 파일에만 저장됨
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(console)
+    _handlers.append((root, console))
+
+    if log_file:
+        # socket 등을 import 해서 파일을 지정할 때만 import 함
+        from logging.handlers import RotatingFileHandler
+
+        log_file = pathlib.Path(log_file)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+
+        handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8',
+                                      delay=True)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        summary_logger.addHandler(handler)
+        _handlers.append((summary_logger, handler))
+
+        summary_logger.setLevel(logging.INFO)
+    else:
+        summary_logger.setLevel(logging.NOTSET)  # root의 level을 따름
@@ -1,34 +1,30 @@
 import configparser
 
 from PyQt6.QtGui import QIcon, QAction, QColor, QContextMenuEvent
-from PyQt6.QtWidgets import QMainWindow, QApplication, QMessageBox, QTableView, QFileDialog, QWidget, QMenu
-from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QDate
+from PyQt6.QtWidgets import QMainWindow, QApplication, QMessageBox, QTableView, QFileDialog, QWidget, QMenu, QStyle
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QDate, QThreadPool, QTimer
 
+import logging
 import pathlib
+import numpy as np
 import pandas as pd
-import arrow
-import win32com.client as win32
-import textwrap
-import re
+import multiprocessing
 import sys
 
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.pdfgen.canvas import Canvas
-from reportlab.lib.units import mm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-
-from collections.abc import Sequence
 from typing import Callable, Any
-from pypdf import PdfReader
-import xlwings as xw
 
-pdfmetrics.registerFont(TTFont("맑은고딕", "malgun.ttf"))
-pdfmetrics.registerFont(TTFont("맑은고딕-bold", "malgunbd.ttf"))
+from batch_import import collect_pdfs, extract_pdfs, BatchResult
+from record_cache import open_cache
+from workers import Worker
+from jobs import JobContext
+from tracing import Tracer, format_timings
+from logs import configure_logging
+from session import DEFAULT_AUTOSAVE_INTERVAL, Session, SessionAutosaver, load_session
+from zipcode_index import build_zipcode_index, open_zipcode_index
+from pipeline import (PDF_EMPTY_DATAFRAME, Config, ENIS_CONFIG, PDF_CONFIG, read_enis_excel, output_paths,
+                      save_outputs)
 
-A4_width, A4_height = A4
-A4_width_in_mm = int(A4_width / mm)
-A4_height_in_mm = int(A4_height / mm)
+logger = logging.getLogger(__name__)
 
 FILTERS = [
     "Excel (*.xlsx)",
@@ -36,256 +32,264 @@ FILTERS = [
     "All Files (*)",
 ]
 
-# 우편모아 엑셀 출력용
-NORMAL_MAIL_EMPTY_DATAFRAME = pd.DataFrame(
-    columns=['규격*', '중량*', '통수*', '수취인*', '우편번호*', '기본주소*', '상세주소', '휴대폰', '문서번호', '문서제목', '비고'])
-REGISTERED_MAIL_EMPTY_DATAFRAME = pd.DataFrame(
-    columns=['수수료*', '환부*', '규격*', '중량', '수취인*', '우편번호*', '기본주소*', '상세주소', '휴대폰', '문서번호', '문서제목', '비고'])
-SELECTIVE_REGISTERED_MAIL_EMPTY_DATAFRAME = pd.DataFrame(
-    columns=['수수료*', '규격*', '중량', '수취인*', '우편번호*', '기본주소*', '상세주소', '휴대폰', '문서번호', '문서제목', '비고'])
-
-# 화면에 보이는 테이블
-PDF_EMPTY_DATAFRAME = pd.DataFrame(
-    columns=['이름', '우편번호', '주소', '제목', '차량번호', '비고'])
+MISSING_COLOR = QColor('red')
+INVALID_COLOR = QColor('orange')  # 우편번호 index로 검증한 결과가 있는 cell, tooltip에 내용을 표시함
 
+# column 폭을 계산할 때 측정하는 cell 수, 앞쪽 row들과 글자 수가 가장 긴 cell들
+COLUMN_SAMPLE_ROWS = 50
+COLUMN_SAMPLE_LONGEST = 20
+COLUMN_PADDING = 16
+COLUMN_MAX_WIDTH = 400
 
-class BodyWrapper(textwrap.TextWrapper):
 
-    def wrap(self, text: str) -> list[str]:
-        paragraphs = text.split('\n')
-        lines = []
-        for paragraph in paragraphs:
-            if paragraph:  # non-empty 라면
-                lines.extend(super().wrap(paragraph))
-            else:  # empty라면 == '\n'만 입력된 line 이라면
-                lines.append('')  # extend를 하면 아무 것도 추가되지 않음
+def display_strings(values: np.ndarray) -> np.ndarray:
+    """column 값들을 table에 표시할 str로 한 번에 바꿈. object array로 반환해서 cell 단위로 수정할 수 있음"""
+    return np.asarray(values, dtype=object).astype(str).astype(object)
 
-        return lines
 
+def missing_mask(values: np.ndarray, display: np.ndarray) -> np.ndarray:
+    """
+    빨간색으로 표시할 빈 cell들
 
-class ColumnReplacer:
-    def __init__(self,
-                 target_df_column: str,
-                 replacer: str,
-                 extra_pattern: str = '',
-                 value_for_extra_pattern: str = '', ) -> None:
-        self.target_df_column = target_df_column
-        self.replacer = replacer
-        self.extra_pattern = extra_pattern
-        self.value_for_extra_pattern = value_for_extra_pattern
+    None, NaN, ''와 xlwings가 빈 cell을 읽은 'None', 숫자 column의 0
 
-    def __iter__(self):
-        return iter(self.__dict__.values())
+    :param values: column 값
+    :param display: display_strings(values)
+    :return: bool array
+    """
+    mask = pd.isna(values) | (display == '') | (display == 'None')
+    if values.dtype.kind in 'biuf':
+        mask |= values == 0
 
-    def replace(self, target_df: pd.DataFrame, data_df: pd.DataFrame) -> None:
-        """
-        target_df의 데이터를 data_df의 데이터를 replacer에 적용한 값으로 업데이트 한다
+    return np.asarray(mask, dtype=bool)
 
-        :param target_df: 옮길 대상 dataframe
-        :param data_df: 사용할 data가 저장된 dataframe
-        :param extra_pattern: 추가로 대체될 pattern
-        :param value_for_extra_pattern: 추가로 대체할  value
-        """
 
-        if self.replacer:
-            replacing_data_df_columns = re.findall(r'{(\w+)}',
-                                                   self.replacer)  # data_df의 column이름, replacer에서 sub할 data_df의 column names
-            # print(f'{replacing_data_df_columns=}')
-
-            replaced = [self.replacer for _ in
-                        range(len(data_df))]  # target_df_column 하나에 data_df의 여러 columns이 결합될 수 있음. placeholder를 생성함
-
-            if replacing_data_df_columns:
-                for replacing_data_df_column in replacing_data_df_columns:
-                    # print(f'{replacing_data_df_column=}')
-                    for i, (_new, r) in enumerate(zip(data_df[replacing_data_df_column], replaced)):
-                        if _new:
-                            # data_df가 비어있지 않으면 replace
-                            replaced[i] = re.sub("{" + replacing_data_df_column + "}", _new, r)
-                        else:  # data_df가 비어있으면 template만 삭제
-                            replaced[i] = re.sub("{" + replacing_data_df_column + "}", '', r)
-
-                        if self.extra_pattern:
-                            # 전화번호에 들어있는 -을 제거하려고 추가 처리
-                            replaced[i] = re.sub(self.extra_pattern, self.value_for_extra_pattern, replaced[i])
-
-            target_df[self.target_df_column] = replaced
-
-
-# pdf_df를 우편모아 df로 변환하는 mappings
-PDF_TO_POSTMOA_NORMAL_MAIL_EXCEL_COLUMNS: Sequence[ColumnReplacer] = (
-    ColumnReplacer('수취인*', '{이름}'),
-    ColumnReplacer('우편번호*', '{우편번호}'),
-    ColumnReplacer('기본주소*', '{주소}'),
-    ColumnReplacer('문서제목', '{제목}'),
-    ColumnReplacer('비고', '{차량번호}, {비고}까지'),
-    ColumnReplacer('규격*', '규격'),
-    ColumnReplacer('통수*', '1'),
-    ColumnReplacer('중량*', '25'),
-)
-PDF_TO_POSTMOA_REGISTERED_MAIL_EXCEL_COLUMNS: Sequence[ColumnReplacer] = (
-    ColumnReplacer('수취인*', '{이름}'),
-    ColumnReplacer('우편번호*', '{우편번호}'),
-    ColumnReplacer('기본주소*', '{주소}'),
-    ColumnReplacer('문서제목', '{제목}'),
-    ColumnReplacer('비고', '{차량번호}, {비고}까지'),
-    ColumnReplacer('규격*', '규격'),
-    ColumnReplacer('중량', '25'),
-    ColumnReplacer('수수료*', '보통'),
-    ColumnReplacer('환부*', '환부불능'),
-)
-PDF_TO_POSTMOA_SELECTIVE_REGISTERED_MAIL_EXCEL_COLUMNS: Sequence[ColumnReplacer] = (
-    ColumnReplacer('수수료*', '보통'),
-    ColumnReplacer('규격*', '규격'),
-    ColumnReplacer('중량', '25'),
-    ColumnReplacer('수취인*', '{이름}'),
-    ColumnReplacer('우편번호*', '{우편번호}'),
-    ColumnReplacer('기본주소*', '{주소}'),
-    ColumnReplacer('문서제목', '{제목}'),
-    ColumnReplacer('비고', '{차량번호}, {비고}까지'),
-)
-# pdf_df를 windowed_envelope_df로 변환하는 mappings
-PDF_TO_WINDOWED_ENVELOPE_COLUMNS: Sequence[ColumnReplacer] = (
-    ColumnReplacer('제목', '{제목}'),
-    ColumnReplacer('우편번호', '{우편번호}'),
-    ColumnReplacer('주소', '{주소}'),
-    ColumnReplacer('이름', '{이름}'),
-    ColumnReplacer('비고', '{차량번호}, {비고}까지'),
-)
-
-# enis_df를 우편모아 df로 변환하는 mappings
-ENIS_TO_POSTMOA_NORMAL_MAIL_EXCEL_COLUMNS: Sequence[ColumnReplacer] = (
-    ColumnReplacer('수취인*', '{납부자명}'),
-    ColumnReplacer('우편번호*', '{납부자우편번호}'),
-    ColumnReplacer('기본주소*', '{납부자주소}'),
-    ColumnReplacer('비고', '{위반항목}, {차량번호}'),
-    ColumnReplacer('규격*', '규격'),
-    ColumnReplacer('통수*', '1'),
-    ColumnReplacer('중량*', '25'),
-)
-ENIS_TO_POSTMOA_REGISTERED_MAIL_EXCEL_COLUMNS: Sequence[ColumnReplacer] = (
-    ColumnReplacer('수취인*', '{납부자명}'),
-    ColumnReplacer('우편번호*', '{납부자우편번호}'),
-    ColumnReplacer('기본주소*', '{납부자주소}'),
-    ColumnReplacer('비고', '{위반항목}, {차량번호}'),
-    ColumnReplacer('규격*', '규격'),
-    ColumnReplacer('중량', '25'),
-    ColumnReplacer('수수료*', '보통'),
-    ColumnReplacer('환부*', '환부불능'),
-)
-ENIS_TO_POSTMOA_SELECTIVE_REGISTERED_MAIL_EXCEL_COLUMNS: Sequence[ColumnReplacer] = (
-    ColumnReplacer('수수료*', '보통'),
-    ColumnReplacer('규격*', '규격'),
-    ColumnReplacer('중량', '25'),
-    ColumnReplacer('수취인*', '{납부자명}'),
-    ColumnReplacer('우편번호*', '{납부자우편번호}'),
-    ColumnReplacer('기본주소*', '{납부자주소}'),
-    ColumnReplacer('비고', '{위반항목}, {차량번호}'),
-)
-
-# enis_df를 windowed_envelope_df로 변환하는 mappings
-ENIS_TO_WINDOWED_ENVELOPE_COLUMNS: Sequence[ColumnReplacer] = (
-    ColumnReplacer('제목', ''),
-    ColumnReplacer('우편번호', '{납부자우편번호}'),
-    ColumnReplacer('주소', '{납부자주소}'),
-    ColumnReplacer('이름', '{납부자명}'),
-    ColumnReplacer('비고', '{위반항목}, {차량번호}'),
-)
-
-NAME = re.compile(r'수신\s+(.+)(?=\s+귀하\s+\(우\d+\s+.+\)\n\(경유\))', re.DOTALL)  # 이름
-ZIPCODE = re.compile(r'수신\s+.+\s+귀하\s+\(우(\d+)\s+.+\)\n\(경유\)', re.DOTALL)  # zipcode
-ADDRESS = re.compile(r'수신\s+.+\s+귀하\s+\(우\d+\s+(.+)\)\n\(경유\)', re.DOTALL)  # 주소
-TITLE = re.compile(r'제목\s+(.+)')  # 제목
-BIKE_NUMBER = re.compile(r'(?<=차량번호).+\n(\w+\n?\w\d{4})', re.DOTALL)  # 이륜차번호
-DUE_DATE = re.compile(r'\n(\d+\.\d+\.\d+\.)')  # 제출기한
-
-
-def extract_pattern_from_pdf(pdf: pathlib.Path | str, pattern: re.Pattern) -> str:
-    pdf = pathlib.Path(pdf).resolve()
-
-    text = ''
-
-    for page in PdfReader(pdf).pages:
-        text += page.extract_text()
-
-    try:
-        ret = pattern.search(text).group(1)  # 첫번째 pattern
-    except AttributeError:
-        ret = ''
-
-    ret = ret.strip().replace('\n', '')
-    return ret
-
-
-def yyyymmdd_to_yyyy_mm_dd(date: str) -> str:
-    return str(arrow.get(date, 'YYYYMMDD').format('YYYY-MM-DD'))
-
-
-class Config:
-    def __init__(self, excel_left_top_cell='', excel_type='', mail_must_be_not_na='', kakaotalk_must_be_not_na=''):
-        self.excel_left_top_cell = excel_left_top_cell
-        self.excel_type = excel_type
-        self.mail_must_be_not_na = mail_must_be_not_na
-        self.kakaotalk_must_be_not_na = kakaotalk_must_be_not_na
-
-    def mail_must_be_not_na_columns(self) -> list[Any]:
-        return self.mail_must_be_not_na.strip().replace(' ', '').split(',')
-
-    def kakaotalk_must_be_not_na_columns(self) -> list[Any]:
-        return self.kakaotalk_must_be_not_na.strip().replace(' ', '').split(',')
-
-
-# 세외수입 config
-ENIS_CONFIG = Config(
-    excel_left_top_cell='$A$1',
-    excel_type='enis',
-)
-
-PDF_CONFIG = Config(
-    excel_type='pdf',
-)
+def display_lengths(display: np.ndarray) -> np.ndarray:
+    """표시 str의 글자 수, column 폭을 계산할 때 측정할 cell을 고르는 데 사용함"""
+    return np.char.str_len(display.astype(str)) if len(display) else np.empty(0, dtype=int)
 
 
 class DataFrameModel(QAbstractTableModel):
     def __init__(self, data: pd.DataFrame, parent=None):
+        """
+        table에 df를 보여주는 model
+
+        값은 column별 object array에 저장하고, paint할 때마다 str()을 호출하지 않도록
+        표시 str과 빈 cell mask도 column별 array로 미리 만들어 둠.
+        우편번호 검증 결과(set_issues)도 column별 array에 저장하고 tooltip으로 보여줌.
+        array는 여유 공간을 두고 두 배씩 늘리므로 row 추가가 전체 rebuild 없이 amortized O(1)임
+
+        :param data: 표시할 df, 편집된 결과는 dataframe()으로 얻음
+        :param parent:
+        """
         super().__init__(parent)
-        self._data = data
+        self._columns = data.columns
+        self._size = 0
 
-    def rowCount(self, parent: QModelIndex = ...) -> int:
-        ret = 0
-        try:
-            ret = self._data.shape[0]
-        except AttributeError:
-            ret = 0
+        self._values: list[np.ndarray] = [np.empty(0, dtype=object) for _ in self._columns]
+        self._display: list[np.ndarray] = [np.empty(0, dtype=object) for _ in self._columns]
+        self._missing: list[np.ndarray] = [np.empty(0, dtype=bool) for _ in self._columns]
+        self._lengths: list[np.ndarray] = [np.empty(0, dtype=int) for _ in self._columns]
+        self._issues: list[np.ndarray] = [np.empty(0, dtype=object) for _ in self._columns]
 
-        return ret
+        self._write_rows(0, data)
 
-    def columnCount(self, parent: QModelIndex = ...) -> int:
-        ret = 0
-        try:
-            ret = self._data.shape[1]
-        except AttributeError:
-            ret = 0
+        # dataframe()의 결과, row가 추가/삭제되면 None으로 바꾸고 필요할 때 다시 만듦
+        self._frame: pd.DataFrame | None = data
 
-        return ret
+    @property
+    def columns(self) -> pd.Index:
+        return self._columns
+
+    def dataframe(self) -> pd.DataFrame:
+        """
+        현재 table 내용을 df로 반환함. 마지막으로 row가 바뀐 뒤 처음 호출할 때만 새로 만듦
+
+        :return:
+        """
+        if self._frame is None:
+            frame = pd.DataFrame({column: values[:self._size] for column, values in enumerate(self._values)})
+            frame.columns = self._columns
+            self._frame = frame
+
+        return self._frame
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._values[0]) if self._values else size
+        if size <= capacity:
+            return
+
+        capacity = max(size, capacity * 2, 16)
+        for arrays, dtype in ((self._values, object), (self._display, object), (self._missing, bool),
+                              (self._lengths, int), (self._issues, object)):
+            for column, array in enumerate(arrays):
+                grown = np.empty(capacity, dtype=dtype)
+                grown[:self._size] = array[:self._size]
+                arrays[column] = grown
+
+    def _write_rows(self, row: int, rows: pd.DataFrame) -> None:
+        """rows를 row 위치에 끼워 넣음. 뒤의 row들은 밀림. begin/endInsertRows는 호출하는 쪽에서 함"""
+        count = len(rows)
+        if not count:
+            return
+
+        self._reserve(self._size + count)
+
+        for column, name in enumerate(self._columns):
+            if name in rows.columns:
+                values = rows[name].to_numpy()
+            else:
+                values = np.full(count, '', dtype=object)
+            display = display_strings(values)
+
+            for arrays, new in ((self._values, values), (self._display, display),
+                                (self._missing, missing_mask(values, display)),
+                                (self._lengths, display_lengths(display)),
+                                (self._issues, np.full(count, None, dtype=object))):
+                array = arrays[column]
+                array[row + count:self._size + count] = array[row:self._size]
+                array[row:row + count] = new
+
+        self._size += count
+
+    def insert_rows(self, row: int, rows: pd.DataFrame) -> None:
+        """
+        rows를 row 위치에 추가함. rows에 없는 column은 ''로 채움
+
+        :param row: 0 ~ rowCount()
+        :param rows: 추가할 df
+        :return:
+        """
+        if not len(rows):
+            return
+
+        self.beginInsertRows(QModelIndex(), row, row + len(rows) - 1)
+        self._write_rows(row, rows)
+        self._frame = None
+        self.endInsertRows()
+
+    def append_rows(self, rows: pd.DataFrame) -> None:
+        self.insert_rows(self._size, rows)
+
+    def remove_rows(self, row: int, count: int = 1) -> None:
+        if count <= 0 or row < 0 or row + count > self._size:
+            return
+
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        for arrays in (self._values, self._display, self._missing, self._lengths, self._issues):
+            for array in arrays:
+                array[row:self._size - count] = array[row + count:self._size]
+                array[self._size - count:self._size] = None if array.dtype == object else False
+        self._size -= count
+        self._frame = None
+        self.endRemoveRows()
+
+    def insertRows(self, row: int, count: int, parent: QModelIndex = QModelIndex()) -> bool:
+        # 빈 row를 추가함
+        self.insert_rows(row, pd.DataFrame(index=range(count)))
+        return True
+
+    def removeRows(self, row: int, count: int, parent: QModelIndex = QModelIndex()) -> bool:
+        self.remove_rows(row, count)
+        return True
+
+    def sample_strings(self, column: int,
+                       rows: int = COLUMN_SAMPLE_ROWS,
+                       longest: int = COLUMN_SAMPLE_LONGEST, ) -> list[str]:
+        """
+        column 폭 계산용으로 header, 앞쪽 rows개, 글자 수가 가장 긴 longest개의 표시 str을 반환함
+
+        :param column:
+        :param rows: 앞에서부터 측정할 row 수
+        :param longest: 글자 수 기준으로 가장 긴 cell 수
+        :return:
+        """
+        display = self._display[column][:self._size]
+        lengths = self._lengths[column][:self._size]
+
+        samples = [str(self._columns[column])] + list(display[:rows])
+        if self._size > rows and longest > 0:
+            count = min(longest, self._size)
+            samples.extend(display[np.argpartition(lengths, -count)[-count:]])
+
+        return samples
+
+    def column_values(self, column: int, row: int = 0, count: int | None = None) -> np.ndarray:
+        """
+        column의 row부터 count개 값, dataframe()을 만들지 않고 column array의 view를 반환함
+
+        :param column:
+        :param row: 첫 row
+        :param count: None이면 끝까지
+        :return: object array, 수정하지 말아야 함
+        """
+        stop = self._size if count is None else min(row + count, self._size)
+        return self._values[column][row:stop]
+
+    def has_missing(self, column: int) -> bool:
+        return bool(self._missing[column][:self._size].any())
+
+    def has_issues(self, column: int) -> bool:
+        return any(issue is not None for issue in self._issues[column][:self._size])
+
+    def set_issues(self, column: int, issues: np.ndarray, row: int = 0) -> None:
+        """
+        row부터 len(issues)개 cell의 검증 결과를 바꾼다. 결과가 있는 cell은 주황색 decoration과 tooltip이 표시됨
+
+        :param column:
+        :param issues: cell마다 문제를 설명하는 str 또는 None, ZipcodeIndex.validate()의 결과
+        :param row: 첫 row
+        :return:
+        """
+        if not len(issues):
+            return
+
+        self._issues[column][row:row + len(issues)] = issues
+        self.dataChanged.emit(self.index(row, column), self.index(row + len(issues) - 1, column),
+                              [Qt.ItemDataRole.DecorationRole, Qt.ItemDataRole.ToolTipRole])
+
+    def rowCount(self, parent: QModelIndex = ...) -> int:
+        return self._size
+
+    def columnCount(self, parent: QModelIndex = ...) -> int:
+        return len(self._columns)
 
     def data(self, index: QModelIndex, role: int = ...) -> Any:
         ret = None
         if role == Qt.ItemDataRole.DisplayRole or role == Qt.ItemDataRole.EditRole:
-            ret = self._data.iat[index.row(), index.column()]
-            ret = str(ret)
+            ret = self._display[index.column()][index.row()]
 
         if role == Qt.ItemDataRole.DecorationRole:
-            value = self._data.iat[index.row(), index.column()]
-            if not value or value == 'None':
-                ret = QColor('red')
+            if self._missing[index.column()][index.row()]:
+                ret = MISSING_COLOR
+            elif self._issues[index.column()][index.row()] is not None:
+                ret = INVALID_COLOR
+
+        if role == Qt.ItemDataRole.ToolTipRole:
+            ret = self._issues[index.column()][index.row()]
 
         return ret
 
     def setData(self, index: QModelIndex, value: Any, role: int = ...) -> bool:
         # https: // www.pythonguis.com / faq / qtableview - cell - edit /
         if role == Qt.ItemDataRole.EditRole:
-            self._data.iat[index.row(), index.column()] = value
+            row, column = index.row(), index.column()
+            self._values[column][row] = value
+
+            if self._frame is not None:
+                try:
+                    self._frame.iat[row, column] = value
+                except (TypeError, ValueError):  # column dtype에 맞지 않는 값이면 df를 다시 만듦
+                    self._frame = None
+
+            # 편집한 cell의 cache만 다시 계산함
+            values = np.array([value], dtype=object)
+            display = display_strings(values)
+            self._display[column][row] = display[0]
+            self._missing[column][row] = missing_mask(values, display)[0]
+            self._lengths[column][row] = len(display[0])
+
+            self.dataChanged.emit(index, index, [role, Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.DecorationRole])
             return True
 
         return False
@@ -294,9 +298,9 @@ class DataFrameModel(QAbstractTableModel):
         ret = None
         if role == Qt.ItemDataRole.DisplayRole:
             if orientation == Qt.Orientation.Horizontal:
-                ret = str(self._data.columns[section])
+                ret = str(self._columns[section])
             if orientation == Qt.Orientation.Vertical:
-                ret = str(self._data.index[section] + 1)
+                ret = str(section + 1)
 
         return ret
 
@@ -320,10 +324,18 @@ class MainWindow(QMainWindow):
 
         self.setCentralWidget(self.table)
 
-        self.data: pd.DataFrame = PDF_EMPTY_DATAFRAME.copy(deep=True)
-        self.model = None
+        self.model: DataFrameModel | None = None
+        self.column_schema = None  # 마지막으로 column 폭을 계산했을 때의 (columns, row가 있었는지)
+
+        # 우편번호와 주소를 검증하는 offline index, Build Zipcode Index로 만들기 전에는 None
+        self.zipcode_index = open_zipcode_index()
+
+        # session으로 저장할 원본 파일들, table이 마지막 autosave 이후에 바뀌었는지
+        self.sources: list[str] = []
+        self.session_dirty = False
 
-        self.set_table(self.data)
+        self.set_table(PDF_EMPTY_DATAFRAME.copy(deep=True))
+        self.session_dirty = False  # 빈 table로 이전 session을 덮어쓰지 않음
 
         # menu 추가
         menu_bar = self.menuBar()
@@ -338,6 +350,15 @@ class MainWindow(QMainWindow):
 
         file_menu.addAction(open_file_action)
 
+        ## open folder action 추가
+        open_folder_action = QAction('Open Folder', self)
+
+        open_folder_action.setShortcut('Ctrl+Shift+O')
+        open_folder_action.setStatusTip('Open all pdf files in a folder')
+        open_folder_action.triggered.connect(self.open_folder_dialog)
+
+        file_menu.addAction(open_folder_action)
+
         ## save to postmoa action 추가
         save_to_postmoa_action = QAction('Save to Postmoa Excel', self)
         file_menu.addAction(save_to_postmoa_action)
@@ -346,15 +367,143 @@ class MainWindow(QMainWindow):
         save_to_postmoa_action.setStatusTip('Save to PostMoa Excel')
         save_to_postmoa_action.triggered.connect(self.save_to_postmoa_dialog)
 
+        ## merge duplicate recipients action 추가, 체크되어 있으면 저장할 때 같은 수취인을 하나의 우편물로 합침
+        self.merge_duplicates_action = QAction('Merge Duplicate Recipients', self)
+        self.merge_duplicates_action.setCheckable(True)
+        file_menu.addAction(self.merge_duplicates_action)
+
+        self.merge_duplicates_action.setStatusTip('Merge rows with the same name, zipcode and address into one mail '
+                                                  'piece and save a report of what was merged')
+
+        ## build zipcode index action 추가
+        build_zipcode_index_action = QAction('Build Zipcode Index', self)
+        file_menu.addAction(build_zipcode_index_action)
+
+        build_zipcode_index_action.setStatusTip('Build the offline zipcode index from the post office zipcode DB '
+                                                'files (*.txt)')
+        build_zipcode_index_action.triggered.connect(self.build_zipcode_index_dialog)
+
+        ## restore session action 추가
+        restore_session_action = QAction('Restore Session', self)
+        file_menu.addAction(restore_session_action)
+
+        restore_session_action.setStatusTip('Restore the table saved when the app was last closed or autosaved')
+        restore_session_action.triggered.connect(self.restore_session_dialog)
+
+        ## cancel job action 추가
+        cancel_job_action = QAction('Cancel', self)
+        file_menu.addAction(cancel_job_action)
+
+        cancel_job_action.setShortcut('Esc')
+        cancel_job_action.setStatusTip('Cancel running job')
+        cancel_job_action.triggered.connect(self.cancel_jobs)
+
+        ## export trace action 추가
+        export_trace_action = QAction('Export Trace', self)
+        file_menu.addAction(export_trace_action)
+
+        export_trace_action.setShortcut('Ctrl+Shift+T')
+        export_trace_action.setStatusTip('Save stage timings as chrome trace json')
+        export_trace_action.triggered.connect(self.export_trace_dialog)
+
+        # job이 실행되는 동안 비활성화할 actions
+        self.job_actions = [open_file_action, open_folder_action, save_to_postmoa_action, build_zipcode_index_action,
+                            restore_session_action]
+
+        # background job
+        self.thread_pool = QThreadPool.globalInstance()
+        self.workers: list[Worker] = []
+
+        # job들의 단계별 시간, Export Trace로 저장함
+        self.tracer = Tracer()
+
+        # 같은 pdf를 다시 열면 parsing하지 않고 cache에서 읽음
+        self.record_cache = open_cache()
+
         # status bar
         self.set_status_bar('Ready')
 
         # config
         self.config = None  # 실제 config는 open_file_dialog()에서 결정함
 
+        # table이 바뀌었으면 주기적으로 background thread에서 session을 저장함
+        self.session_saver = SessionAutosaver()
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.timeout.connect(self.autosave_session)
+        self.autosave_timer.start(DEFAULT_AUTOSAVE_INTERVAL * 1000)
+
+        # window가 표시된 뒤에 이전 session을 복원할지 물어봄
+        QTimer.singleShot(0, self.offer_session_restore)
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """table에 표시된 df, row를 추가/삭제한 뒤에는 model에서 다시 만들어짐"""
+        return self.model.dataframe()
+
     def set_status_bar(self, text: str):
         self.statusBar().showMessage(text)
 
+    # background job 관련 methods 시작
+    def start_job(self, name: str, fn: Callable[..., Any], *args,
+                  on_finished: Callable[[Any], None] | None = None, **kwargs) -> Worker:
+        """
+        fn(context, *args, **kwargs)를 thread pool에서 실행한다
+
+        job이 실행되는 동안에는 table 편집과 open/save를 막아서 self.data가 바뀌지 않게 함
+
+        :param name: status bar에 표시할 job 이름
+        :param fn: 첫번째 argument로 JobContext를 받는 함수
+        :param on_finished: main thread에서 fn의 return value로 호출됨
+        :return:
+        """
+        worker = Worker(name, fn, *args, **kwargs)
+        worker.context.tracer = self.tracer
+
+        worker.signals.progress.connect(
+            lambda done, total, message: self.set_status_bar(f'{name}: {done}/{total} {message}'))
+        worker.signals.failed.connect(lambda error: self.on_job_failed(worker, error))
+        worker.signals.cancelled.connect(lambda: self.on_job_done(worker, f'{name} cancelled'))
+        worker.signals.finished.connect(lambda result: self.on_job_finished(worker, result, on_finished))
+
+        self.workers.append(worker)
+        self.set_busy(True)
+        self.set_status_bar(f'{name} started')
+
+        self.thread_pool.start(worker)
+        return worker
+
+    def set_busy(self, busy: bool):
+        for action in self.job_actions:
+            action.setEnabled(not busy)
+
+        self.table.setEnabled(not busy)
+
+    def cancel_jobs(self):
+        for worker in self.workers:
+            worker.cancel()
+
+        if self.workers:
+            self.set_status_bar('cancelling...')
+
+    def on_job_done(self, worker: Worker, text: str):
+        self.workers.remove(worker)
+        if not self.workers:
+            self.set_busy(False)
+
+        self.set_status_bar(text)
+
+    def on_job_finished(self, worker: Worker, result: Any, on_finished: Callable[[Any], None] | None):
+        self.on_job_done(worker, f'{worker.name} finished ({worker.duration:.2f}s)')
+
+        if on_finished is not None:
+            on_finished(result)
+
+    def on_job_failed(self, worker: Worker, error: str):
+        self.on_job_done(worker, f'{worker.name} failed')
+        QMessageBox.critical(self, f'{worker.name} failed', error)
+
+    # background job 관련 methods 끝
+
     def set_table(self, data: pd.DataFrame):
         """
         df를 받아서 table에 연결한다
@@ -362,25 +511,161 @@ class MainWindow(QMainWindow):
         :param data:
         :return:
         """
-        self.data = data
-        self.model = DataFrameModel(data)
-        self.table.setModel(self.model)
-        self.table.resizeColumnsToContents()
+        self.set_model(DataFrameModel(data))
 
         self.set_status_bar('table reset')
 
     def clear_table(self):
-        self.data = PDF_EMPTY_DATAFRAME.copy(deep=True)
-        self.model = DataFrameModel(self.data)
-        self.table.setModel(self.model)
-        self.table.resizeColumnsToContents()
+        self.set_model(DataFrameModel(PDF_EMPTY_DATAFRAME.copy(deep=True)))
+        self.sources = []
 
         self.set_status_bar('table cleared')
 
     def reset_table(self):
-        self.model = DataFrameModel(self.data)
+        self.set_model(DataFrameModel(self.data))
+
+    def set_model(self, model: DataFrameModel):
+        """model을 table에 연결하고, 우편번호를 검증한 뒤 column 폭을 맞춘다"""
+        self.model = model
+        self.model.dataChanged.connect(self.on_cell_edited)
+        self.model.rowsInserted.connect(self.mark_session_dirty)
+        self.model.rowsRemoved.connect(self.mark_session_dirty)
         self.table.setModel(self.model)
-        self.table.resizeColumnsToContents()
+        self.session_dirty = True
+
+        self.validate_zipcodes()
+        self.fit_columns()
+
+    # 우편번호 검증 관련 methods 시작
+    def zipcode_columns(self) -> tuple[int, int] | None:
+        """
+        table의 (우편번호, 주소) column 번호
+
+        :return: pdf나 세외수입 table이 아니면 None
+        """
+        for config in (PDF_CONFIG, ENIS_CONFIG):
+            _, zipcode, address = config.recipient_columns
+            if zipcode in self.model.columns and address in self.model.columns:
+                return self.model.columns.get_loc(zipcode), self.model.columns.get_loc(address)
+
+        return None
+
+    def validate_zipcodes(self, row: int = 0, count: int | None = None):
+        """
+        row부터 count개 row의 우편번호와 주소를 zipcode index로 한 번에 검증해서 table에 표시한다
+
+        :param row: 첫 row
+        :param count: None이면 끝까지
+        :return:
+        """
+        columns = self.zipcode_columns()
+        if self.zipcode_index is None or columns is None or not self.model.rowCount():
+            return
+
+        # self.data는 row가 바뀐 뒤에 전체 df를 다시 만들므로 model의 column array에서 필요한 row만 읽음
+        zipcode, address = columns
+        issues = self.zipcode_index.validate(pd.Series(self.model.column_values(zipcode, row, count), dtype=object),
+                                             pd.Series(self.model.column_values(address, row, count), dtype=object))
+        self.model.set_issues(zipcode, issues, row)
+
+        logger.debug('zipcode issues: %d / %d rows', sum(issue is not None for issue in issues), len(issues))
+
+    def on_cell_edited(self, top_left: QModelIndex, bottom_right: QModelIndex, roles: list[int]):
+        if Qt.ItemDataRole.EditRole in roles:
+            self.session_dirty = True
+
+        # 우편번호나 주소를 편집하면 그 row만 다시 검증함, set_issues()의 dataChanged에는 EditRole이 없음
+        columns = self.zipcode_columns()
+        if Qt.ItemDataRole.EditRole in roles and columns is not None and top_left.column() in columns:
+            self.validate_zipcodes(top_left.row(), bottom_right.row() - top_left.row() + 1)
+
+    def build_zipcode_index_dialog(self):
+        files, _ = QFileDialog.getOpenFileNames(self, 'Open Zipcode DB', filter='Zipcode DB (*.txt);;All Files (*)')
+        if not files:
+            return
+
+        self.start_job('zipcode index', lambda context: build_zipcode_index(files),
+                       on_finished=self.on_zipcode_index_built)
+
+    def on_zipcode_index_built(self, meta: dict):
+        self.zipcode_index = open_zipcode_index()
+        self.validate_zipcodes()
+        self.fit_columns(force=True)
+
+        self.set_status_bar(f"zipcode index built ({meta['zipcodes']} zipcodes, {meta['road_keys']} road addresses)")
+
+    # 우편번호 검증 관련 methods 끝
+
+    # session 관련 methods 시작
+    def mark_session_dirty(self, *args):
+        self.session_dirty = True
+
+    def autosave_session(self):
+        """table이 바뀌었으면 복사본을 background thread에 넘겨서 저장함"""
+        if not self.session_dirty:
+            return
+
+        self.session_dirty = False
+        self.session_saver.submit(self.data.copy(deep=True), self.config, self.sources)
+
+    def offer_session_restore(self):
+        session = load_session()
+        if session is None or not len(session.data):
+            return
+
+        reply = QMessageBox.question(
+            self,
+            'Restore Session',
+            f'Restore the table saved at {session.saved} ({len(session.data)} rows)?',
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.Yes
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            self.restore_session(session)
+
+    def restore_session_dialog(self):
+        session = load_session()
+        if session is None:
+            self.set_status_bar('no saved session')
+            return
+
+        self.restore_session(session)
+
+    def restore_session(self, session: Session):
+        self.set_table(session.data)
+        self.config = session.config
+        self.sources = session.sources
+        self.session_dirty = False  # 저장된 session과 같음
+
+        self.set_status_bar(f'{len(session.data)} rows restored from session saved at {session.saved}')
+
+    # session 관련 methods 끝
+
+    def fit_columns(self, force: bool = False):
+        """
+        column 폭을 내용에 맞춘다
+
+        resizeColumnsToContents()는 모든 cell을 측정해서 큰 table에서는 몇 초씩 걸리므로
+        model.sample_strings()로 고른 cell만 측정함.
+        column이 바뀌었거나 table이 비어있다가 row가 생겼을 때만 계산하고, 그 외에는 사용자가 바꾼 폭을 유지함
+
+        :param force: True면 schema가 같아도 다시 계산함
+        :return:
+        """
+        schema = (tuple(self.model.columns), self.model.rowCount() > 0)
+        if not force and schema == self.column_schema:
+            return
+        self.column_schema = schema
+
+        metrics = self.table.fontMetrics()
+        icon_width = self.table.style().pixelMetric(QStyle.PixelMetric.PM_SmallIconSize) + 4
+
+        for column in range(self.model.columnCount()):
+            width = max(metrics.horizontalAdvance(text) for text in self.model.sample_strings(column))
+            if self.model.has_missing(column) or self.model.has_issues(column):  # 빨간색, 주황색 decoration이 그려짐
+                width += icon_width
+
+            self.table.setColumnWidth(column, min(width + COLUMN_PADDING, COLUMN_MAX_WIDTH))
 
     def closeEvent(self, event):
         # Alternative to "QMessageBox.Yes" for PyQt6
@@ -393,277 +678,141 @@ class MainWindow(QMainWindow):
             QMessageBox.StandardButton.No
         )
         if reply == QMessageBox.StandardButton.Yes:
+            self.cancel_jobs()
+            self.thread_pool.waitForDone()
+
+            # 마지막 편집까지 저장하고 종료함
+            self.autosave_session()
+            self.session_saver.close()
             event.accept()
         else:
             event.ignore()
 
-    @staticmethod
-    def convert_drm_excel_to_df(excel: pathlib.Path | str, config: Any) -> pd.DataFrame:
-        excel = pathlib.Path(excel)
-
-        with xw.App(visible=False) as app:
-            wb = app.books.open(excel)
-            sheet = wb.sheets[0]
-
-            # https://docs.xlwings.org/en/stable/converters.html#converters-and-options
-            df = sheet.range(config.excel_left_top_cell, sheet.used_range.last_cell).options(pd.DataFrame,
-                                                                                             header=True,
-                                                                                             index=False, ).value
-            df.rename(columns=lambda col: col.replace('\n', '').replace(' ', '').replace('/', ''), inplace=True)
-
-            wb.close()
-
-        # print(f'convert_drm_excel_to_df called: {df=}')
-        return df
-
     def open_file_dialog(self):
-        file, filter_used = QFileDialog.getOpenFileName(parent=self,
-                                                        caption='open file',
-                                                        directory=r'c:\Users\User\Desktop\작업용 임시 폴더',
-                                                        filter=';;'.join(FILTERS),
-                                                        initialFilter=FILTERS[1])  # default는 pdf!!!
+        files, filter_used = QFileDialog.getOpenFileNames(parent=self,
+                                                          caption='open file',
+                                                          directory=r'c:\Users\User\Desktop\작업용 임시 폴더',
+                                                          filter=';;'.join(FILTERS),
+                                                          initialFilter=FILTERS[1])  # default는 pdf!!!
 
-        file = pathlib.Path(file).resolve()
+        files = [pathlib.Path(file).resolve() for file in files]
+        if not files:
+            return
 
-        match file.suffix:
+        match files[0].suffix:
             case '.pdf':
-                title = extract_pattern_from_pdf(file, TITLE)
-                zipcode = extract_pattern_from_pdf(file, ZIPCODE)
-                name = extract_pattern_from_pdf(file, NAME)
-                address = extract_pattern_from_pdf(file, ADDRESS)
-                bike_number = extract_pattern_from_pdf(file, BIKE_NUMBER)
-                due_date = extract_pattern_from_pdf(file, DUE_DATE)
-
-                self.data.loc[len(self.data)] = [name, zipcode, address, title, bike_number, due_date]
-                self.reset_table()
-                self.config = PDF_CONFIG
+                self.import_pdfs(files)
 
             case '.xlsx' | '.xls':
-                self.data = self.convert_drm_excel_to_df(file, ENIS_CONFIG)
-                self.reset_table()
-                self.config = ENIS_CONFIG
+                self.start_job('excel import',
+                               lambda context: read_enis_excel(files[0], ENIS_CONFIG),
+                               on_finished=lambda data: self.on_excel_imported(data, files[0]))
 
             case _:
                 pass
 
-    def save_to_postmoa_dialog(self):
-        directory = QFileDialog.getExistingDirectory(self, 'Save PostMoa Directory',
+    def open_folder_dialog(self):
+        directory = QFileDialog.getExistingDirectory(self, 'Open PDF Directory',
                                                      directory=r'c:\Users\User\Desktop\작업용 임시 폴더',
                                                      options=QFileDialog.Option.ShowDirsOnly)
+        if directory:
+            self.import_pdfs([directory])
 
-        directory = pathlib.Path(directory)
-        save_to_postmoa_normal_mail_path = directory / '{datetime}_일반우편.xls'.format(
-            datetime=arrow.now().format('YYYY-MM-DD HHmmss'))
-        save_to_postmoa_registered_mail_path = directory / '{datetime}_등기우편.xls'.format(
-            datetime=arrow.now().format('YYYY-MM-DD HHmmss'))
-        save_to_postmoa_selective_registered_mail_path = directory / '{datetime}_선택등기우편.xls'.format(
-            datetime=arrow.now().format('YYYY-MM-DD HHmmss'))
-        save_to_windowed_envelop_pdf_path = directory / '{datetime}_창봉투_주소.pdf'.format(
-            datetime=arrow.now().format('YYYY-MM-DD HHmmss'))
-
-        match self.config.excel_type:
-            case 'pdf':
-                self.save_to_postmoa_excel(save_to_postmoa_normal_mail_path,
-                                           NORMAL_MAIL_EMPTY_DATAFRAME.copy(deep=True),
-                                           PDF_TO_POSTMOA_NORMAL_MAIL_EXCEL_COLUMNS)
-                self.save_to_postmoa_excel(save_to_postmoa_registered_mail_path,
-                                           REGISTERED_MAIL_EMPTY_DATAFRAME.copy(deep=True),
-                                           PDF_TO_POSTMOA_REGISTERED_MAIL_EXCEL_COLUMNS)
-                self.save_to_postmoa_excel(save_to_postmoa_selective_registered_mail_path,
-                                           SELECTIVE_REGISTERED_MAIL_EMPTY_DATAFRAME.copy(deep=True),
-                                           PDF_TO_POSTMOA_SELECTIVE_REGISTERED_MAIL_EXCEL_COLUMNS)
-                self.save_to_windowed_envelope_order_address_only_pdf(save_to_windowed_envelop_pdf_path,
-                                                                      PDF_EMPTY_DATAFRAME.copy(deep=True),
-                                                                      PDF_TO_WINDOWED_ENVELOPE_COLUMNS)
-
-            case 'enis':
-                self.save_to_postmoa_excel(save_to_postmoa_normal_mail_path,
-                                           NORMAL_MAIL_EMPTY_DATAFRAME.copy(deep=True),
-                                           ENIS_TO_POSTMOA_NORMAL_MAIL_EXCEL_COLUMNS)
-                self.save_to_postmoa_excel(save_to_postmoa_registered_mail_path,
-                                           REGISTERED_MAIL_EMPTY_DATAFRAME.copy(deep=True).copy(deep=True),
-                                           ENIS_TO_POSTMOA_REGISTERED_MAIL_EXCEL_COLUMNS)
-                self.save_to_postmoa_excel(save_to_postmoa_selective_registered_mail_path,
-                                           SELECTIVE_REGISTERED_MAIL_EMPTY_DATAFRAME.copy(deep=True),
-                                           ENIS_TO_POSTMOA_SELECTIVE_REGISTERED_MAIL_EXCEL_COLUMNS)
-
-                self.save_to_windowed_envelope_order_address_only_pdf(save_to_windowed_envelop_pdf_path,
-                                                                      PDF_EMPTY_DATAFRAME.copy(deep=True),
-                                                                      ENIS_TO_WINDOWED_ENVELOPE_COLUMNS)
-
-    def save_to_postmoa_excel(self, target: pathlib.Path | str, target_df: pd.DataFrame,
-                              columns: Sequence[ColumnReplacer]):
-        if any(self.data):
-            # replacer가 있으면 replacer가 적용된 text 입력
-            for column in columns:
-                if column.replacer:
-                    column.replace(target_df, self.data)
-
-            target_df.to_excel(target, index=False)
-            self.save_to_xls(target)
-
-    @staticmethod
-    def save_to_xls(xlsx: str | pathlib.Path) -> str:
+    def import_pdfs(self, paths: list[pathlib.Path | str]):
         """
-        df.to_excel()이 xlsx만 지원해서
-        일단 xlsx로 저장하고 xls로 다시 바꾸는 method를 작성함
+        pdf 파일이나 폴더를 받아서 process pool에서 추출하고, 결과를 한 번에 table에 추가한다
 
-        :param xlsx:
+        :param paths: pdf 파일 또는 폴더
         :return:
         """
-        if isinstance(xlsx, str):
-            xlsx = pathlib.Path(xlsx)
+        pdfs = collect_pdfs(paths)
+
+        # 세외수입 table과는 column이 달라서 이어 붙일 수 없으므로 교체할지 먼저 물어봄
+        if self.model.rowCount() and not self.model.columns.equals(PDF_EMPTY_DATAFRAME.columns):
+            reply = QMessageBox.question(
+                self,
+                'Replace Table',
+                'The table has rows that are not from pdf files. Replace them with the imported pdf files?',
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+
+        self.start_job('pdf import',
+                       lambda context: extract_pdfs(pdfs,
+                                                    progress=context.progress,
+                                                    is_cancelled=context.is_cancelled,
+                                                    cache=self.record_cache),
+                       on_finished=lambda result: self.on_pdfs_imported(result, len(pdfs)))
+
+    def on_pdfs_imported(self, result: BatchResult, total: int):
+        columns = PDF_EMPTY_DATAFRAME.columns
+        rows = pd.DataFrame(result.rows(list(columns)), columns=columns)
+
+        if self.model.columns.equals(columns):
+            first = self.model.rowCount()
+            self.model.append_rows(rows)  # 이미 있는 pdf row들 뒤에 추가함, model은 그대로 사용
+            self.validate_zipcodes(first)
+            self.fit_columns()
+        else:
+            # 다른 column의 table(세외수입)은 import_pdfs에서 확인을 받았으므로 이어 붙이지 않고 교체함
+            self.set_table(rows)
+            self.sources = []
+        self.config = PDF_CONFIG
+        self.sources.extend(str(record.pdf) for record in result.records)
 
-        excel_app = win32.gencache.EnsureDispatch('Excel.Application')
-        wb = excel_app.Workbooks.Open(xlsx)
+        cached = sum(record.cached for record in result.records)
+        self.set_status_bar(f'{len(result.records)} / {total} pdf imported ({cached} from cache)')
 
-        xls = xlsx.with_suffix('.xls')
-        xls = str(xls)
+        if result.failures:
+            QMessageBox.warning(self, 'Import Failures',
+                                '\n'.join(f'{failure.pdf.name}: {failure.error}' for failure in result.failures))
 
-        # https://stackoverflow.com/questions/42182126/suppress-save-as-prompt
-        excel_app.DisplayAlerts = False
+    def on_excel_imported(self, data: pd.DataFrame, source: pathlib.Path):
+        self.set_table(data)
+        self.config = ENIS_CONFIG
+        self.sources = [str(source)]
 
-        wb.SaveAs(xls, FileFormat=56)  # 56은 .xls
-        wb.Close()
-        # excel_app.Quit()
+        self.set_status_bar(f'{len(data)} rows imported')
 
-        excel_app.DisplayAlerts = True
+    def export_trace_dialog(self):
+        target, _ = QFileDialog.getSaveFileName(self, 'Export Trace', 'trace.json', 'Chrome Trace (*.json)')
+        if not target:
+            return
 
-        return xls
+        self.tracer.export(target)
+        self.set_status_bar(f'trace exported to {target} ({format_timings(self.tracer.totals())})')
 
-    # 여기부터 reportlab 관련 methods
-    @staticmethod
-    def draw_text_to_pdf(canvas: Canvas,
-                         text: str,
-                         horizontal_offset: int,
-                         vertical_offset: int,
-                         max_text_length: int,
-                         row_gap: int,
-                         font: str,
-                         font_size: int, ):
-        """
+    def save_to_postmoa_dialog(self):
+        directory = QFileDialog.getExistingDirectory(self, 'Save PostMoa Directory',
+                                                     directory=r'c:\Users\User\Desktop\작업용 임시 폴더',
+                                                     options=QFileDialog.Option.ShowDirsOnly)
 
-        :param canvas: 추가할 pdf canvas object
-        :param text: 추가할 str
-        :param horizontal_offset: text box의 left coordinate(from left to right) in mm
-        :param vertical_offset: text box의 top coordinate(from bottom to top) in mm
-        :param max_text_length: 한 줄에 출력할 수 있는 글자 수
-        :param row_gap: 줄 사이 간격 in mm
-        :param font: pdfmetrics.registerFont로 추가된 폰트의 str
-        :param font_size: 폰트 크기 in pt
-        :return:
-        """
-        canvas.setFont(font, font_size)
-
-        # "\n".join(wrap(text, ...)) == textwrap.fill(text,...)
-        wrapped_text_rows = textwrap.wrap(str(text), max_text_length)
-        print(wrapped_text_rows)
-
-        for i, row in enumerate(wrapped_text_rows):
-            row_horizontal_offset_in_pt = horizontal_offset * mm
-            row_vertical_offset_in_pt = (vertical_offset * mm) - (font_size + (row_gap * mm)) * i
-
-            canvas.drawString(row_horizontal_offset_in_pt, row_vertical_offset_in_pt, row)
-
-    @staticmethod
-    def draw_text_body_to_pdf(canvas: Canvas,
-                              text: str,
-                              horizontal_offset: int,
-                              vertical_offset: int,
-                              max_text_length: int,
-                              row_gap: int,
-                              font: str,
-                              font_size: int, ):
-        """
-        body에 다른 textwrap을 적용함
-
-        :param canvas: 추가할 pdf canvas object
-        :param text: 추가할 str
-        :param horizontal_offset: text box의 left coordinate(from left to right) in mm
-        :param vertical_offset: text box의 top coordinate(from bottom to top) in mm
-        :param max_text_length: 한 줄에 출력할 수 있는 글자 수
-        :param row_gap: 줄 사이 간격 in mm
-        :param font: pdfmetrics.registerFont로 추가된 폰트의 str
-        :param font_size: 폰트 크기 in pt
-        :return:
-        """
-        canvas.setFont(font, font_size)
+        if not directory or self.config is None:
+            return
 
-        # "\n".join(wrap(text, ...)) == textwrap.fill(text,...)
-        body_wrapper = BodyWrapper(width=max_text_length, replace_whitespace=False)
-        body_wrapped = body_wrapper.wrap(text=text)
-        print(body_wrapped)
+        import arrow
 
-        for i, row in enumerate(body_wrapped):
-            row_horizontal_offset_in_pt = horizontal_offset * mm
-            row_vertical_offset_in_pt = (vertical_offset * mm) - (font_size + (row_gap * mm)) * i
+        paths = output_paths(directory, arrow.now().format('YYYY-MM-DD HHmmss'),
+                             dedup=self.merge_duplicates_action.isChecked())
 
-            canvas.drawString(row_horizontal_offset_in_pt, row_vertical_offset_in_pt, row)
+        self.start_job('save', self.save_to_postmoa, self.data, self.config, paths,
+                       on_finished=lambda timings: self.set_status_bar(
+                           f'saved to {directory} ({format_timings(timings)}, total {sum(timings.values()):.2f}s)'))
 
-    @staticmethod
-    def draw_line_to_pdf(canvas: Canvas,
-                         x1: int, y1: int, x2: int, y2: int):
+    def save_to_postmoa(self, context: JobContext, data: pd.DataFrame, config: Config,
+                        paths: dict[str, pathlib.Path]):
         """
-        (x1, y1)에서 (x2, y2)까지 line 그리기
-        :param canvas:
-        :param x1: in mm
-        :param y1: in mm
-        :param x2: in mm
-        :param y2: in mm
-        :return:
-        """
-        canvas.line(x1 * mm, y1 * mm, x2 * mm, y2 * mm)
-
-    def save_to_windowed_envelope_order_address_only_pdf(self, target: pathlib.Path | str,
-                                                         target_df: pd.DataFrame,
-                                                         columns: Sequence[ColumnReplacer]):
-        print(f'save_to_windowed_envelope_order_pdf: {target}')
-
-        max_text_length = 35
-        max_body_text_length = 42
-
-        if any(self.data):
-            # replacer가 있으면 replacer가 적용된 text 입력
-            for column in columns:
-                if column.replacer:
-                    column.replace(target_df, self.data)
-
-        target = pathlib.Path(target)
-        windowed_envelope_pdf = Canvas(filename=str(target), pagesize=A4)
-
-        for record in target_df.to_dict('records'):
-
-            name = record.get('이름', '')
-            zipcode = record.get('우편번호', '')
-            address = record.get('주소', '')
-            title = record.get('제목', '')
-            bike_number = record.get('차량번호', '')
-            info = record.get('비고', '')
+        우편모아 엑셀들과 창봉투 pdf를 저장한다. background job으로 실행됨
 
-            # 주소
-            self.draw_text_to_pdf(windowed_envelope_pdf, address, 85, 244, max_text_length, 2, "맑은고딕", 10)
-
-            # 이름
-            self.draw_text_to_pdf(windowed_envelope_pdf, name, 85, 230, max_text_length, 2, "맑은고딕-bold", 10)
-
-            # 우편번호
-            character_gap: int = 6
-            for i, z in enumerate(zipcode):
-                self.draw_text_to_pdf(windowed_envelope_pdf, z, 135 + (character_gap * i), 225, max_text_length, 2,
-                                      "맑은고딕", 10)
-
-            windowed_envelope_pdf.showPage()  # 한 페이지 앞면 완성
-
-            # 뒷 페이지 perforated line
-            self.draw_line_to_pdf(windowed_envelope_pdf, 0, 204, A4_width_in_mm, 204)
-            self.draw_line_to_pdf(windowed_envelope_pdf, 0, 110, A4_width_in_mm, 110)
-            self.draw_line_to_pdf(windowed_envelope_pdf, 0, 17, A4_width_in_mm, 17)
-
-            windowed_envelope_pdf.showPage()  # 한 페이지 뒷면 완성
-
-        windowed_envelope_pdf.save()  # 전체 pdf 닫기
-
-    # reportlab method 끝
+        :param context: progress 보고와 cancel 확인용
+        :param data: main thread에서 얻은 self.data
+        :param config: data가 어디서 왔는지
+        :param paths: MappingPlan의 출력 이름 -> 저장 경로
+        :return: 단계 이름 -> 걸린 시간 in sec
+        """
+        return save_outputs(data, config, paths, context)
 
     # context menu 관련 methods 시작
     def contextMenuEvent(self, event: QContextMenuEvent):
@@ -682,26 +831,35 @@ class MainWindow(QMainWindow):
         """
         context_menu = QMenu(self)
         add_row_action = context_menu.addAction('Add row')
+        delete_row_action = context_menu.addAction('Delete row')
 
         index = self.table.indexAt(event.pos())
-        # print(f'{index.row()=}, {index.column()=}')
 
         self.set_status_bar(f'context menu called: ({index.row()}, {index.column()})')
 
         action = context_menu.exec(self.mapToGlobal(event.pos()))
         if action == add_row_action:
             self.add_row()
+        if action == delete_row_action:
+            self.delete_row()
 
     def add_row(self):
-        records = self.data.to_dict('records')
-        records.append({column: '' for column in self.data.columns})
-        self.data = pd.DataFrame.from_records(records)
-        self.reset_table()
+        self.model.insertRows(self.model.rowCount(), 1)
+        self.table.scrollToBottom()
+
+    def delete_row(self):
+        # 선택된 cell의 row를 삭제함
+        index = self.table.currentIndex()
+        if index.isValid():
+            self.model.removeRows(index.row(), 1)
 
     # context menu 관련 methods 끝
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # pyinstaller로 묶었을 때 process pool을 쓰기 위해 필요함
+    configure_logging()  # FILE_TO_POSTMOA_LOG_LEVEL, FILE_TO_POSTMOA_LOG_FILE 환경 변수로 켬
+
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -0,0 +1,336 @@
+import pathlib
+import re
+import time
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+# pdf page의 영역 (x0, y0, x1, y1), 단위는 pt(1/72 inch)이고 원점은 page 왼쪽 아래
+Region = tuple[float, float, float, float]
+
+# 공문 pdf에서 추출할 patterns
+NAME = re.compile(r'수신\s+(.+)(?=\s+귀하\s+\(우\d+\s+.+\)\n\(경유\))', re.DOTALL)  # 이름
+ZIPCODE = re.compile(r'수신\s+.+\s+귀하\s+\(우(\d+)\s+.+\)\n\(경유\)', re.DOTALL)  # zipcode
+ADDRESS = re.compile(r'수신\s+.+\s+귀하\s+\(우\d+\s+(.+)\)\n\(경유\)', re.DOTALL)  # 주소
+TITLE = re.compile(r'제목\s+(.+)')  # 제목
+BIKE_NUMBER = re.compile(r'(?<=차량번호).+\n(\w+\n?\w\d{4})', re.DOTALL)  # 이륜차번호
+DUE_DATE = re.compile(r'\n(\d+\.\d+\.\d+\.)')  # 제출기한
+
+# 화면 table의 column 이름 -> pattern
+# 순서는 PDF_EMPTY_DATAFRAME의 column 순서와 같음
+PDF_FIELD_PATTERNS: dict[str, re.Pattern] = {
+    '이름': NAME,
+    '우편번호': ZIPCODE,
+    '주소': ADDRESS,
+    '제목': TITLE,
+    '차량번호': BIKE_NUMBER,
+    '비고': DUE_DATE,  # 제출기한은 비고 column에 넣음
+}
+
+
+# 수신 block parser에서 사용하는 patterns, 모두 위치를 지정해서 match하고 중첩된 반복이 없음
+RECEIVER = re.compile(r'수신\s')
+RECEIVER_END = ')\n(경유)'
+HONORIFIC = '귀하'
+ZIPCODE_PREFIX = re.compile(r'\s+\(우(\d+)\s+')
+
+# 수신 block parser가 NAME, ZIPCODE, ADDRESS 대신 값을 찾음
+RECIPIENT_GROUPS: dict[re.Pattern, int] = {
+    NAME: 0,
+    ZIPCODE: 1,
+    ADDRESS: 2,
+}
+
+
+def parse_recipient(text: str) -> tuple[str, str, str] | None:
+    """
+    '수신 {이름} 귀하 (우{우편번호} {주소})\n(경유)' block에서 이름, 우편번호, 주소를 한 번에 찾는다
+
+    NAME, ZIPCODE, ADDRESS는 각각 text 전체에 greedy .+와 lookahead를 적용해서 backtracking이 많음.
+    같은 결과가 나오도록 greedy .+가 고르는 위치를 직접 찾음
+    - 주소는 마지막 ')\n(경유)'까지
+    - 이름은 그 앞의 마지막 '귀하 (우NNNNN '까지
+    - 이름은 그 앞의 첫번째 '수신' 다음부터
+
+    str.find/rfind와 위치를 지정한 match만 사용하므로 text 길이에 대해 선형 시간임
+
+    :param text: pdf에서 추출한 text
+    :return: (이름, 우편번호, 주소) group, search_pattern처럼 정리하지 않은 값. 찾지 못하면 None
+    """
+    receiver = RECEIVER.search(text)
+    if receiver is None:
+        return None
+
+    end = text.rfind(RECEIVER_END)
+    if end < 0:
+        return None
+
+    # '수신' 다음의 공백을 건너뛴 위치가 이름의 시작
+    name_start = receiver.end()
+    while name_start < len(text) and text[name_start].isspace():
+        name_start += 1
+
+    # '수신' + 공백 + 이름 1글자 이상 + 공백 + '귀하'
+    first_honorific = receiver.start() + len('수신') + 3
+
+    honorific = text.rfind(HONORIFIC, 0, end)
+    while honorific >= first_honorific:
+        # 귀하 + 공백 + (우 + 숫자 + 공백 + 주소 1글자 이상
+        prefix = ZIPCODE_PREFIX.match(text, honorific + len(HONORIFIC))
+        if text[honorific - 1].isspace() and prefix is not None and prefix.end() <= end:
+            address_start = prefix.end()
+            if address_start == end:
+                if prefix.group(0)[-2:].isspace():  # 공백 1개를 주소로 사용하는 경우
+                    address_start -= 1
+                else:
+                    honorific = text.rfind(HONORIFIC, 0, honorific)
+                    continue
+
+            # 이름이 공백뿐이면 regex는 공백 1개를 이름으로 사용함
+            name = text[min(name_start, honorific - 2):honorific - 1]
+            return name, prefix.group(1), text[address_start:end]
+
+        honorific = text.rfind(HONORIFIC, 0, honorific)
+
+    return None
+
+
+def extract_text_from_pdf(pdf: pathlib.Path | str) -> str:
+    """
+    pdf의 모든 page의 text를 이어 붙여서 반환한다
+
+    :param pdf: pdf 경로
+    :return: 전체 text
+    """
+    from pypdf import PdfReader  # pypdf는 import가 무거워서 필요할 때 import 함
+
+    text = ''
+
+    for page in PdfReader(pdf).pages:
+        text += page.extract_text()
+
+    return text
+
+
+def extract_page_text(page: Any, regions: Sequence[Region] | None = None) -> str:
+    """
+    page 하나의 text를 추출한다
+
+    regions가 있으면 pypdf visitor로 받은 text 조각 중 시작 위치가 regions 안에 있는 것만 이어 붙임.
+    조각들을 모두 이어 붙이면 extract_text()의 결과와 같으므로, page 전체를 region으로 주면 결과가 같음
+
+    :param page: pypdf PageObject
+    :param regions: 추출할 영역들, None이면 page 전체
+    :return:
+    """
+    if regions is None:
+        return page.extract_text()
+
+    parts = []
+
+    def visitor(text: str, cm: list[float], tm: list[float], font_dict: Any, font_size: float) -> None:
+        if not text:
+            return
+
+        # text matrix를 current transformation matrix로 변환한 위치
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+        if any(x0 <= x <= x1 and y0 <= y <= y1 for x0, y0, x1, y1 in regions):
+            parts.append(text)
+
+    page.extract_text(visitor_text=visitor)
+    return ''.join(parts)
+
+
+def iter_page_texts(pdf: pathlib.Path | str, regions: Sequence[Region] | None = None) -> Iterator[str]:
+    """
+    page를 앞에서부터 하나씩 읽어서 text를 반환한다. 다음 page는 요청할 때 parsing 함
+
+    :param pdf: pdf 경로
+    :param regions: extract_page_text()의 regions
+    :return:
+    """
+    from pypdf import PdfReader
+
+    for page in PdfReader(pdf).pages:
+        yield extract_page_text(page, regions)
+
+
+def search_pattern(text: str, pattern: re.Pattern) -> str:
+    """
+    text에서 pattern의 첫번째 group을 찾는다. 찾지 못하면 ''을 반환한다
+
+    :param text: pdf에서 추출한 text
+    :param pattern: 찾을 pattern
+    :return: 줄바꿈을 제거한 첫번째 group
+    """
+    try:
+        ret = pattern.search(text).group(1)  # 첫번째 pattern
+    except AttributeError:
+        ret = ''
+
+    ret = ret.strip().replace('\n', '')
+    return ret
+
+
+def extract_pattern_from_pdf(pdf: pathlib.Path | str, pattern: re.Pattern) -> str:
+    pdf = pathlib.Path(pdf).resolve()
+
+    return search_pattern(extract_text_from_pdf(pdf), pattern)
+
+
+def pattern_version(patterns: dict[str, re.Pattern]) -> str:
+    """
+    pattern이 바뀌면 달라지는 version. 예전 pattern으로 추출한 cache를 쓰지 않기 위해 사용함
+
+    :param patterns: column 이름 -> pattern
+    :return: sha256 hex 앞 16자리
+    """
+    import hashlib
+
+    text = '\n'.join(f'{column}\t{pattern.pattern}\t{pattern.flags}' for column, pattern in patterns.items())
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+class PdfRecord:
+    def __init__(self,
+                 pdf: pathlib.Path,
+                 fields: dict[str, str],
+                 field_timings: dict[str, float],
+                 text_extraction_time: float,
+                 total_time: float,
+                 cached: bool = False,
+                 pages: int = 0, ) -> None:
+        """
+        pdf 하나에서 추출한 결과
+
+        :param pdf: pdf 경로
+        :param fields: column 이름 -> 추출된 값
+        :param field_timings: column 이름 -> pattern 검색에 걸린 시간 in sec
+        :param text_extraction_time: pdf를 읽고 text를 추출하는데 걸린 시간 in sec
+        :param total_time: 전체 걸린 시간 in sec
+        :param cached: cache에서 읽은 record인지, timings는 처음 추출했을 때의 값
+        :param pages: text를 추출한 page 수
+        """
+        self.pdf = pdf
+        self.fields = fields
+        self.field_timings = field_timings
+        self.text_extraction_time = text_extraction_time
+        self.total_time = total_time
+        self.cached = cached
+        self.pages = pages
+
+    def values(self, columns: list[str] | None = None) -> list[str]:
+        """
+        columns 순서대로 값을 반환한다. self.data.loc[...]에 한 row로 넣을 때 사용함
+
+        :param columns: column 이름들, None이면 추출한 순서대로
+        :return:
+        """
+        if columns is None:
+            return list(self.fields.values())
+
+        return [self.fields.get(column, '') for column in columns]
+
+    def to_dict(self) -> dict:
+        return {
+            'fields': self.fields,
+            'field_timings': self.field_timings,
+            'text_extraction_time': self.text_extraction_time,
+            'total_time': self.total_time,
+            'pages': self.pages,
+        }
+
+    @classmethod
+    def from_dict(cls, pdf: pathlib.Path, data: dict, cached: bool = False) -> 'PdfRecord':
+        return cls(pdf, data['fields'], data['field_timings'], data['text_extraction_time'], data['total_time'],
+                   cached, data.get('pages', 0))
+
+    def __repr__(self) -> str:
+        return f'PdfRecord({self.pdf.name!r}, {self.fields!r}, total_time={self.total_time:.3f})'
+
+
+class PdfExtractor:
+    def __init__(self,
+                 patterns: dict[str, re.Pattern] | None = None,
+                 lazy: bool = False,
+                 regions: Sequence[Region] | None = None, ) -> None:
+        """
+        pdf를 한 번만 읽고, 추출한 text에 모든 pattern을 적용한다
+
+        lazy면 page를 하나씩 읽다가 모든 field를 찾으면 나머지 page(붙임 문서 등)는 읽지 않음.
+        greedy pattern(주소, 차량번호)은 뒤 page에 같은 형식의 text가 있으면 전체를 읽을 때와 결과가 다를 수 있음
+
+        :param patterns: column 이름 -> compile된 pattern
+        :param lazy: 모든 field를 찾으면 page 읽기를 멈춤
+        :param regions: 있으면 page마다 이 영역들의 text만 추출함
+        """
+        self.patterns = PDF_FIELD_PATTERNS if patterns is None else patterns
+        self.lazy = lazy
+        self.regions = None if regions is None else [tuple(region) for region in regions]
+
+        # NAME, ZIPCODE, ADDRESS는 parse_recipient로 한 번에 찾음
+        self.recipient_columns = {column: RECIPIENT_GROUPS[pattern] for column, pattern in self.patterns.items()
+                                  if pattern in RECIPIENT_GROUPS}
+
+    def extract_from_text(self, text: str) -> tuple[dict[str, str], dict[str, float]]:
+        fields = {}
+        field_timings = {}
+
+        recipient = None
+        recipient_time = 0.0
+        if self.recipient_columns:
+            start = time.perf_counter()
+            recipient = parse_recipient(text)
+            recipient_time = time.perf_counter() - start
+
+        for column, pattern in self.patterns.items():
+            if column in self.recipient_columns:
+                # 같이 parsing되므로 세 column 모두 parse_recipient에 걸린 시간
+                group = recipient[self.recipient_columns[column]] if recipient is not None else ''
+                fields[column] = group.strip().replace('\n', '')
+                field_timings[column] = recipient_time
+                continue
+
+            start = time.perf_counter()
+            fields[column] = search_pattern(text, pattern)
+            field_timings[column] = time.perf_counter() - start
+
+        return fields, field_timings
+
+    @property
+    def version(self) -> str:
+        """patterns와 추출 방식이 같으면 같은 값, record cache의 key에 사용함"""
+        version = pattern_version(self.patterns)
+        if self.lazy or self.regions is not None:
+            version += f':lazy={self.lazy}:regions={self.regions}'
+
+        return version
+
+    def extract(self, pdf: pathlib.Path | str) -> PdfRecord:
+        pdf = pathlib.Path(pdf).resolve()
+
+        start = time.perf_counter()
+
+        text = ''
+        pages = 0
+        text_extraction_time = 0.0
+        fields = field_timings = None
+
+        page_start = start
+        for page_text in iter_page_texts(pdf, self.regions):  # pdf parsing은 한 번만
+            text += page_text
+            pages += 1
+            text_extraction_time += time.perf_counter() - page_start
+
+            if self.lazy:
+                fields, field_timings = self.extract_from_text(text)
+                if all(fields.values()):
+                    break  # 남은 page는 parsing하지 않음
+
+            page_start = time.perf_counter()
+
+        if fields is None or not self.lazy:
+            fields, field_timings = self.extract_from_text(text)
+
+        return PdfRecord(pdf, fields, field_timings, text_extraction_time, time.perf_counter() - start,
+                         pages=pages)
@@ -0,0 +1,222 @@
+import logging
+import pathlib
+import re
+from collections.abc import Sequence
+
+OBJECT_HEADER = re.compile(rb'(\d+)\s+(\d+)\s+obj\b')
+REFERENCE = re.compile(rb'(\d+) 0 R\b')
+STREAM_START = re.compile(rb'>>\s*stream\r?\n')
+STARTXREF = re.compile(rb'startxref\s+(\d+)\s+%%EOF\s*$')
+TRAILER_ROOT = re.compile(rb'/Root\s+(\d+) 0 R')
+TRAILER_INFO = re.compile(rb'/Info\s+(\d+) 0 R')
+CATALOG_PAGES = re.compile(rb'/Pages\s+(\d+) 0 R')
+PAGES_COUNT = re.compile(rb'/Count\s+(\d+)')
+PAGES_KIDS = re.compile(rb'/Kids\s*\[([^\]]*)\]')
+
+logger = logging.getLogger(__name__)
+
+
+class UnsupportedPdf(ValueError):
+    """concat_pdfs로 합칠 수 없는 구조(xref stream, incremental update 등)"""
+
+
+class PdfObjects:
+    def __init__(self, source: pathlib.Path | str) -> None:
+        """
+        classic xref table이 하나인 pdf(reportlab이 만든 pdf)의 object들을 byte 그대로 읽는다
+
+        :param source: pdf 경로
+        """
+        self.data = pathlib.Path(source).read_bytes()
+
+        startxref = STARTXREF.search(self.data[-64:])
+        if startxref is None:
+            raise UnsupportedPdf(f'startxref를 찾을 수 없음: {source}')
+
+        xref_offset = int(startxref.group(1))
+        if not self.data.startswith(b'xref', xref_offset):
+            raise UnsupportedPdf(f'xref table이 아님(xref stream 등): {source}')
+
+        trailer_offset = self.data.find(b'trailer', xref_offset)
+        if trailer_offset < 0 or self.data.find(b'/Prev', trailer_offset) >= 0:
+            raise UnsupportedPdf(f'trailer가 없거나 incremental update가 있음: {source}')
+
+        self.header = self.data[:self.data.index(b'\n') + 1]
+        self.offsets = self._read_xref(self.data[xref_offset + len(b'xref'):trailer_offset])
+
+        # 파일에서의 순서대로 정렬한 object 번호, 다음 object의 offset 전까지가 한 object
+        self.order = sorted(self.offsets, key=self.offsets.get)
+        self.ends = dict(zip(self.order, [self.offsets[number] for number in self.order[1:]] + [xref_offset]))
+
+        trailer = self.data[trailer_offset:]
+        root = TRAILER_ROOT.search(trailer)
+        if root is None:
+            raise UnsupportedPdf(f'/Root가 없음: {source}')
+        info = TRAILER_INFO.search(trailer)
+
+        self.catalog = int(root.group(1))
+        self.info = int(info.group(1)) if info is not None else None
+
+        pages = CATALOG_PAGES.search(self.object_body(self.catalog))
+        if pages is None:
+            raise UnsupportedPdf(f'/Pages가 없음: {source}')
+        self.pages = int(pages.group(1))
+
+        pages_body = self.object_body(self.pages)
+        count = PAGES_COUNT.search(pages_body)
+        kids = PAGES_KIDS.search(pages_body)
+        if count is None or kids is None:
+            raise UnsupportedPdf(f'/Pages에 /Count, /Kids가 없음: {source}')
+
+        self.count = int(count.group(1))
+        self.kids = [int(number) for number in REFERENCE.findall(kids.group(1))]
+
+    @staticmethod
+    def _read_xref(table: bytes) -> dict[int, int]:
+        offsets = {}
+        lines = table.split()
+        i = 0
+        while i < len(lines):
+            first, count = int(lines[i]), int(lines[i + 1])
+            i += 2
+            for number in range(first, first + count):
+                offset, _, kind = lines[i:i + 3]
+                i += 3
+                if kind == b'n':
+                    offsets[number] = int(offset)
+
+        return offsets
+
+    def object_bytes(self, number: int) -> bytes:
+        """'n 0 obj'부터 다음 object 전까지"""
+        return self.data[self.offsets[number]:self.ends[number]]
+
+    def object_body(self, number: int) -> bytes:
+        data = self.object_bytes(number)
+        header = OBJECT_HEADER.match(data)
+        if header is None or int(header.group(1)) != number:
+            raise UnsupportedPdf(f'{number}번 object의 offset이 맞지 않음')
+
+        return data[header.end():]
+
+
+def renumber(body: bytes, numbers: dict[int, int]) -> bytes:
+    """
+    object body의 'n 0 R' 참조를 새 번호로 바꾼다. stream의 내용은 바꾸지 않고 그대로 복사함
+
+    :param body: 'n 0 obj' 다음부터의 bytes
+    :param numbers: 원래 번호 -> 새 번호
+    :return:
+    """
+    def replace(match: re.Match) -> bytes:
+        number = int(match.group(1))
+        if number not in numbers:
+            # 대체하거나 제외한 object(catalog, 두번째 pdf부터의 info, 중간 pages node 등)를 참조함
+            raise UnsupportedPdf(f'옮길 수 없는 object를 참조함: {number} 0 R')
+
+        return b'%d 0 R' % numbers[number]
+
+    stream = STREAM_START.search(body)
+    dictionary, rest = (body[:stream.start()], body[stream.start():]) if stream is not None else (body, b'')
+
+    return REFERENCE.sub(replace, dictionary) + rest
+
+
+def concat_pdfs(sources: Sequence[pathlib.Path | str], target: pathlib.Path | str) -> pathlib.Path:
+    """
+    여러 pdf를 순서대로 이어 붙인다
+
+    page를 다시 그리거나 content stream을 decode하지 않고 object를 byte 그대로 복사하면서
+    object 번호와 참조('n 0 R')만 바꾼다. pypdf로 합치는 것보다 훨씬 빠름.
+    reportlab이 만든 pdf처럼 classic xref table이 하나인 pdf만 가능하고, 아니면 UnsupportedPdf
+
+    :param sources: 합칠 pdf들
+    :param target: 저장할 경로
+    :return: target
+    """
+    target = pathlib.Path(target)
+    if not sources:
+        raise ValueError('합칠 pdf가 없음')
+
+    # 1: catalog, 2: pages, 3부터 각 pdf의 object들
+    catalog, pages = 1, 2
+    next_number = 3
+
+    offsets: dict[int, int] = {}
+    kids: list[int] = []
+    count = 0
+    info = None
+
+    with target.open('wb') as f:
+        # memory에는 한 번에 pdf 하나만 읽음
+        for n, source in enumerate(sources):
+            document = PdfObjects(source)
+            if n == 0:
+                f.write(document.header)
+                f.write(b'%\x93\x8c\x8b\x9e\n')  # binary file임을 표시하는 comment
+
+            # 원래 catalog, pages는 새로 만든 것으로 대체하고, info는 첫번째 pdf의 것만 사용함
+            skipped = {document.catalog, document.pages}
+            if n > 0 and document.info is not None:
+                skipped.add(document.info)
+
+            numbers = {document.pages: pages}
+            for number in document.order:
+                if number not in skipped:
+                    numbers[number] = next_number
+                    next_number += 1
+
+            for number in document.order:
+                if number in skipped:
+                    continue
+
+                offsets[numbers[number]] = f.tell()
+                f.write(b'%d 0 obj' % numbers[number])
+                f.write(renumber(document.object_body(number), numbers))
+
+            kids.extend(numbers[kid] for kid in document.kids)
+            count += document.count
+            if n == 0 and document.info is not None:
+                info = numbers[document.info]
+
+        offsets[catalog] = f.tell()
+        f.write(b'%d 0 obj\n<< /Type /Catalog /Pages %d 0 R >>\nendobj\n' % (catalog, pages))
+
+        offsets[pages] = f.tell()
+        f.write(b'%d 0 obj\n<< /Type /Pages /Count %d /Kids [ ' % (pages, count))
+        f.write(b' '.join(b'%d 0 R' % kid for kid in kids))
+        f.write(b' ] >>\nendobj\n')
+
+        xref_offset = f.tell()
+        f.write(b'xref\n0 %d\n0000000000 65535 f \n' % next_number)
+        f.write(b''.join(b'%010d 00000 n \n' % offsets[number] for number in range(1, next_number)))
+
+        f.write(b'trailer\n<< /Size %d /Root %d 0 R' % (next_number, catalog))
+        if info is not None:
+            f.write(b' /Info %d 0 R' % info)
+        f.write(b' >>\nstartxref\n%d\n%%%%EOF\n' % xref_offset)
+
+    return target
+
+
+def merge_pdfs(sources: Sequence[pathlib.Path | str], target: pathlib.Path | str) -> pathlib.Path:
+    """
+    concat_pdfs로 합치고, 지원하지 않는 구조이거나 xref 등을 parsing 할 수 없으면 pypdf로 합친다
+
+    :param sources: 합칠 pdf들
+    :param target: 저장할 경로
+    :return: target
+    """
+    try:
+        return concat_pdfs(sources, target)
+    except (ValueError, KeyError, IndexError):  # UnsupportedPdf, 깨진 xref의 int(), 없는 object 번호 등
+        logger.warning('cannot concat pdfs, merging with pypdf', exc_info=True)
+
+        from pypdf import PdfWriter
+
+        writer = PdfWriter()
+        for source in sources:
+            writer.append(str(source), import_outline=False)
+        writer.write(str(target))
+
+        return pathlib.Path(target)
@@ -0,0 +1,312 @@
+import functools
+import logging
+import pathlib
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any
+
+import numpy as np
+
+import pandas as pd
+
+from column_replacer import ColumnReplacer, MappingPlan
+from dedup import RecipientIndex, merge_records
+from enis_reader import read_enis_excel
+from envelope import (ENVELOPE_CHUNK_SIZE, envelope_chunk_size, envelope_workers,
+                      render_windowed_envelope_records_parallel)
+from jobs import JobContext
+from logs import log_summary
+from xls_writer import write_xls
+
+logger = logging.getLogger(__name__)
+
+# 우편모아 엑셀 출력용
+NORMAL_MAIL_EMPTY_DATAFRAME = pd.DataFrame(
+    columns=['규격*', '중량*', '통수*', '수취인*', '우편번호*', '기본주소*', '상세주소', '휴대폰', '문서번호', '문서제목', '비고'])
+REGISTERED_MAIL_EMPTY_DATAFRAME = pd.DataFrame(
+    columns=['수수료*', '환부*', '규격*', '중량', '수취인*', '우편번호*', '기본주소*', '상세주소', '휴대폰', '문서번호', '문서제목', '비고'])
+SELECTIVE_REGISTERED_MAIL_EMPTY_DATAFRAME = pd.DataFrame(
+    columns=['수수료*', '규격*', '중량', '수취인*', '우편번호*', '기본주소*', '상세주소', '휴대폰', '문서번호', '문서제목', '비고'])
+
+# 화면에 보이는 테이블
+PDF_EMPTY_DATAFRAME = pd.DataFrame(
+    columns=['이름', '우편번호', '주소', '제목', '차량번호', '비고'])
+
+
+# pdf_df를 우편모아 df로 변환하는 mappings
+PDF_TO_POSTMOA_NORMAL_MAIL_EXCEL_COLUMNS: Sequence[ColumnReplacer] = (
+    ColumnReplacer('수취인*', '{이름}'),
+    ColumnReplacer('우편번호*', '{우편번호}'),
+    ColumnReplacer('기본주소*', '{주소}'),
+    ColumnReplacer('문서제목', '{제목}'),
+    ColumnReplacer('비고', '{차량번호}, {비고}까지'),
+    ColumnReplacer('규격*', '규격'),
+    ColumnReplacer('통수*', '1'),
+    ColumnReplacer('중량*', '25'),
+)
+PDF_TO_POSTMOA_REGISTERED_MAIL_EXCEL_COLUMNS: Sequence[ColumnReplacer] = (
+    ColumnReplacer('수취인*', '{이름}'),
+    ColumnReplacer('우편번호*', '{우편번호}'),
+    ColumnReplacer('기본주소*', '{주소}'),
+    ColumnReplacer('문서제목', '{제목}'),
+    ColumnReplacer('비고', '{차량번호}, {비고}까지'),
+    ColumnReplacer('규격*', '규격'),
+    ColumnReplacer('중량', '25'),
+    ColumnReplacer('수수료*', '보통'),
+    ColumnReplacer('환부*', '환부불능'),
+)
+PDF_TO_POSTMOA_SELECTIVE_REGISTERED_MAIL_EXCEL_COLUMNS: Sequence[ColumnReplacer] = (
+    ColumnReplacer('수수료*', '보통'),
+    ColumnReplacer('규격*', '규격'),
+    ColumnReplacer('중량', '25'),
+    ColumnReplacer('수취인*', '{이름}'),
+    ColumnReplacer('우편번호*', '{우편번호}'),
+    ColumnReplacer('기본주소*', '{주소}'),
+    ColumnReplacer('문서제목', '{제목}'),
+    ColumnReplacer('비고', '{차량번호}, {비고}까지'),
+)
+# pdf_df를 windowed_envelope_df로 변환하는 mappings
+PDF_TO_WINDOWED_ENVELOPE_COLUMNS: Sequence[ColumnReplacer] = (
+    ColumnReplacer('제목', '{제목}'),
+    ColumnReplacer('우편번호', '{우편번호}'),
+    ColumnReplacer('주소', '{주소}'),
+    ColumnReplacer('이름', '{이름}'),
+    ColumnReplacer('비고', '{차량번호}, {비고}까지'),
+)
+
+# enis_df를 우편모아 df로 변환하는 mappings
+ENIS_TO_POSTMOA_NORMAL_MAIL_EXCEL_COLUMNS: Sequence[ColumnReplacer] = (
+    ColumnReplacer('수취인*', '{납부자명}'),
+    ColumnReplacer('우편번호*', '{납부자우편번호}'),
+    ColumnReplacer('기본주소*', '{납부자주소}'),
+    ColumnReplacer('비고', '{위반항목}, {차량번호}'),
+    ColumnReplacer('규격*', '규격'),
+    ColumnReplacer('통수*', '1'),
+    ColumnReplacer('중량*', '25'),
+)
+ENIS_TO_POSTMOA_REGISTERED_MAIL_EXCEL_COLUMNS: Sequence[ColumnReplacer] = (
+    ColumnReplacer('수취인*', '{납부자명}'),
+    ColumnReplacer('우편번호*', '{납부자우편번호}'),
+    ColumnReplacer('기본주소*', '{납부자주소}'),
+    ColumnReplacer('비고', '{위반항목}, {차량번호}'),
+    ColumnReplacer('규격*', '규격'),
+    ColumnReplacer('중량', '25'),
+    ColumnReplacer('수수료*', '보통'),
+    ColumnReplacer('환부*', '환부불능'),
+)
+ENIS_TO_POSTMOA_SELECTIVE_REGISTERED_MAIL_EXCEL_COLUMNS: Sequence[ColumnReplacer] = (
+    ColumnReplacer('수수료*', '보통'),
+    ColumnReplacer('규격*', '규격'),
+    ColumnReplacer('중량', '25'),
+    ColumnReplacer('수취인*', '{납부자명}'),
+    ColumnReplacer('우편번호*', '{납부자우편번호}'),
+    ColumnReplacer('기본주소*', '{납부자주소}'),
+    ColumnReplacer('비고', '{위반항목}, {차량번호}'),
+)
+
+# enis_df를 windowed_envelope_df로 변환하는 mappings
+ENIS_TO_WINDOWED_ENVELOPE_COLUMNS: Sequence[ColumnReplacer] = (
+    ColumnReplacer('제목', ''),
+    ColumnReplacer('우편번호', '{납부자우편번호}'),
+    ColumnReplacer('주소', '{납부자주소}'),
+    ColumnReplacer('이름', '{납부자명}'),
+    ColumnReplacer('비고', '{위반항목}, {차량번호}'),
+)
+
+# 출력 이름 -> (출력 df의 columns, mappings)
+# 출력 4개에서 같은 template('{이름}', '{주소}' 등)은 한 번만 계산함
+PDF_MAPPING_PLAN = MappingPlan({
+    '일반우편': (NORMAL_MAIL_EMPTY_DATAFRAME.columns, PDF_TO_POSTMOA_NORMAL_MAIL_EXCEL_COLUMNS),
+    '등기우편': (REGISTERED_MAIL_EMPTY_DATAFRAME.columns, PDF_TO_POSTMOA_REGISTERED_MAIL_EXCEL_COLUMNS),
+    '선택등기우편': (SELECTIVE_REGISTERED_MAIL_EMPTY_DATAFRAME.columns,
+                PDF_TO_POSTMOA_SELECTIVE_REGISTERED_MAIL_EXCEL_COLUMNS),
+    '창봉투_주소': (PDF_EMPTY_DATAFRAME.columns, PDF_TO_WINDOWED_ENVELOPE_COLUMNS),
+})
+ENIS_MAPPING_PLAN = MappingPlan({
+    '일반우편': (NORMAL_MAIL_EMPTY_DATAFRAME.columns, ENIS_TO_POSTMOA_NORMAL_MAIL_EXCEL_COLUMNS),
+    '등기우편': (REGISTERED_MAIL_EMPTY_DATAFRAME.columns, ENIS_TO_POSTMOA_REGISTERED_MAIL_EXCEL_COLUMNS),
+    '선택등기우편': (SELECTIVE_REGISTERED_MAIL_EMPTY_DATAFRAME.columns,
+                ENIS_TO_POSTMOA_SELECTIVE_REGISTERED_MAIL_EXCEL_COLUMNS),
+    '창봉투_주소': (PDF_EMPTY_DATAFRAME.columns, ENIS_TO_WINDOWED_ENVELOPE_COLUMNS),
+})
+
+
+def yyyymmdd_to_yyyy_mm_dd(date: str) -> str:
+    import arrow
+
+    return str(arrow.get(date, 'YYYYMMDD').format('YYYY-MM-DD'))
+
+
+class Config:
+    def __init__(self, excel_left_top_cell='', excel_type='', mail_must_be_not_na='', kakaotalk_must_be_not_na='',
+                 recipient_columns=('이름', '우편번호', '주소'), recipient_note_column=None):
+        self.excel_left_top_cell = excel_left_top_cell
+        self.excel_type = excel_type
+        self.mail_must_be_not_na = mail_must_be_not_na
+        self.kakaotalk_must_be_not_na = kakaotalk_must_be_not_na
+        # 같은 수취인을 하나의 우편물로 합칠 때 비교하는 (이름, 우편번호, 주소) column과 보고서에 같이 보여줄 column
+        self.recipient_columns = recipient_columns
+        self.recipient_note_column = recipient_note_column
+
+    def mail_must_be_not_na_columns(self) -> list[Any]:
+        return self.mail_must_be_not_na.strip().replace(' ', '').split(',')
+
+    def kakaotalk_must_be_not_na_columns(self) -> list[Any]:
+        return self.kakaotalk_must_be_not_na.strip().replace(' ', '').split(',')
+
+
+# 세외수입 config
+ENIS_CONFIG = Config(
+    excel_left_top_cell='$A$1',
+    excel_type='enis',
+    recipient_columns=('납부자명', '납부자우편번호', '납부자주소'),
+    recipient_note_column='위반항목',
+)
+
+PDF_CONFIG = Config(
+    excel_type='pdf',
+    recipient_note_column='차량번호',
+)
+
+# output_paths(dedup=True)일 때 합친 수취인 보고서의 이름
+DEDUP_REPORT = '중복병합'
+
+
+def output_paths(directory: pathlib.Path | str, datetime: str, dedup: bool = False) -> dict[str, pathlib.Path]:
+    """
+    저장할 파일 경로들
+
+    :param directory: 저장할 폴더
+    :param datetime: 파일 이름 앞에 붙일 시각, 'YYYY-MM-DD HHmmss'
+    :param dedup: True면 같은 수취인을 하나의 우편물로 합치고, 합친 내용을 DEDUP_REPORT csv로 저장함
+    :return: MappingPlan의 출력 이름(과 DEDUP_REPORT) -> 경로
+    """
+    directory = pathlib.Path(directory)
+
+    paths = {
+        '일반우편': directory / f'{datetime}_일반우편.xls',
+        '등기우편': directory / f'{datetime}_등기우편.xls',
+        '선택등기우편': directory / f'{datetime}_선택등기우편.xls',
+        '창봉투_주소': directory / f'{datetime}_창봉투_주소.pdf',
+    }
+    if dedup:
+        paths[DEDUP_REPORT] = directory / f'{datetime}_{DEDUP_REPORT}.csv'
+
+    return paths
+
+
+def mapping_plan(config: Config) -> MappingPlan:
+    match config.excel_type:
+        case 'pdf':
+            return PDF_MAPPING_PLAN
+
+        case 'enis':
+            return ENIS_MAPPING_PLAN
+
+        case _:
+            raise ValueError(f'지원하지 않는 excel_type: {config.excel_type!r}')
+
+
+def merged_envelope_records(plan: MappingPlan,
+                            name: str,
+                            data: pd.DataFrame,
+                            codes: np.ndarray,
+                            note_column: str = '비고', ) -> Iterator[dict[str, Any]]:
+    """data(RecipientIndex.piece_rows 순서)를 mapping 하면서 같은 수취인의 record들을 합친다"""
+    return merge_records(plan.iter_records(name, data), codes.tolist(), note_column)
+
+
+def envelope_chunks(plan: MappingPlan,
+                    name: str,
+                    data: pd.DataFrame,
+                    index: RecipientIndex | None = None,
+                    chunk_size: int = ENVELOPE_CHUNK_SIZE,
+                    ) -> Iterator[tuple[int, Callable[[], Iterator[dict[str, Any]]]]]:
+    """
+    창봉투 record를 chunk_size개씩 만드는 함수들, render_windowed_envelope_records_parallel의 chunks
+
+    출력 df를 만들지 않고 chunk마다 원본 table의 row들을 MappingPlan.iter_records로 mapping 함.
+    process에 넘길 수 있도록 functools.partial로 만들고, 필요할 때 하나씩 만듦
+
+    :param plan: mapping_plan(config)
+    :param name: 창봉투 출력 이름
+    :param data: 원본 table
+    :param index: 있으면 chunk는 우편물(group) chunk_size개이고, group의 row들을 모아서 합침
+    :param chunk_size: chunk 하나의 record 수
+    :return: (record 수, record들을 만드는 함수)
+    """
+    if index is None:
+        for start in range(0, len(data), chunk_size):
+            part = data.iloc[start:start + chunk_size]
+            yield len(part), functools.partial(plan.iter_records, name, part)
+        return
+
+    for start in range(0, index.pieces, chunk_size):
+        stop = min(start + chunk_size, index.pieces)
+        rows = index.piece_rows(start, stop)
+        yield stop - start, functools.partial(merged_envelope_records, plan, name, data.iloc[rows], index.codes[rows])
+
+
+def save_outputs(data: pd.DataFrame,
+                 config: Config,
+                 paths: dict[str, pathlib.Path],
+                 context: JobContext | None = None,
+                 max_workers: int | None = None) -> dict[str, float]:
+    """
+    우편모아 엑셀 3개(일반, 등기, 선택등기)와 창봉투 pdf를 저장한다
+
+    GUI의 save와 command line의 convert가 같이 사용함
+
+    :param data: 화면 table의 df(pdf) 또는 세외수입 df(enis)
+    :param config: data가 어디서 왔는지, PDF_CONFIG 또는 ENIS_CONFIG
+    :param paths: output_paths()의 결과, DEDUP_REPORT가 있으면 같은 수취인의 row들을 하나로 합쳐서 저장함
+    :param context: progress 보고와 cancel 확인용
+    :param max_workers: 창봉투 pdf를 만들 process 수, None이면 cpu 수
+    :return: 단계 이름 -> 걸린 시간 in sec
+    """
+    context = context if context is not None else JobContext()
+    plan = mapping_plan(config)
+
+    timings = {}
+    total = len(paths) + 1
+
+    # 창봉투(pdf)는 출력 df를 만들지 않고 저장할 때 chunk마다 mapping 함
+    tables = [name for name, target in paths.items() if name in plan.targets and target.suffix != '.pdf']
+
+    context.progress(0, total, 'mapping')
+    with context.span('mapping', rows=len(data), excel_type=config.excel_type) as span:
+        outputs = plan.evaluate(data, tables)  # 같은 template은 출력 전체에서 한 번만 계산함
+    timings['mapping'] = span.duration
+
+    index = None
+    if DEDUP_REPORT in paths:
+        with context.span('dedup', rows=len(data)) as span:
+            index = RecipientIndex(data, config.recipient_columns)
+            outputs = {name: index.collapse(output) for name, output in outputs.items()}
+        timings['dedup'] = span.duration
+        logger.info('merged %d duplicate rows into %d mail pieces', index.merged_rows, index.pieces)
+
+    pieces = index.pieces if index is not None else len(data)
+
+    for i, (name, target) in enumerate(paths.items(), start=1):
+        context.check_cancelled()
+        context.progress(i, total, target.name)
+
+        with context.span(name, target=target.name) as span:
+            if name == DEDUP_REPORT:
+                # excel에서 한글이 깨지지 않도록 BOM을 붙임
+                index.report(data, config.recipient_note_column).to_csv(target, index=False, encoding='utf-8-sig')
+            elif target.suffix == '.pdf':
+                # 원본 table에서 chunk씩 record를 만들면서 그림, process가 1개면 chunk들을 이어서 그림
+                chunk_size = envelope_chunk_size(pieces, envelope_workers(pieces, max_workers))
+                render_windowed_envelope_records_parallel(target, envelope_chunks(plan, name, data, index, chunk_size),
+                                                          pieces, context, max_workers)
+            else:
+                write_xls(outputs[name], target)
+        timings[name] = span.duration
+        logger.debug('saved %s in %.3fs', target, span.duration)
+
+    log_summary('save', excel_type=config.excel_type, rows=len(data), directory=next(iter(paths.values())).parent,
+                pieces=pieces,
+                timings={name: round(seconds, 3) for name, seconds in timings.items()})
+
+    return timings
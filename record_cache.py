@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+
+from pdf_extractor import PdfRecord
+
+# cache 전체 크기 제한, 넘으면 가장 오래 사용하지 않은 record부터 삭제함
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def default_cache_path() -> pathlib.Path:
+    """windows는 %LOCALAPPDATA%, 나머지는 ~/.cache 아래"""
+    base = os.environ.get('LOCALAPPDATA') or pathlib.Path.home() / '.cache'
+    return pathlib.Path(base) / 'file-to-postmoa' / 'pdf_records.sqlite3'
+
+
+def file_hash(path: pathlib.Path | str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+class RecordCache:
+    def __init__(self, path: pathlib.Path | str | None = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        pdf에서 추출한 PdfRecord를 disk에 저장하는 cache
+
+        key는 (pdf 내용의 sha256, PdfExtractor.version)이라서 파일 이름이나 위치가 바뀌어도 hit이고,
+        pattern이나 추출 방식이 바뀌면 miss가 됨. 크기가 max_bytes를 넘으면 LRU로 삭제함
+
+        :param path: sqlite 파일 경로, None이면 default_cache_path()
+        :param max_bytes: 저장된 record들의 전체 크기 제한
+        """
+        self.path = pathlib.Path(path) if path is not None else default_cache_path()
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # GUI에서는 worker thread에서 사용하므로 lock으로 보호함
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS records ('
+                                     'key TEXT PRIMARY KEY, '
+                                     'record TEXT NOT NULL, '
+                                     'size INTEGER NOT NULL, '
+                                     'last_access REAL NOT NULL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS records_last_access ON records (last_access)')
+
+    @staticmethod
+    def key(pdf: pathlib.Path | str, version: str) -> str:
+        """
+        :param pdf: pdf 경로
+        :param version: PdfExtractor.version
+        :return:
+        """
+        return f'{file_hash(pdf)}:{version}'
+
+    def get(self, key: str, pdf: pathlib.Path) -> PdfRecord | None:
+        """
+        :param key: RecordCache.key()
+        :param pdf: 반환할 record의 pdf 경로
+        :return: 없으면 None
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT record FROM records WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            with self._connection:
+                self._connection.execute('UPDATE records SET last_access = ? WHERE key = ?', (time.time(), key))
+
+        return PdfRecord.from_dict(pdf, json.loads(row[0]), cached=True)
+
+    def put_many(self, items: Iterable[tuple[str, PdfRecord]]) -> None:
+        now = time.time()
+        rows = []
+        for key, record in items:
+            text = json.dumps(record.to_dict(), ensure_ascii=False)
+            rows.append((key, text, len(text.encode('utf-8')), now))
+
+        if not rows:
+            return
+
+        with self._lock:
+            with self._connection:
+                self._connection.executemany('INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)', rows)
+                self._evict()
+
+    def put(self, key: str, record: PdfRecord) -> None:
+        self.put_many([(key, record)])
+
+    def _evict(self) -> None:
+        """전체 크기가 max_bytes 이하가 될 때까지 오래된 record부터 삭제함. lock 안에서 호출해야 함"""
+        total = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM records').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in self._connection.execute('SELECT key, size FROM records ORDER BY last_access'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+
+        self._connection.executemany('DELETE FROM records WHERE key = ?', evicted)
+        self.evictions += len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            with self._connection:
+                self._connection.execute('DELETE FROM records')
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            entries, size = self._connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM records').fetchone()
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size,
+        }
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def open_cache(path: pathlib.Path | str | None = None) -> RecordCache | None:
+    """cache를 열 수 없으면(권한, 손상된 파일 등) cache 없이 동작하도록 None을 반환함"""
+    try:
+        return RecordCache(path)
+    except (OSError, sqlite3.Error):
+        return None
@@ -0,0 +1,218 @@
+"""
+table session 저장과 복원
+
+GUI가 닫히거나 비정상 종료되어도 편집한 table을 다시 import(xlwings, pdf parsing) 없이 복원할 수 있도록
+table(self.data), config, 원본 파일 목록을 session 파일 하나에 저장한다
+
+Arrow IPC(Feather, lz4 압축)로 저장하고 memory-mapped로 읽음.
+column 단위로 저장하므로 100k row도 복원이 거의 바로 끝남
+"""
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+from collections.abc import Sequence
+
+import pandas as pd
+
+from pipeline import Config, ENIS_CONFIG, PDF_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SESSION_VERSION = 1
+
+# Arrow schema metadata에서 session 정보를 저장하는 key
+SESSION_METADATA_KEY = b'file_to_postmoa.session'
+
+# session 파일 확장자
+SESSION_SUFFIX = '.arrow'
+
+# autosave 간격 in sec
+DEFAULT_AUTOSAVE_INTERVAL = 30
+
+# Config.excel_type -> Config, session에는 excel_type만 저장함
+CONFIGS = {config.excel_type: config for config in (PDF_CONFIG, ENIS_CONFIG)}
+
+
+def default_session_path() -> pathlib.Path:
+    """record_cache와 같은 폴더, 확장자는 SESSION_SUFFIX"""
+    base = os.environ.get('LOCALAPPDATA') or pathlib.Path.home() / '.cache'
+    return pathlib.Path(base) / 'file-to-postmoa' / 'session'
+
+
+class Session:
+    def __init__(self, data: pd.DataFrame, config: Config | None, sources: list[str], saved: str) -> None:
+        """
+        load_session()으로 복원한 session
+
+        :param data: 저장할 때의 table
+        :param config: 저장할 때의 config, 저장하지 않았으면 None
+        :param sources: table을 만든 원본 파일들
+        :param saved: 저장한 시각, 'YYYY-MM-DD HH:MM:SS'
+        """
+        self.data = data
+        self.config = config
+        self.sources = sources
+        self.saved = saved
+
+
+def arrow_column(column: pd.Series):
+    """
+    column -> pyarrow array. 편집된 table의 column은 int, float, str이 섞인 object column이라서
+    pyarrow가 type을 정할 수 없으면 표시되는 str로 저장함(빈 값은 null)
+    """
+    import pyarrow as pa
+
+    try:
+        return pa.array(column.to_numpy(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array(column.astype(str).where(column.notna(), None).to_numpy(), type=pa.string())
+
+
+def save_session(data: pd.DataFrame,
+                 config: Config | None,
+                 sources: Sequence[pathlib.Path | str],
+                 path: pathlib.Path | str | None = None, ) -> pathlib.Path:
+    """
+    session을 저장한다. 임시 파일에 쓰고 교체하므로 저장 중에 종료되어도 이전 session이 남음
+
+    :param data: table
+    :param config: table의 config
+    :param sources: table을 만든 원본 파일들
+    :param path: 확장자를 뺀 session 경로, None이면 default_session_path()
+    :return: 저장한 파일
+    """
+    import pyarrow as pa
+    from pyarrow import feather
+
+    path = pathlib.Path(path) if path is not None else default_session_path()
+    target = path.with_suffix(SESSION_SUFFIX)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    meta = {
+        'version': SESSION_VERSION,
+        'excel_type': config.excel_type if config is not None else None,
+        'sources': [str(source) for source in sources],
+        'saved': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+    table = pa.table([arrow_column(data[column]) for column in data.columns],
+                     names=[str(column) for column in data.columns])
+    table = table.replace_schema_metadata({SESSION_METADATA_KEY: json.dumps(meta, ensure_ascii=False)})
+
+    temporary = target.with_name(target.name + '.tmp')
+    feather.write_feather(table, temporary, compression='lz4')
+    os.replace(temporary, target)
+
+    return target
+
+
+def read_session(target: pathlib.Path) -> tuple[dict, pd.DataFrame]:
+    from pyarrow import feather
+
+    table = feather.read_table(target, memory_map=True)
+    meta = json.loads(table.schema.metadata[SESSION_METADATA_KEY])
+    return meta, table.to_pandas()
+
+
+def load_session(path: pathlib.Path | str | None = None) -> Session | None:
+    """
+    저장된 session을 읽는다
+
+    :param path: 확장자를 뺀 session 경로, None이면 default_session_path()
+    :return: session이 없거나 읽을 수 없으면(다른 version, 깨진 파일 등) None
+    """
+    path = pathlib.Path(path) if path is not None else default_session_path()
+    target = path.with_suffix(SESSION_SUFFIX)
+    if not target.exists():
+        return None
+
+    try:
+        meta, data = read_session(target)
+    except Exception:
+        logger.warning('cannot read session %s', target, exc_info=True)
+        return None
+
+    if meta.get('version') != SESSION_VERSION:
+        return None
+
+    return Session(data, CONFIGS.get(meta['excel_type']), meta['sources'], meta['saved'])
+
+
+def clear_session(path: pathlib.Path | str | None = None) -> None:
+    path = pathlib.Path(path) if path is not None else default_session_path()
+    path.with_suffix(SESSION_SUFFIX).unlink(missing_ok=True)
+
+
+class SessionAutosaver:
+    def __init__(self, path: pathlib.Path | str | None = None) -> None:
+        """
+        session을 background thread에서 저장한다
+
+        submit()은 snapshot만 넘기고 바로 반환하므로 GUI가 멈추지 않음.
+        저장 중에 여러 번 submit()하면 마지막 snapshot만 저장함
+
+        :param path: 확장자를 뺀 session 경로, None이면 default_session_path()
+        """
+        self.path = path
+        self.saves = 0
+
+        self._condition = threading.Condition()
+        self._pending: tuple[pd.DataFrame, Config | None, list[str]] | None = None
+        self._saving = False
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name='session autosave', daemon=True)
+        self._thread.start()
+
+    def submit(self, data: pd.DataFrame, config: Config | None, sources: Sequence[pathlib.Path | str]) -> None:
+        """
+        :param data: 저장할 table, 저장하는 동안 바뀌지 않도록 복사본을 넘겨야 함
+        :param config:
+        :param sources:
+        """
+        with self._condition:
+            self._pending = (data, config, list(sources))
+            self._condition.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        submit()한 snapshot이 모두 저장될 때까지 기다린다
+
+        :param timeout: in sec
+        :return: timeout 전에 저장이 끝났는지
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._saving, timeout)
+
+    def close(self, timeout: float | None = None) -> None:
+        """남은 snapshot을 저장하고 thread를 종료함"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+
+                (data, config, sources), self._pending = self._pending, None
+                self._saving = True
+
+            try:
+                start = time.perf_counter()
+                target = save_session(data, config, sources, self.path)
+                self.saves += 1
+                logger.debug('session saved to %s: %d rows (%.3fs)', target, len(data), time.perf_counter() - start)
+            except Exception:
+                logger.exception('session autosave failed')
+            finally:
+                with self._condition:
+                    self._saving = False
+                    self._condition.notify_all()
@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# module들이 repository root에 있으므로 test에서 바로 import 할 수 있도록 추가함
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
@@ -0,0 +1,82 @@
+"""ColumnReplacer.evaluate가 예전 row 단위 re.sub loop와 같은 값을 만드는지 확인한다"""
+import itertools
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from column_replacer import ColumnReplacer, MappingPlan, column_to_str
+
+# 비어있는 값과 일반 값, 예전 loop는 falsy 값이면 placeholder만 삭제함
+VALUES = [None, '', 0, np.nan, '홍길동', '010-1234-5678', '서울 중구 세종대로 110', '0']
+
+
+def baseline_replace(replacer: ColumnReplacer, data_df: pd.DataFrame) -> list[str]:
+    """
+    main_window_old.py의 ColumnReplacer.replace loop
+
+    예전 loop는 NaN(truthy)을 re.sub에 넘겨서 TypeError가 났으므로 NaN만 빈 값으로 처리함
+    """
+    columns = re.findall(r'{(\w+)}', replacer.replacer)
+    replaced = [replacer.replacer for _ in range(len(data_df))]
+
+    for column in columns:
+        for i, (new, r) in enumerate(zip(data_df[column], replaced)):
+            if new and not pd.isna(new):
+                replaced[i] = re.sub('{' + column + '}', new, r)
+            else:
+                replaced[i] = re.sub('{' + column + '}', '', r)
+
+            if replacer.extra_pattern:
+                replaced[i] = re.sub(replacer.extra_pattern, replacer.value_for_extra_pattern, replaced[i])
+
+    return replaced
+
+
+@pytest.fixture
+def data_df():
+    # 두 column의 모든 값 조합
+    rows = list(itertools.product(VALUES, VALUES))
+    return pd.DataFrame({'차량번호': [row[0] for row in rows], '비고': [row[1] for row in rows]}, dtype=object)
+
+
+@pytest.mark.parametrize('replacer', [
+    ColumnReplacer('비고', '{차량번호}, {비고}까지'),
+    ColumnReplacer('수취인*', '{차량번호}'),
+    ColumnReplacer('비고', '{차량번호}{차량번호} / {비고}'),
+    ColumnReplacer('휴대폰', '{비고}', '-', ''),
+    ColumnReplacer('휴대폰', '{차량번호} {비고}', r'\s+', '_'),
+    ColumnReplacer('통수*', '1'),
+    ColumnReplacer('통수*', '1-2', '-', ''),
+])
+def test_evaluate_matches_baseline(replacer, data_df):
+    assert replacer.evaluate(data_df).tolist() == baseline_replace(replacer, data_df)
+
+
+def test_replace_skips_empty_replacer(data_df):
+    target_df = pd.DataFrame({'비고': ['그대로'] * len(data_df)})
+    ColumnReplacer('비고', '').replace(target_df, data_df)
+
+    assert (target_df['비고'] == '그대로').all()
+
+
+def test_whole_floats_have_no_decimal_point():
+    # xlwings는 숫자 cell을 모두 float로 읽음
+    column = pd.Series([41234.0, 1234.0, 1.5, np.nan, 0.0, 7, '01234'], dtype=object)
+
+    assert column_to_str(column).tolist() == ['41234', '1234', '1.5', '', '', '7', '01234']
+
+
+def test_mapping_plan_iter_records_matches_evaluate(data_df):
+    replacers = [ColumnReplacer('비고', '{차량번호}, {비고}까지'), ColumnReplacer('통수*', '1')]
+    plan = MappingPlan({'일반우편': (['통수*', '수취인*', '비고'], replacers)})
+
+    expected = plan.evaluate(data_df)['일반우편'].to_dict('records')
+    records = list(plan.iter_records('일반우편', data_df, batch_size=7))
+
+    assert len(records) == len(expected)
+    for record, row in zip(records, expected):
+        assert record.keys() == row.keys()
+        assert record['비고'] == row['비고'] and record['통수*'] == row['통수*']
+        assert pd.isna(record['수취인*']) and pd.isna(row['수취인*'])
@@ -0,0 +1,86 @@
+"""parse_recipient가 NAME, ZIPCODE, ADDRESS regex와 같은 값을 찾는지 확인한다"""
+import random
+
+import pytest
+
+from pdf_extractor import ADDRESS, NAME, PDF_FIELD_PATTERNS, ZIPCODE, PdfExtractor, parse_recipient, search_pattern
+
+RECIPIENT_TEXTS = [
+    # 공문 layout
+    '문서\n수신 홍길동 귀하 (우12345 부산광역시 해운대구 센텀로 1)\n(경유)\n제목 과태료 부과',
+    '수신  홍길동\n귀하 (우01234 서울특별시 중구 세종대로 110, 1층)\n(경유)',
+    # 귀하가 여러 번
+    '수신 홍길동 귀하 (우12345 부산 귀하 (우54321 서울)\n(경유)',
+    '수신 귀하 귀하 (우12345 부산)\n(경유)',
+    '수신 홍길동 귀하 (우12345 부산)\n(경유)\n수신 김철수 귀하 (우54321 서울)\n(경유)',
+    '수신 홍길동 귀하귀하 (우12345 부산)\n(경유)',
+    # 이름이 비어있거나 공백뿐
+    '수신  귀하 (우12345 부산)\n(경유)',
+    '수신 \n\t 귀하 (우12345 부산)\n(경유)',
+    '수신귀하 (우12345 부산)\n(경유)',
+    # 주소가 비어있거나 공백뿐
+    '수신 홍길동 귀하 (우12345 )\n(경유)',
+    '수신 홍길동 귀하 (우12345  )\n(경유)',
+    '수신 홍길동 귀하 (우12345)\n(경유)',
+    # ')\n(경유)'만 있거나 여러 번
+    ')\n(경유)',
+    '수신 )\n(경유)',
+    '수신 홍길동 귀하 )\n(경유)',
+    '수신 홍길동 귀하 (우12345 부산)\n(경유) 귀하 (우54321 서울)\n(경유)',
+    '수신 홍길동 귀하 (우12345 부산)\n(경유)\n)\n(경유)',
+    # 우편번호가 없거나 숫자가 아님
+    '수신 홍길동 귀하 (우 부산)\n(경유)',
+    '수신 홍길동 귀하 (우가나다 부산)\n(경유)',
+    '수신 홍길동 귀하 (12345 부산)\n(경유)',
+    # 수신이 없거나 여러 번
+    '홍길동 귀하 (우12345 부산)\n(경유)',
+    '수신 수신 홍길동 귀하 (우12345 부산)\n(경유)',
+    '수신자 수신 홍길동 귀하 (우12345 부산)\n(경유)',
+    '',
+]
+
+# random text의 수신 block 자리마다 넣을 조각들, 경계 조건(공백, 귀하, 괄호)이 자주 섞이도록 함
+SPACES = ['', ' ', '  ', '\n', '\t', ' \n ']
+WORDS = ['', '홍길동', '귀하', '(우', '12345', ')', ')\n(경유)', '수신', '부산 해운대구 1', ' ', '\n', '가']
+
+
+def regex_groups(text: str) -> tuple[str, str, str] | None:
+    """baseline: NAME, ZIPCODE, ADDRESS를 각각 적용한 첫번째 group"""
+    matches = [pattern.search(text) for pattern in (NAME, ZIPCODE, ADDRESS)]
+    if any(match is None for match in matches):
+        assert all(match is None for match in matches)
+        return None
+
+    return tuple(match.group(1) for match in matches)
+
+
+def random_texts(count: int, seed: int = 0) -> list[str]:
+    """'수신 {이름} 귀하 (우{우편번호} {주소})\n(경유)'의 자리마다 조각을 섞어서 만든 text"""
+    rng = random.Random(seed)
+
+    def words() -> str:
+        return ''.join(rng.choice(WORDS) for _ in range(rng.randint(0, 3)))
+
+    texts = []
+    for _ in range(count):
+        zipcode = rng.choice(['12345', '7', '', '가'])
+        texts.append(f'{words()}수신{rng.choice(SPACES)}{words()}{rng.choice(SPACES)}귀하{rng.choice(SPACES)}'
+                     f'(우{zipcode}{rng.choice(SPACES)}{words()})\n(경유){words()}')
+
+    return texts
+
+
+@pytest.mark.parametrize('text', RECIPIENT_TEXTS)
+def test_parse_recipient_matches_regex(text):
+    assert parse_recipient(text) == regex_groups(text)
+
+
+def test_parse_recipient_matches_regex_on_random_text():
+    mismatches = [text for text in random_texts(20000) if parse_recipient(text) != regex_groups(text)]
+    assert mismatches == []
+
+
+@pytest.mark.parametrize('text', RECIPIENT_TEXTS)
+def test_extract_from_text_matches_search_pattern(text):
+    fields, _ = PdfExtractor().extract_from_text(text)
+    assert fields == {column: search_pattern(text, pattern) for column, pattern in PDF_FIELD_PATTERNS.items()}
@@ -0,0 +1,74 @@
+"""concat_pdfs가 reportlab pdf를 이어 붙이는지, 합칠 수 없는 pdf는 merge_pdfs가 pypdf로 합치는지 확인한다"""
+import re
+
+import pytest
+from pypdf import PdfReader
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen.canvas import Canvas
+
+from pdf_merge import PdfObjects, UnsupportedPdf, concat_pdfs, merge_pdfs
+
+
+def render_part(path, texts):
+    """page마다 text 한 줄을 그린 reportlab pdf"""
+    canvas = Canvas(str(path), pagesize=A4)
+    for text in texts:
+        canvas.setFont('Helvetica', 12)
+        canvas.drawString(72, 720, text)
+        canvas.showPage()
+    canvas.save()
+    return path
+
+
+def page_texts(path):
+    return [page.extract_text().strip() for page in PdfReader(str(path)).pages]
+
+
+@pytest.fixture
+def parts(tmp_path):
+    return [render_part(tmp_path / 'a.pdf', ['part a page 1', 'part a page 2']),
+            render_part(tmp_path / 'b.pdf', ['part b page 1', 'part b page 2', 'part b page 3'])]
+
+
+def test_concat_pdfs(parts, tmp_path):
+    target = concat_pdfs(parts, tmp_path / 'merged.pdf')
+
+    assert page_texts(target) == ['part a page 1', 'part a page 2',
+                                  'part b page 1', 'part b page 2', 'part b page 3']
+
+    # 합친 pdf도 concat_pdfs로 다시 읽을 수 있는 classic xref table 하나짜리
+    merged = PdfObjects(target)
+    assert merged.count == 5
+    assert len(merged.kids) == 5
+
+
+def test_concat_pdfs_single(parts, tmp_path):
+    target = concat_pdfs(parts[:1], tmp_path / 'merged.pdf')
+    assert page_texts(target) == ['part a page 1', 'part a page 2']
+
+
+def test_concat_pdfs_without_sources(tmp_path):
+    with pytest.raises(ValueError):
+        concat_pdfs([], tmp_path / 'merged.pdf')
+
+
+def test_concat_pdfs_rejects_incremental_update(parts, tmp_path):
+    data = parts[1].read_bytes()
+    parts[1].write_bytes(data.replace(b'trailer\n<<', b'trailer\n<< /Prev 0', 1))
+
+    with pytest.raises(UnsupportedPdf):
+        concat_pdfs(parts, tmp_path / 'merged.pdf')
+
+
+def test_merge_pdfs_falls_back_on_malformed_xref(parts, tmp_path):
+    # xref의 첫번째 object offset을 숫자가 아니게 바꿈, pypdf는 object를 다시 찾아서 읽음
+    data = parts[1].read_bytes()
+    data = re.sub(rb'(xref\s+0 \d+\s+0000000000 65535 f\s+)\d{10}', rb'\g<1>00000000zz', data, count=1)
+    parts[1].write_bytes(data)
+
+    with pytest.raises(ValueError):
+        concat_pdfs(parts, tmp_path / 'concat.pdf')
+
+    target = merge_pdfs(parts, tmp_path / 'merged.pdf')
+    assert page_texts(target) == ['part a page 1', 'part a page 2',
+                                  'part b page 1', 'part b page 2', 'part b page 3']
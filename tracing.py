@@ -0,0 +1,108 @@
+import collections
+import json
+import os
+import pathlib
+import threading
+import time
+from typing import Any
+
+# GUI는 계속 켜져 있으므로 오래된 span부터 버림
+DEFAULT_MAX_EVENTS = 100000
+
+
+class Span:
+    __slots__ = ('tracer', 'name', 'args', 'start', 'duration')
+
+    def __init__(self, tracer: 'Tracer', name: str, args: dict[str, Any]) -> None:
+        """
+        with 문으로 감싼 구간의 시간을 측정한다. 나가면 duration(sec)이 채워짐
+
+        tracer가 꺼져 있어도 duration은 측정함(perf_counter 2번)
+
+        :param tracer: 기록할 tracer
+        :param name: 단계 이름, 'mapping', '일반우편' 등
+        :param args: trace에 같이 저장할 값들
+        """
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0.0
+        self.duration = 0.0
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.duration = time.perf_counter() - self.start
+        if self.tracer.enabled:
+            self.tracer.add(self, error=exc_type is not None)
+
+
+class Tracer:
+    def __init__(self, enabled: bool = True, max_events: int = DEFAULT_MAX_EVENTS) -> None:
+        """
+        단계별 시간(span)을 모아서 chrome trace format(json)으로 저장한다
+
+        저장한 json은 chrome://tracing 이나 https://ui.perfetto.dev 에서 열 수 있음
+
+        :param enabled: False면 span의 시간만 측정하고 기록하지 않음
+        :param max_events: 저장할 최대 span 수
+        """
+        self.enabled = enabled
+        self.origin = time.perf_counter()  # trace의 ts 0
+        self.events: collections.deque[dict[str, Any]] = collections.deque(maxlen=max_events)
+        self.thread_names: dict[int, str] = {}
+
+    def span(self, name: str, **args: Any) -> Span:
+        return Span(self, name, args)
+
+    def add(self, span: Span, error: bool = False) -> None:
+        thread = threading.current_thread()
+        self.thread_names.setdefault(thread.ident, thread.name)
+
+        args = {key: str(value) for key, value in span.args.items()}
+        if error:
+            args['error'] = 'true'
+
+        # deque.append는 thread safe 함
+        self.events.append({
+            'name': span.name,
+            'ph': 'X',
+            'ts': (span.start - self.origin) * 1e6,
+            'dur': span.duration * 1e6,
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'args': args,
+        })
+
+    def clear(self) -> None:
+        self.events.clear()
+
+    def totals(self) -> dict[str, float]:
+        """span 이름 -> 전체 시간 in sec, 처음 기록된 순서"""
+        totals = {}
+        for event in list(self.events):
+            totals[event['name']] = totals.get(event['name'], 0.0) + event['dur'] / 1e6
+
+        return totals
+
+    def chrome_trace(self) -> dict[str, Any]:
+        # thread 이름은 metadata event로 추가함
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+                    for tid, name in self.thread_names.items()]
+
+        return {
+            'traceEvents': metadata + list(self.events),
+            'displayTimeUnit': 'ms',
+        }
+
+    def export(self, target: pathlib.Path | str) -> pathlib.Path:
+        target = pathlib.Path(target)
+        target.write_text(json.dumps(self.chrome_trace(), ensure_ascii=False), encoding='utf-8')
+        return target
+
+
+def format_timings(timings: dict[str, float]) -> str:
+    """status bar용, {'mapping': 0.1, '일반우편': 0.25} -> 'mapping 0.10s, 일반우편 0.25s'"""
+    return ', '.join(f'{name} {seconds:.2f}s' for name, seconds in timings.items())
@@ -0,0 +1,68 @@
+import logging
+import traceback
+from typing import Callable, Any
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from jobs import JobCancelled, JobContext
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerSignals(QObject):
+    progress = pyqtSignal(int, int, str)  # done, total, message
+    finished = pyqtSignal(object)  # job의 return value
+    failed = pyqtSignal(str)  # traceback
+    cancelled = pyqtSignal()
+
+
+class Worker(QRunnable):
+    def __init__(self, name: str, fn: Callable[..., Any], *args, **kwargs) -> None:
+        """
+        fn(context, *args, **kwargs)를 QThreadPool에서 실행한다
+
+        결과는 signals.finished로, 예외는 signals.failed로 main thread에 전달됨
+
+        :param name: status bar에 표시할 job 이름
+        :param fn: 첫번째 argument로 JobContext를 받는 함수
+        """
+        super().__init__()
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+        self.signals = WorkerSignals()
+        self.context = JobContext(self.signals.progress.emit)  # tracer는 start하기 전에 바꿀 수 있음
+        self.duration = 0.0  # fn이 실행된 시간 in sec
+
+    def cancel(self) -> None:
+        self.context.cancel()
+
+    def run(self) -> None:
+        # xlwings, win32com은 thread마다 COM 초기화가 필요함
+        try:
+            import pythoncom
+        except ImportError:
+            pythoncom = None
+
+        if pythoncom is not None:
+            pythoncom.CoInitialize()
+
+        try:
+            with self.context.span(self.name) as span:
+                result = self.fn(self.context, *self.args, **self.kwargs)
+            self.duration = span.duration
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception:
+            logger.exception('job %s failed', self.name)
+            self.signals.failed.emit(traceback.format_exc())
+        else:
+            if self.context.is_cancelled():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
+        finally:
+            if pythoncom is not None:
+                pythoncom.CoUninitialize()
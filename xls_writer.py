@@ -0,0 +1,63 @@
+import pathlib
+
+import pandas as pd
+
+# BIFF8(.xls) sheet 하나에 들어갈 수 있는 최대 row 수
+XLS_MAX_ROWS = 65536
+XLS_MAX_COLUMNS = 256
+
+
+def cell_value(value) -> str | None:
+    """
+    우편모아에 올리는 값은 모두 text로 저장한다. 비어있는 값은 None(빈 cell)
+
+    :param value: dataframe의 값
+    :return:
+    """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+
+    value = str(value)
+    return value if value else None
+
+
+def write_xls(df: pd.DataFrame, target: pathlib.Path | str, sheet_name: str = 'Sheet1') -> pathlib.Path:
+    """
+    df를 excel 없이 바로 .xls(BIFF8)로 저장한다
+
+    예전에는 df.to_excel()로 xlsx를 저장하고 excel을 띄워서 SaveAs(FileFormat=56)로 다시 저장했음
+    첫 row는 column 이름, index는 저장하지 않음
+
+    :param df: 저장할 dataframe
+    :param target: 저장할 경로, 확장자는 .xls로 바뀜
+    :param sheet_name: sheet 이름
+    :return: 저장된 .xls 경로
+    """
+    import xlwt  # 저장할 때만 필요함
+
+    target = pathlib.Path(target).with_suffix('.xls')
+
+    if len(df) + 1 > XLS_MAX_ROWS:
+        raise ValueError(f'.xls에는 {XLS_MAX_ROWS - 1}개 row까지만 저장할 수 있음: {len(df)}개')
+    if len(df.columns) > XLS_MAX_COLUMNS:
+        raise ValueError(f'.xls에는 {XLS_MAX_COLUMNS}개 column까지만 저장할 수 있음: {len(df.columns)}개')
+
+    workbook = xlwt.Workbook(encoding='utf-8')
+    sheet = workbook.add_sheet(sheet_name)
+
+    header = sheet.row(0)
+    for c, column in enumerate(df.columns):
+        header.write(c, str(column))
+
+    for r, values in enumerate(df.itertuples(index=False, name=None), start=1):
+        row = sheet.row(r)
+        for c, value in enumerate(values):
+            value = cell_value(value)
+            if value is not None:
+                row.write(c, value)
+
+        if r % 1000 == 0:
+            sheet.flush_row_data()  # 저장한 row는 memory에서 내보냄
+
+    workbook.save(str(target))
+    return target
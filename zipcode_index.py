@@ -0,0 +1,309 @@
+"""
+우편번호 검증용 offline index
+
+우체국 우편번호 DB(도로명주소, '|'로 구분된 txt, 시도별 파일)에서 만든다
+
+    python -m file_to_postmoa build-zipcode-index 서울특별시.txt 부산광역시.txt ... [--out DIR]
+
+index는 폴더 하나에 numpy 배열(.npy)로 저장하고 memory-mapped로 읽으므로 여는 데 시간이 거의 걸리지 않고,
+필요한 page만 읽음
+
+    zipcodes.npy       : 존재하는 우편번호, 정렬된 uint32
+    road_keys.npy      : (시도, 시군구, 도로명, 건물본번)의 64bit hash, 정렬된 uint64
+    road_zipcodes.npy  : road_keys와 같은 순서의 우편번호, 여러 우편번호에 걸친 key는 0
+    meta.json          : version, hash key, 원본 파일, 개수
+
+검증은 row마다 loop를 돌지 않고 column 전체를 한 번에 parsing, hashing, np.searchsorted 함
+"""
+import codecs
+import json
+import os
+import pathlib
+import shutil
+import time
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+from dedup import normalize_distinct, normalize_zipcode
+
+ZIPCODE_INDEX_VERSION = 1
+
+# pd.util.hash_array의 key, 바꾸면 index를 다시 만들어야 함
+HASH_KEY = 'file-to-postmoa1'
+
+# 우편번호 DB의 header 이름, 다른 DB를 사용하면 build_zipcode_index(columns=...)로 바꿈
+SOURCE_COLUMNS = {
+    'zipcode': '우편번호',
+    'sido': '시도',
+    'sigungu': '시군구',
+    'road': '도로명',
+    'building': '건물번호본번',
+}
+
+# 한 번에 읽는 우편번호 DB의 row 수
+SOURCE_CHUNK_SIZE = 500000
+
+# 주소에서 시도, 시군구(와 읍면), 도로명, 건물본번을 찾음
+# 도로명 뒤의 건물번호 다음에는 공백, ',', '(' 또는 끝이 와야 '세종대로23길 47'을 '세종대로 23'으로 읽지 않음
+ROAD_ADDRESS = (r'^(?P<sido>\S+)(?P<middle>(?:\s+\S+)*?)\s+(?P<road>\S+?(?:로|길))\s*'
+                r'(?P<building>\d+)(?:-\d+)?(?=[\s,(]|$)')
+
+# 시도 이름 -> 짧은 이름, 주소와 DB의 표기가 달라도 같은 key가 되도록 함
+SIDO_NAMES = {
+    '서울': ('서울특별시', '서울시'),
+    '부산': ('부산광역시', '부산시'),
+    '대구': ('대구광역시', '대구시'),
+    '인천': ('인천광역시', '인천시'),
+    '광주': ('광주광역시', '광주시'),
+    '대전': ('대전광역시', '대전시'),
+    '울산': ('울산광역시', '울산시'),
+    '세종': ('세종특별자치시', '세종시'),
+    '경기': ('경기도',),
+    '강원': ('강원도', '강원특별자치도'),
+    '충북': ('충청북도',),
+    '충남': ('충청남도',),
+    '전북': ('전라북도', '전북특별자치도'),
+    '전남': ('전라남도',),
+    '경북': ('경상북도',),
+    '경남': ('경상남도',),
+    '제주': ('제주도', '제주특별자치도'),
+}
+SIDO_ALIASES = {name: short for short, names in SIDO_NAMES.items() for name in (short, *names)}
+
+# 검증 결과
+ISSUE_FORMAT = '우편번호는 숫자 5자리'
+ISSUE_UNKNOWN = '없는 우편번호'
+ISSUE_MISMATCH = '주소의 우편번호는 {}'
+
+
+def default_index_path() -> pathlib.Path:
+    """record_cache와 같은 폴더"""
+    base = os.environ.get('LOCALAPPDATA') or pathlib.Path.home() / '.cache'
+    return pathlib.Path(base) / 'file-to-postmoa' / 'zipcode_index'
+
+
+def road_key_strings(sido: pd.Series, sigungu: pd.Series, road: pd.Series, building: pd.Series) -> pd.Series:
+    """
+    주소와 DB에서 같은 형식의 key str을 만든다. 시도는 짧은 이름, 시군구는 공백을 제거함
+
+    :return: '경남|창원시의창구|중앙대로|777', 시도를 모르면 ''
+    """
+    sido = sido.map(SIDO_ALIASES)
+    sigungu = sigungu.fillna('').str.replace(r'\s+', '', regex=True)
+    building = building.fillna('').str.lstrip('0')
+
+    keys = sido + '|' + sigungu + '|' + road.fillna('') + '|' + building
+    return keys.where(sido.notna() & (road.fillna('') != '') & (building != ''), '')
+
+
+def hash_keys(keys: pd.Series) -> np.ndarray:
+    """key str -> uint64, ''는 0"""
+    hashed = pd.util.hash_array(keys.to_numpy(dtype=object), hash_key=HASH_KEY, categorize=False)
+    hashed[(keys == '').to_numpy()] = 0
+    return hashed
+
+
+def parse_addresses(addresses: pd.Series) -> pd.Series:
+    """
+    주소 str -> road_key_strings의 key
+
+    읍면은 DB에서 시군구와 다른 column이라서 제외함. 지번 주소나 형식이 다른 주소는 ''
+
+    :param addresses: 도로명 주소들, 서로 다른 값만 넘기는 것이 빠름
+    :return:
+    """
+    text = addresses.fillna('').astype(str).str.normalize('NFKC').str.strip()
+    parts = text.str.extract(ROAD_ADDRESS)
+
+    sigungu = parts['middle'].fillna('').str.replace(r'\S+[읍면]\b', '', regex=True)
+    return road_key_strings(parts['sido'], sigungu, parts['road'], parts['building'])
+
+
+def address_hashes(addresses: pd.Series) -> np.ndarray:
+    """주소마다 road key hash, 주소를 parsing 할 수 없으면 0. 서로 다른 주소만 parsing 함"""
+    codes, distinct = pd.factorize(addresses.to_numpy(dtype=object), use_na_sentinel=False)
+    return hash_keys(parse_addresses(pd.Series(distinct, dtype=object)))[codes]
+
+
+def detect_encoding(source: pathlib.Path) -> str:
+    """우편번호 DB는 배포 시기에 따라 utf-8 또는 cp949"""
+    with open(source, 'rb') as f:
+        head = f.read(1024 * 1024)
+
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+    except UnicodeDecodeError:
+        return 'cp949'
+
+    return 'utf-8-sig'
+
+
+def build_zipcode_index(sources: Iterable[pathlib.Path | str],
+                        target: pathlib.Path | str | None = None,
+                        columns: dict[str, str] | None = None, ) -> dict:
+    """
+    우편번호 DB 파일들로 index를 만든다. 이미 있으면 다 만든 뒤에 교체함
+
+    :param sources: '|'로 구분되고 첫 줄이 header인 txt 파일들
+    :param target: 저장할 폴더, None이면 default_index_path()
+    :param columns: SOURCE_COLUMNS의 key -> header 이름
+    :return: meta.json 내용
+    """
+    sources = [pathlib.Path(source) for source in sources]
+    target = pathlib.Path(target) if target is not None else default_index_path()
+    columns = {**SOURCE_COLUMNS, **(columns or {})}
+
+    zipcodes = []
+    keys = []
+    key_zipcodes = []
+    rows = 0
+
+    for source in sources:
+        chunks = pd.read_csv(source, sep='|', dtype=str, usecols=list(columns.values()),
+                             encoding=detect_encoding(source), chunksize=SOURCE_CHUNK_SIZE)
+        for chunk in chunks:
+            zipcode = pd.to_numeric(chunk[columns['zipcode']], errors='coerce').fillna(0).to_numpy(dtype=np.uint32)
+            hashed = hash_keys(road_key_strings(chunk[columns['sido']].str.strip(), chunk[columns['sigungu']],
+                                                chunk[columns['road']].str.strip(), chunk[columns['building']]))
+
+            valid = hashed != 0
+            zipcodes.append(np.unique(zipcode[zipcode != 0]))
+            keys.append(hashed[valid])
+            key_zipcodes.append(zipcode[valid])
+            rows += len(chunk)
+
+    zipcodes = np.unique(np.concatenate(zipcodes)) if zipcodes else np.empty(0, dtype=np.uint32)
+    keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.uint64)
+    key_zipcodes = np.concatenate(key_zipcodes) if key_zipcodes else np.empty(0, dtype=np.uint32)
+
+    # 같은 key의 우편번호가 여러 개면(큰 건물 등) 0으로 저장해서 비교하지 않음
+    order = np.argsort(keys, kind='stable')
+    keys, key_zipcodes = keys[order], key_zipcodes[order]
+    road_keys, starts = np.unique(keys, return_index=True)
+    if len(starts):
+        lowest = np.minimum.reduceat(key_zipcodes, starts)
+        highest = np.maximum.reduceat(key_zipcodes, starts)
+        road_zipcodes = np.where(lowest == highest, lowest, 0).astype(np.uint32)
+    else:
+        road_zipcodes = np.empty(0, dtype=np.uint32)
+
+    meta = {
+        'version': ZIPCODE_INDEX_VERSION,
+        'hash_key': HASH_KEY,
+        'sources': [source.name for source in sources],
+        'rows': rows,
+        'zipcodes': len(zipcodes),
+        'road_keys': len(road_keys),
+        'ambiguous': int((road_zipcodes == 0).sum()),
+        'built': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+    # 다른 process가 읽고 있는 index를 깨뜨리지 않도록 임시 폴더에 만들고 교체함
+    building = target.with_name(target.name + '.building')
+    shutil.rmtree(building, ignore_errors=True)
+    building.mkdir(parents=True)
+
+    np.save(building / 'zipcodes.npy', zipcodes.astype(np.uint32))
+    np.save(building / 'road_keys.npy', road_keys.astype(np.uint64))
+    np.save(building / 'road_zipcodes.npy', road_zipcodes)
+    (building / 'meta.json').write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    old = target.with_name(target.name + '.old')
+    shutil.rmtree(old, ignore_errors=True)
+    if target.exists():
+        target.rename(old)
+    building.rename(target)
+    shutil.rmtree(old, ignore_errors=True)
+
+    return meta
+
+
+class ZipcodeIndex:
+    def __init__(self, path: pathlib.Path | str | None = None) -> None:
+        """
+        build_zipcode_index로 만든 index를 memory-mapped로 연다
+
+        :param path: index 폴더, None이면 default_index_path()
+        """
+        self.path = pathlib.Path(path) if path is not None else default_index_path()
+        self.meta = json.loads((self.path / 'meta.json').read_text(encoding='utf-8'))
+        if self.meta.get('version') != ZIPCODE_INDEX_VERSION or self.meta.get('hash_key') != HASH_KEY:
+            raise ValueError(f'다시 만들어야 하는 우편번호 index: {self.path}')
+
+        self.zipcodes = np.load(self.path / 'zipcodes.npy', mmap_mode='r')
+        self.road_keys = np.load(self.path / 'road_keys.npy', mmap_mode='r')
+        self.road_zipcodes = np.load(self.path / 'road_zipcodes.npy', mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.zipcodes)
+
+    def contains(self, zipcodes: np.ndarray) -> np.ndarray:
+        """
+        :param zipcodes: uint32 array
+        :return: index에 있는 우편번호인지
+        """
+        if not len(self.zipcodes):
+            return np.zeros(len(zipcodes), dtype=bool)
+
+        positions = np.searchsorted(self.zipcodes, zipcodes).clip(max=len(self.zipcodes) - 1)
+        return self.zipcodes[positions] == zipcodes
+
+    def lookup(self, addresses: pd.Series) -> np.ndarray:
+        """
+        도로명 주소의 우편번호를 찾는다
+
+        :param addresses: 주소 column
+        :return: uint32 array, 찾지 못했거나 여러 우편번호에 걸친 주소는 0
+        """
+        hashed = address_hashes(addresses)
+        if not len(self.road_keys):
+            return np.zeros(len(hashed), dtype=np.uint32)
+
+        positions = np.searchsorted(self.road_keys, hashed).clip(max=len(self.road_keys) - 1)
+        found = (self.road_keys[positions] == hashed) & (hashed != 0)
+
+        return np.where(found, self.road_zipcodes[positions], 0).astype(np.uint32)
+
+    def validate(self, zipcodes: pd.Series, addresses: pd.Series) -> np.ndarray:
+        """
+        우편번호와 주소를 한 번에 검증한다
+
+        - 우편번호가 숫자 5자리가 아님
+        - index에 없는 우편번호
+        - 주소로 찾은 우편번호와 다름(우편번호가 비어 있으면 찾은 우편번호를 알려줌)
+
+        :param zipcodes: 우편번호 column
+        :param addresses: zipcodes와 같은 길이의 주소 column
+        :return: row마다 문제를 설명하는 str 또는 None인 object array
+        """
+        # normalize_zipcode는 숫자만 남기므로 길이만 확인하면 됨
+        text = normalize_distinct(pd.Series(zipcodes, dtype=object), normalize_zipcode)
+        lengths = np.fromiter(map(len, text), dtype=np.int64, count=len(text))
+        empty = lengths == 0
+        well_formed = lengths == 5
+
+        numbers = np.zeros(len(text), dtype=np.uint32)
+        numbers[well_formed] = text[well_formed].astype(np.uint32)
+
+        known = well_formed & self.contains(numbers)
+        expected = self.lookup(pd.Series(addresses, dtype=object))
+
+        issues = np.full(len(text), None, dtype=object)
+        issues[~empty & ~well_formed] = ISSUE_FORMAT
+        issues[well_formed & ~known] = ISSUE_UNKNOWN
+
+        mismatch = (expected != 0) & (empty | (known & (expected != numbers)))
+        for row in np.flatnonzero(mismatch):
+            issues[row] = ISSUE_MISMATCH.format(f'{expected[row]:05d}')
+
+        return issues
+
+
+def open_zipcode_index(path: pathlib.Path | str | None = None) -> ZipcodeIndex | None:
+    """index를 만들지 않았거나 열 수 없으면 검증 없이 동작하도록 None을 반환함"""
+    try:
+        return ZipcodeIndex(path)
+    except (OSError, ValueError):
+        return None